@@ -40,7 +40,8 @@ def create_app():
     from .Hluggage.models import CrateWeights, CourseGroups, Courses, Clients, LoadingData, LoadingMethods
     from .maintenance.models import MaintenanceType, MaintenanceStatus, MaintenanceSchedule
     from .employee.models import Employee
-    from .fuel.models import EnefleRecord, EneosWingRecord, KitasekiRecord
+    from .fuel.models import EnefleRecord, EneosWingRecord, KitasekiRecord, FuelEfficiencyInterval, FuelAnomaly, FuelStation, FuelStationDailyPrice
+    from .driving_log.models import DeliveryDestination, DrivingLog, FuelingRecord, CarWashRecord
     
     # User loaderの設定
     @login_manager.user_loader
@@ -55,6 +56,7 @@ def create_app():
     from .maintenance.routes import maintenance_bp
     from .employee.routes import employee_bp
     from .fuel.routes import fuel_bp
+    from .driving_log.routes import driving_log_bp
 
     # Blueprint登録（順序を整理）
     app.register_blueprint(login_bp)      # /api/auth/*
@@ -64,6 +66,7 @@ def create_app():
     app.register_blueprint(etc_bp)     # /etc/*
     app.register_blueprint(Hluggage_bp)   # /*
     app.register_blueprint(fuel_bp)       # /api/fuel/*
+    app.register_blueprint(driving_log_bp) # /api/driving-log/*
 
     @app.route("/", methods=["GET"])
     def home():
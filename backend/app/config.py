@@ -15,6 +15,41 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
 
+    # 給油データ異常検知の判定基準
+    FUEL_DUPLICATE_FILL_HOURS = 3     # この時間以内の再給油を重複とみなす
+    FUEL_TANK_CAPACITY_LITERS = 300   # 1回の給油量の上限（リットル）
+    FUEL_PRICE_DEVIATION = 0.05       # 給油所・日ごとの単価中央値からの許容乖離率
+    FUEL_PRICE_MIN_FILLS = 3          # 中央値を算出する最低給油件数
+    FUEL_CARD_MIN_USES = 3            # カードの持ち主車両を推定する最低利用回数
+    FUEL_CARD_LOOKBACK_DAYS = 90      # カード利用履歴の参照日数
+
+    # 整備ダッシュボード概要のキャッシュ保持秒数（0でキャッシュしない）
+    MAINTENANCE_SUMMARY_CACHE_SECONDS = 60
+    # 点検種類・整備状態マスタのキャッシュ保持秒数（0でキャッシュしない）
+    MAINTENANCE_MASTER_CACHE_SECONDS = 300
+    # 点検予定の平準化（期限の何日前まで前倒しできるか、整備士1人あたりの1日の受け持ち件数）
+    MAINTENANCE_SCHEDULE_WINDOW_DAYS = 14
+    MAINTENANCE_TECHNICIAN_DAILY_CAPACITY = 2
+    # 走行距離で作成する仮予定の予定日（今日から何日後）
+    MAINTENANCE_MILEAGE_LEAD_DAYS = 7
+
+    # 整備ファイルの保存先（'supabase' / 'local'。未指定なら SUPABASE_URL があれば supabase）
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND")
+    STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT") or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
+    SUPABASE_URL = os.getenv("SUPABASE_URL")
+    SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    SUPABASE_STORAGE_BUCKET = os.getenv("SUPABASE_STORAGE_BUCKET") or 'maintenance-files'
+    MAINTENANCE_FILE_MAX_MB = 50         # 1ファイルの上限（MB）
+    MAINTENANCE_THUMBNAIL_PX = 320       # サムネイルの長辺（px）
+    MAINTENANCE_PREVIEW_PX = 1280        # プレビューの長辺（px）
+    MAINTENANCE_DERIVATIVES_ASYNC = True  # アップロード後にバックグラウンドでサムネイルを作成する
+
+    # 定期ジョブ（run_scheduler.py）
+    SCHEDULER_OVERDUE_SWEEP_MINUTES = 60  # 期限切れ予定を未実施に更新する間隔（分）
+    SCHEDULER_NIGHTLY_TIME = '02:00'      # 集計の更新・仮予定の生成を行う時刻
+    SCHEDULER_ROLLUP_DAYS = 7             # 毎晩集計し直す直近の日数
+    SCHEDULER_DERIVATIVE_MINUTES = 10     # サムネイル未作成のファイルを処理する間隔（分）
+
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
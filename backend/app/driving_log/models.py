@@ -1,8 +1,8 @@
 # backend/app/driving_log/models.py
 
-from datetime import datetime, time, timedelta
+from datetime import datetime, time
 from app.extensions import db
-from sqlalchemy import Numeric
+from sqlalchemy import Numeric, Computed
 
 class DeliveryDestination(db.Model):
     """配送先マスタテーブル"""
@@ -24,9 +24,23 @@ class DeliveryDestination(db.Model):
     def __repr__(self):
         return f'<DeliveryDestination {self.name}>'
 
+DAILY_MILEAGE_SQL = 'CASE WHEN start_mileage <> 0 AND end_mileage <> 0 THEN end_mileage - start_mileage ELSE 0 END'
+WORK_HOURS_SQL = (
+    "(EXTRACT(EPOCH FROM end_time - start_time)"
+    " + CASE WHEN end_time < start_time THEN 86400 ELSE 0 END)::double precision / 3600"
+)
+
 class DrivingLog(db.Model):
     """運転日報テーブル"""
     __tablename__ = 'driving_logs'
+    __table_args__ = (
+        db.Index('idx_driving_logs_vehicle_date', 'vehicle_id', 'date'),
+        db.Index('idx_driving_logs_date_id', 'date', 'id'),  # 一覧のカーソルページネーション用
+        db.Index('idx_driving_logs_daily_mileage', 'daily_mileage'),
+        db.Index('idx_driving_logs_work_hours', 'work_hours'),
+    )
+    # 生成列の値を INSERT/UPDATE の RETURNING で受け取る（アクセス時の再読み込みを避ける）
+    __mapper_args__ = {'eager_defaults': True}
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, comment='勤務日')
@@ -45,6 +59,12 @@ class DrivingLog(db.Model):
     destination_id = db.Column(db.Integer, db.ForeignKey('delivery_destinations.id'), comment='配送先ID')
     destination_name = db.Column(db.String(100), comment='配送先名（手入力）')  # マスタにない場合の手入力用
     
+    # 集計用の生成列（開始・終了の値からDBが計算して保存する）
+    # 走行距離: 開始・終了のどちらかが0なら0
+    daily_mileage = db.Column(db.Integer, Computed(DAILY_MILEAGE_SQL, persisted=True), comment='1日の走行距離')
+    # 勤務時間: 終了が開始より前なら日をまたいだものとして24時間を足す
+    work_hours = db.Column(db.Float, Computed(WORK_HOURS_SQL, persisted=True), comment='勤務時間（時間）')
+    
     # 見習いフラグ
     is_trainee = db.Column(db.Boolean, default=False, comment='見習いフラグ')
     
@@ -62,28 +82,6 @@ class DrivingLog(db.Model):
 
     def __repr__(self):
         return f'<DrivingLog {self.date} - {self.driver.full_name if self.driver else "Unknown"}>'
-    
-    @property
-    def daily_mileage(self):
-        """1日の走行距離を計算"""
-        if self.start_mileage and self.end_mileage:
-            return self.end_mileage - self.start_mileage
-        return 0
-    
-    @property
-    def work_hours(self):
-        """勤務時間を計算（時間単位）"""
-        if self.start_time and self.end_time:
-            start_datetime = datetime.combine(datetime.today(), self.start_time)
-            end_datetime = datetime.combine(datetime.today(), self.end_time)
-            
-            # 日をまたぐ場合の対応
-            if end_datetime < start_datetime:
-                end_datetime += timedelta(days=1)
-            
-            duration = end_datetime - start_datetime
-            return duration.total_seconds() / 3600  # 時間に変換
-        return 0
 
 class FuelingRecord(db.Model):
     """給油記録テーブル"""
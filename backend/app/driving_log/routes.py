@@ -2,11 +2,16 @@
 
 from flask import Blueprint, jsonify, request
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import joinedload
 from datetime import datetime, date
 from app.extensions import db
 from app.driving_log.models import DrivingLog, DeliveryDestination, FuelingRecord, CarWashRecord
 from app.employee.models import Employee
 from app.vehicle.models import Vehicles
+from app.fuel.refresh import refresh_after_driving_log_change
+from app.maintenance.mileage import track_odometer_after_log_change
+from app.utils.pagination import encode_cursor, decode_cursor
 
 driving_log_bp = Blueprint('driving_log', __name__, url_prefix='/api/driving-log')
 
@@ -61,12 +66,26 @@ def create_destination():
 
 @driving_log_bp.route('/logs/', methods=['GET'])
 def list_driving_logs():
-    """運転日報一覧取得"""
+    """運転日報一覧取得（勤務日の新しい順）
+
+    常にカーソルページネーションで返す（limit の既定は100件、上限1000件）。
+    続きは next_cursor を cursor に指定して取得する。
+    format=compact の場合は日報にはIDのみを載せ、ドライバー・車両・配送先を別の辞書で返す。
+    """
     # クエリパラメータ
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     driver_id = request.args.get('driver_id', type=int)
     vehicle_id = request.args.get('vehicle_id', type=int)
+    limit = request.args.get('limit', type=int)
+    compact = request.args.get('format') == 'compact'
+    
+    try:
+        cursor = decode_cursor(request.args.get('cursor'), [date, int])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    limit = max(1, min(limit or 100, 1000))
     
     # クエリビルダー
     query = DrivingLog.query
@@ -92,38 +111,110 @@ def list_driving_logs():
     if vehicle_id:
         query = query.filter_by(vehicle_id=vehicle_id)
     
+    if cursor:
+        query = query.filter(tuple_(DrivingLog.date, DrivingLog.id) < tuple_(*cursor))
+    
+    # compact では参照先を別途まとめて取得するため、通常表示のときだけ同時に読み込む
+    if not compact:
+        query = query.options(
+            joinedload(DrivingLog.driver),
+            joinedload(DrivingLog.vehicle),
+            joinedload(DrivingLog.destination)
+        )
+    
     # 日付の新しい順で取得
-    logs = query.order_by(DrivingLog.date.desc()).all()
+    query = query.order_by(DrivingLog.date.desc(), DrivingLog.id.desc())
+    # 1件余分に読み、次ページの有無を判定する
+    logs = query.limit(limit + 1).all()
+    has_next = len(logs) > limit
+    logs = logs[:limit]
     
-    result = []
-    for log in logs:
-        result.append({
+    if compact:
+        result = build_compact_logs(logs)
+    else:
+        result = [serialize_log(log) for log in logs]
+    
+    if not compact:
+        result = {'logs': result}
+    last = logs[-1] if logs else None
+    result['next_cursor'] = encode_cursor([last.date, last.id]) if has_next and last else None
+    result['has_next'] = has_next
+    return jsonify(result)
+
+
+def serialize_log(log):
+    """運転日報をドライバー・車両・配送先の情報付きで辞書に変換"""
+    return {
+        'id': log.id,
+        'date': log.date.isoformat(),
+        'driver': {
+            'id': log.driver_id,
+            'name': log.driver.full_name if log.driver else None
+        },
+        'vehicle': {
+            'id': log.vehicle_id,
+            'plate': log.vehicle.自動車登録番号および車両番号 if log.vehicle else None
+        },
+        'start_time': log.start_time.strftime('%H:%M') if log.start_time else None,
+        'end_time': log.end_time.strftime('%H:%M') if log.end_time else None,
+        'start_mileage': log.start_mileage,
+        'end_mileage': log.end_mileage,
+        'daily_mileage': log.daily_mileage,
+        'work_hours': round(log.work_hours, 2),
+        'destination': {
+            'id': log.destination_id,
+            'name': log.destination.name if log.destination else log.destination_name
+        },
+        'is_trainee': log.is_trainee,
+        'notes': log.notes,
+        'created_at': log.created_at.isoformat()
+    }
+
+
+def build_compact_logs(logs):
+    """日報はIDのみで返し、参照されるドライバー・車両・配送先は種類ごとに1クエリで取得して辞書で返す"""
+    driver_ids = {log.driver_id for log in logs}
+    vehicle_ids = {log.vehicle_id for log in logs}
+    destination_ids = {log.destination_id for log in logs if log.destination_id}
+    
+    drivers = db.session.query(
+        Employee.id, Employee.last_name, Employee.first_name
+    ).filter(Employee.id.in_(driver_ids)).all() if driver_ids else []
+    vehicles = db.session.query(
+        Vehicles.id, Vehicles.自動車登録番号および車両番号
+    ).filter(Vehicles.id.in_(vehicle_ids)).all() if vehicle_ids else []
+    destinations = db.session.query(
+        DeliveryDestination.id, DeliveryDestination.name
+    ).filter(DeliveryDestination.id.in_(destination_ids)).all() if destination_ids else []
+    
+    return {
+        'logs': [{
             'id': log.id,
             'date': log.date.isoformat(),
-            'driver': {
-                'id': log.driver_id,
-                'name': log.driver.full_name if log.driver else None
-            },
-            'vehicle': {
-                'id': log.vehicle_id,
-                'plate': log.vehicle.自動車登録番号および車両番号 if log.vehicle else None
-            },
+            'driver_id': log.driver_id,
+            'vehicle_id': log.vehicle_id,
+            'destination_id': log.destination_id,
+            'destination_name': log.destination_name,
             'start_time': log.start_time.strftime('%H:%M') if log.start_time else None,
             'end_time': log.end_time.strftime('%H:%M') if log.end_time else None,
             'start_mileage': log.start_mileage,
             'end_mileage': log.end_mileage,
             'daily_mileage': log.daily_mileage,
             'work_hours': round(log.work_hours, 2),
-            'destination': {
-                'id': log.destination_id,
-                'name': log.destination.name if log.destination else log.destination_name
-            },
             'is_trainee': log.is_trainee,
             'notes': log.notes,
             'created_at': log.created_at.isoformat()
-        })
-    
-    return jsonify(result)
+        } for log in logs],
+        'drivers': {
+            str(d.id): {'name': f'{d.last_name} {d.first_name}'} for d in drivers
+        },
+        'vehicles': {
+            str(v.id): {'plate': v.自動車登録番号および車両番号} for v in vehicles
+        },
+        'destinations': {
+            str(d.id): {'name': d.name} for d in destinations
+        }
+    }
 
 @driving_log_bp.route('/logs/', methods=['POST'])
 def create_driving_log():
@@ -178,6 +269,12 @@ def create_driving_log():
         db.session.add(new_log)
         db.session.commit()
         
+        # 燃費集計を差分更新
+        refresh_after_driving_log_change([(new_log.vehicle_id, new_log.date)])
+        
+        # 最新走行距離を更新し、距離による点検予定を作成
+        track_odometer_after_log_change([(new_log.vehicle_id, new_log.date, new_log.end_mileage, new_log.id)])
+        
         return jsonify({
             'id': new_log.id,
             'message': '運転日報を登録しました',
@@ -194,7 +291,11 @@ def create_driving_log():
 @driving_log_bp.route('/logs/<int:log_id>/', methods=['GET'])
 def get_driving_log(log_id):
     """運転日報詳細取得"""
-    log = DrivingLog.query.get_or_404(log_id)
+    log = DrivingLog.query.options(
+        joinedload(DrivingLog.driver),
+        joinedload(DrivingLog.vehicle),
+        joinedload(DrivingLog.destination)
+    ).filter_by(id=log_id).first_or_404()
     
     result = {
         'id': log.id,
@@ -232,6 +333,7 @@ def update_driving_log(log_id):
     """運転日報更新"""
     log = DrivingLog.query.get_or_404(log_id)
     data = request.json
+    previous_key = (log.vehicle_id, log.date)
     
     try:
         # 更新可能なフィールドを更新
@@ -264,6 +366,10 @@ def update_driving_log(log_id):
         
         db.session.commit()
         
+        # 燃費集計を差分更新（車両・日付の変更に備えて変更前の分も対象にする）
+        refresh_after_driving_log_change([previous_key, (log.vehicle_id, log.date)])
+        track_odometer_after_log_change([(log.vehicle_id, log.date, log.end_mileage, log.id)])
+        
         return jsonify({
             'id': log.id,
             'message': '運転日報を更新しました',
@@ -282,10 +388,14 @@ def delete_driving_log(log_id):
     """運転日報削除"""
     log = DrivingLog.query.get_or_404(log_id)
     
+    deleted_key = (log.vehicle_id, log.date)
+    
     try:
         db.session.delete(log)
         db.session.commit()
         
+        refresh_after_driving_log_change([deleted_key])
+        
         return jsonify({'message': '運転日報を削除しました'})
         
     except SQLAlchemyError as e:
@@ -296,7 +406,10 @@ def delete_driving_log(log_id):
 
 @driving_log_bp.route('/statistics/', methods=['GET'])
 def get_driving_statistics():
-    """運転統計情報取得"""
+    """運転統計情報取得
+
+    driver_statistics / vehicle_statistics はIDをキーにし、名前は drivers / vehicles に別に返す。
+    """
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -307,43 +420,47 @@ def get_driving_statistics():
         start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        # 期間内の運転日報を取得
-        logs = DrivingLog.query.filter(
+        # ドライバー別・車両別の集計を GROUPING SETS で1クエリにまとめて取得
+        is_vehicle_row = func.grouping(DrivingLog.driver_id)
+        rows = db.session.query(
+            is_vehicle_row.label('is_vehicle_row'),
+            DrivingLog.driver_id,
+            DrivingLog.vehicle_id,
+            func.sum(DrivingLog.daily_mileage).label('total_mileage'),
+            func.sum(DrivingLog.work_hours).label('total_hours'),
+            func.count(DrivingLog.id).label('total_days')
+        ).filter(
             DrivingLog.date.between(start_date, end_date)
+        ).group_by(
+            func.grouping_sets(tuple_(DrivingLog.driver_id), tuple_(DrivingLog.vehicle_id))
         ).all()
         
-        # 統計計算
-        total_mileage = sum(log.daily_mileage for log in logs)
-        total_work_hours = sum(log.work_hours for log in logs)
-        total_days = len(logs)
+        def stats(row):
+            return {
+                'total_mileage': int(row.total_mileage or 0),
+                'total_hours': round(float(row.total_hours or 0), 2),
+                'total_days': row.total_days
+            }
         
-        # ドライバー別統計
-        driver_stats = {}
-        for log in logs:
-            driver_name = log.driver.full_name if log.driver else f'ID:{log.driver_id}'
-            if driver_name not in driver_stats:
-                driver_stats[driver_name] = {
-                    'total_mileage': 0,
-                    'total_hours': 0,
-                    'total_days': 0
-                }
-            driver_stats[driver_name]['total_mileage'] += log.daily_mileage
-            driver_stats[driver_name]['total_hours'] += log.work_hours
-            driver_stats[driver_name]['total_days'] += 1
+        driver_stats = {row.driver_id: stats(row) for row in rows if not row.is_vehicle_row}
+        vehicle_stats = {row.vehicle_id: stats(row) for row in rows if row.is_vehicle_row}
         
-        # 車両別統計
-        vehicle_stats = {}
-        for log in logs:
-            vehicle_plate = log.vehicle.自動車登録番号および車両番号 if log.vehicle else f'ID:{log.vehicle_id}'
-            if vehicle_plate not in vehicle_stats:
-                vehicle_stats[vehicle_plate] = {
-                    'total_mileage': 0,
-                    'total_hours': 0,
-                    'total_days': 0
-                }
-            vehicle_stats[vehicle_plate]['total_mileage'] += log.daily_mileage
-            vehicle_stats[vehicle_plate]['total_hours'] += log.work_hours
-            vehicle_stats[vehicle_plate]['total_days'] += 1
+        # 日報には必ずドライバーがいるため、ドライバー別の合計が全体の合計になる
+        total_mileage = sum(s['total_mileage'] for s in driver_stats.values())
+        total_work_hours = sum(float(row.total_hours or 0) for row in rows if not row.is_vehicle_row)
+        total_days = sum(s['total_days'] for s in driver_stats.values())
+        
+        # 名前は集計に出てきたIDの分だけまとめて取得
+        drivers = {
+            employee_id: f'{last_name} {first_name}'
+            for employee_id, last_name, first_name in db.session.query(
+                Employee.id, Employee.last_name, Employee.first_name
+            ).filter(Employee.id.in_(list(driver_stats))).all()
+        } if driver_stats else {}
+        vehicles = dict(
+            db.session.query(Vehicles.id, Vehicles.自動車登録番号および車両番号)
+            .filter(Vehicles.id.in_(list(vehicle_stats))).all()
+        ) if vehicle_stats else {}
         
         result = {
             'period': {
@@ -358,10 +475,14 @@ def get_driving_statistics():
                 'average_hours_per_day': round(total_work_hours / total_days, 2) if total_days > 0 else 0
             },
             'driver_statistics': driver_stats,
-            'vehicle_statistics': vehicle_stats
+            'vehicle_statistics': vehicle_stats,
+            'drivers': drivers,
+            'vehicles': vehicles
         }
         
         return jsonify(result)
         
     except ValueError as e:
-        return jsonify({'error': f'日付形式が正しくありません: {str(e)}'}), 400
\ No newline at end of file
+        return jsonify({'error': f'日付形式が正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
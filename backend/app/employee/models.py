@@ -32,6 +32,7 @@ class Employee(db.Model):
     # リレーションシップ
     # maintenance_schedules = db.relationship('MaintenanceSchedule', backref='employee', foreign_keys='MaintenanceSchedule.technician_id')
     # driving_records = db.relationship('DrivingRecord', backref='driver', foreign_keys='DrivingRecord.driver_id')
+    driving_logs_as_driver = db.relationship('DrivingLog', foreign_keys='DrivingLog.driver_id', back_populates='driver')
 
     def __repr__(self):
         return f'<Employee {self.employee_code}: {self.last_name} {self.first_name}>'
@@ -1,10 +1,11 @@
 # backend/app/etc/routes.py
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from sqlalchemy import and_, func, extract
 from datetime import datetime, date
 from app.extensions import db
 from .models import ETCUsage
 from app.vehicle.models import Vehicles
+from app.maintenance.costs import refresh_etc_costs
 import pandas as pd
 import io
 
@@ -147,6 +148,7 @@ def upload_etc_csv():
         imported_count = 0
         error_count = 0
         errors = []
+        imported_dates = []
         
         def parse_japanese_date(date_str):
             """日本語の日付フォーマットをパース（yyyy/mm/dd形式）"""
@@ -209,6 +211,8 @@ def upload_etc_csv():
                 
                 db.session.add(usage)
                 imported_count += 1
+                if start_date:
+                    imported_dates.append(start_date)
                 
             except Exception as e:
                 error_count += 1
@@ -218,6 +222,14 @@ def upload_etc_csv():
         # データベースにコミット
         db.session.commit()
         
+        # 車両別の高速料金集計を取り込んだ期間だけ更新（取り込み自体はコミット済みのため失敗しても続ける）
+        if imported_dates:
+            try:
+                refresh_etc_costs(min(imported_dates), max(imported_dates))
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.warning(f'車両別高速料金の集計エラー: {str(e)}')
+        
         return jsonify({
             "message": f"CSVインポートが完了しました",
             "imported_count": imported_count,
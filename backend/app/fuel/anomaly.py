@@ -0,0 +1,236 @@
+# backend/app/fuel/anomaly.py
+
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import select, func, literal, null, cast, case, and_, or_, String, Integer, Numeric
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.extensions import db
+from .models import FuelAnomaly
+from .sources import fuel_transactions, vehicle_key_expression
+
+# 挿入対象の列（各チェックの SELECT はこの順で列を返す）
+ANOMALY_COLUMNS = [
+    'source', 'record_id', 'anomaly_type', 'vehicle_number', 'fuel_date',
+    'measured_value', 'reference_value', 'expected_vehicle',
+    'related_source', 'related_record_id', 'is_resolved', 'created_at',
+]
+
+# カード情報を持つ提供元（北関東石油のデータにはカード番号がない）
+CARD_SOURCES = ['enefle', 'eneos_wing']
+
+
+def detect_fuel_anomalies(start_date, end_date, sources=None):
+    """指定期間の給油データを検査し、異常を fuel_anomalies に登録
+
+    各チェックは期間内のデータに対する INSERT ... SELECT 1文で実行する。
+    検出済みの異常は (提供元, レコードID, 種別) で重複を除くため、再実行しても増えない。
+    戻り値は種別ごとの新規検出件数。
+    """
+    config = current_app.config
+    checks = {
+        'duplicate_fill': _duplicate_fill_select(
+            start_date, end_date, sources, config.get('FUEL_DUPLICATE_FILL_HOURS', 3)),
+        'over_capacity': _over_capacity_select(
+            start_date, end_date, sources, config.get('FUEL_TANK_CAPACITY_LITERS', 300)),
+        'price_outlier': _price_outlier_select(
+            start_date, end_date, sources,
+            config.get('FUEL_PRICE_DEVIATION', 0.05), config.get('FUEL_PRICE_MIN_FILLS', 3)),
+        'card_mismatch': _card_mismatch_select(
+            start_date, end_date, sources,
+            config.get('FUEL_CARD_MIN_USES', 3), config.get('FUEL_CARD_LOOKBACK_DAYS', 90)),
+    }
+
+    counts = {}
+    for anomaly_type, stmt in checks.items():
+        if stmt is None:
+            counts[anomaly_type] = 0
+            continue
+        result = db.session.execute(
+            pg_insert(FuelAnomaly.__table__)
+            .from_select(ANOMALY_COLUMNS, stmt)
+            .on_conflict_do_nothing(index_elements=['source', 'record_id', 'anomaly_type'])
+        )
+        counts[anomaly_type] = max(result.rowcount or 0, 0)
+
+    db.session.commit()
+    return counts
+
+
+def detect_anomalies_for_keys(source, imported_keys):
+    """取り込んだデータ（日付, 車番, ...）の日付範囲を対象に異常検知"""
+    dates = [key[0] for key in imported_keys if key and isinstance(key[0], date)]
+    if not dates:
+        return {}
+    return detect_fuel_anomalies(min(dates), max(dates), sources=[source])
+
+
+def _anomaly_row(t, anomaly_type, measured_value=None, reference_value=None,
+                 expected_vehicle=None, related_source=None, related_record_id=None):
+    """fuel_transactions の行から ANOMALY_COLUMNS 順の列を作成"""
+    return [
+        t.c.source,
+        t.c.record_id,
+        literal(anomaly_type, String),
+        t.c.vehicle_number,
+        t.c.fuel_date,
+        cast(measured_value, Numeric) if measured_value is not None else cast(null(), Numeric),
+        cast(reference_value, Numeric) if reference_value is not None else cast(null(), Numeric),
+        expected_vehicle if expected_vehicle is not None else cast(null(), String),
+        related_source if related_source is not None else cast(null(), String),
+        related_record_id if related_record_id is not None else cast(null(), Integer),
+        literal(False),
+        func.now(),
+    ]
+
+
+def _duplicate_fill_select(start_date, end_date, sources, hours):
+    """同一車両が hours 時間以内に再給油した行（2件目以降）
+
+    同じ伝票（レシート）の明細は1回の給油としてまとめ、先頭の行を代表として判定する。
+    前日・翌日分も含めて車両ごとに給油日時順の LAG を取り、直前の給油との間隔で判定する。
+    給油時刻のないデータ（北関東石油）との比較は日付で行い、同じ日の給油を検出対象とする。
+    """
+    t = fuel_transactions(start_date - timedelta(days=1), end_date + timedelta(days=1), sources=sources)
+    vehicle_key = vehicle_key_expression(t.c.vehicle_number)
+    fills = select(
+        t.c.source,
+        func.min(t.c.record_id).label('record_id'),
+        func.min(t.c.vehicle_number).label('vehicle_number'),
+        t.c.fuel_date,
+        func.min(t.c.fuel_time).label('fuel_time'),
+        vehicle_key.label('vehicle_key'),
+    ).where(vehicle_key.isnot(None)).group_by(
+        t.c.source, t.c.station_code, t.c.fuel_date, vehicle_key, t.c.voucher_number,
+        # 伝票番号のない行はまとめない
+        case((t.c.voucher_number.is_(None), t.c.record_id))
+    ).subquery('fills')
+
+    fueled_at = fills.c.fuel_date + fills.c.fuel_time  # 給油時刻がなければ NULL
+    window = dict(
+        partition_by=fills.c.vehicle_key,
+        order_by=(fills.c.fuel_date, fills.c.fuel_time.nulls_last(), fills.c.source, fills.c.record_id)
+    )
+    ordered = select(
+        fills.c.source,
+        fills.c.record_id,
+        fills.c.vehicle_number,
+        fills.c.fuel_date,
+        fueled_at.label('fueled_at'),
+        func.lag(fills.c.source).over(**window).label('previous_source'),
+        func.lag(fills.c.record_id).over(**window).label('previous_record_id'),
+        func.lag(fills.c.fuel_date).over(**window).label('previous_fuel_date'),
+        func.lag(fueled_at).over(**window).label('previous_fueled_at'),
+    ).subquery('ordered_fills')
+
+    # どちらかに給油時刻がなければ NULL（間隔時間は記録せず、日付で判定する）
+    gap_hours = func.extract('epoch', ordered.c.fueled_at - ordered.c.previous_fueled_at) / 3600
+    return select(*_anomaly_row(
+        ordered, 'duplicate_fill',
+        measured_value=gap_hours,
+        reference_value=literal(hours),
+        related_source=ordered.c.previous_source,
+        related_record_id=ordered.c.previous_record_id,
+    )).where(
+        ordered.c.previous_fuel_date.isnot(None),
+        or_(
+            gap_hours <= hours,
+            and_(
+                or_(ordered.c.fueled_at.is_(None), ordered.c.previous_fueled_at.is_(None)),
+                ordered.c.fuel_date == ordered.c.previous_fuel_date
+            )
+        ),
+        ordered.c.fuel_date.between(start_date, end_date)
+    )
+
+
+def _over_capacity_select(start_date, end_date, sources, capacity):
+    """1回の給油量がタンク容量を超える行"""
+    t = fuel_transactions(start_date, end_date, sources=sources)
+    return select(*_anomaly_row(
+        t, 'over_capacity',
+        measured_value=t.c.liters,
+        reference_value=literal(capacity),
+    )).where(t.c.liters > capacity)
+
+
+def _price_outlier_select(start_date, end_date, sources, deviation, min_fills):
+    """単価が同じ給油所・同じ日・同じ商品の中央値から deviation 以上離れている行"""
+    prices = fuel_transactions(start_date, end_date, sources=sources)
+    product_name = func.coalesce(prices.c.product_name, '')
+    medians = select(
+        prices.c.source,
+        prices.c.station_code,
+        prices.c.fuel_date,
+        product_name.label('product_name'),
+        func.percentile_cont(0.5).within_group(prices.c.unit_price).label('median_price'),
+    ).where(
+        prices.c.station_code.isnot(None),
+        prices.c.unit_price > 0
+    ).group_by(
+        prices.c.source, prices.c.station_code, prices.c.fuel_date, product_name
+    ).having(func.count() >= min_fills).subquery('station_daily_medians')
+
+    t = fuel_transactions(start_date, end_date, sources=sources)
+    return select(*_anomaly_row(
+        t, 'price_outlier',
+        measured_value=t.c.unit_price,
+        reference_value=medians.c.median_price,
+    )).select_from(
+        t.join(medians, and_(
+            t.c.source == medians.c.source,
+            t.c.station_code == medians.c.station_code,
+            t.c.fuel_date == medians.c.fuel_date,
+            func.coalesce(t.c.product_name, '') == medians.c.product_name
+        ))
+    ).where(
+        medians.c.median_price > 0,
+        func.abs(t.c.unit_price - medians.c.median_price) > medians.c.median_price * deviation
+    )
+
+
+def _card_mismatch_select(start_date, end_date, sources, min_uses, lookback_days):
+    """カードに対応する車両と給油車番が一致しない行
+
+    エネフレはカード番号がカード車番のため直接照合する。
+    エネオスウィングは過去 lookback_days 日で最も多くそのカードを使った車両を持ち主とみなす。
+    """
+    names = [name for name in (sources or CARD_SOURCES) if name in CARD_SOURCES]
+    if not names:
+        return None
+
+    history = fuel_transactions(start_date - timedelta(days=lookback_days), end_date, sources=names)
+    history_key = vehicle_key_expression(history.c.vehicle_number)
+    owners = select(
+        history.c.source,
+        history.c.card_number,
+        func.mode().within_group(history_key).label('owner_key'),
+    ).where(
+        history.c.card_number.isnot(None),
+        history.c.card_number != '',
+        history_key.isnot(None)
+    ).group_by(
+        history.c.source, history.c.card_number
+    ).having(func.count() >= min_uses).subquery('card_owners')
+
+    t = fuel_transactions(start_date, end_date, sources=names)
+    vehicle_key = vehicle_key_expression(t.c.vehicle_number)
+    expected_key = case(
+        (t.c.source == 'enefle', func.coalesce(vehicle_key_expression(t.c.card_number), owners.c.owner_key)),
+        else_=owners.c.owner_key
+    )
+    return select(*_anomaly_row(
+        t, 'card_mismatch',
+        expected_vehicle=expected_key,
+    )).select_from(
+        t.outerjoin(owners, and_(
+            t.c.source == owners.c.source,
+            t.c.card_number == owners.c.card_number
+        ))
+    ).where(
+        t.c.card_number.isnot(None),
+        t.c.card_number != '',
+        vehicle_key.isnot(None),
+        expected_key.isnot(None),
+        vehicle_key != expected_key
+    )
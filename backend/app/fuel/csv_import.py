@@ -11,6 +11,7 @@ from app import create_app
 from app.extensions import db
 from app.fuel.models import EnefleRecord
 from app.fuel.encoding_utils import try_multiple_encodings, preview_file_content
+from app.fuel.refresh import refresh_after_import
 
 def import_enefle_csv_command(csv_file_path):
     """
@@ -44,6 +45,7 @@ def import_enefle_csv_command(csv_file_path):
         skipped_8010_count = 0  # 商品コード8010でスキップした件数
         error_count = 0
         errors = []
+        imported_keys = set()  # 燃費集計の差分更新用（日付, 車番）
         
         # プログレス表示用
         total_rows = len(df)
@@ -84,6 +86,7 @@ def import_enefle_csv_command(csv_file_path):
                 
                 # データベースに追加
                 db.session.add(record)
+                imported_keys.add((record.transaction_date, record.input_vehicle_number))
                 imported_count += 1
                 
                 # 100件ごとにコミット
@@ -100,6 +103,9 @@ def import_enefle_csv_command(csv_file_path):
         # 最終コミット
         db.session.commit()
         
+        # 燃費などの集計を差分更新
+        refresh_after_import('enefle', imported_keys)
+        
         # 結果表示
         print("\n" + "="*50)
         print("📈 インポート結果:")
@@ -10,6 +10,7 @@ from sqlalchemy import and_
 from app.extensions import db
 from app.fuel.models import KitasekiRecord
 from app.fuel.encoding_utils import try_multiple_encodings
+from app.fuel.refresh import refresh_after_import
 
 def import_kitaseki_csv_from_file(file_path, batch_size=100):
     """
@@ -114,6 +115,9 @@ def import_kitaseki_csv_from_file(file_path, batch_size=100):
         # 最終コミット
         db.session.commit()
         
+        # 燃費などの集計を差分更新
+        refresh_after_import('kitaseki', existing_records)
+        
         result = {
             'message': 'CSVインポートが完了しました',
             'file_path': file_path,
@@ -0,0 +1,293 @@
+# backend/app/fuel/efficiency.py
+
+from collections import defaultdict
+from statistics import median
+from sqlalchemy import select, insert, delete, func, and_, or_
+
+from app.extensions import db
+from app.vehicle.models import Vehicles
+from app.driving_log.models import DrivingLog
+from .models import FuelEfficiencyInterval
+from .sources import fuel_transactions, build_vehicle_key_map, normalize_vehicle_number
+
+
+def refresh_fuel_efficiency(changes=None):
+    """燃費（km/L）集計を更新
+
+    changes: {車両ID: 変更のあった最も古い日付}。None の場合は全車両を再計算する。
+    変更日以降に終わる給油間隔だけを削除し、その直前の給油日を起点に再計算するため、
+    過去の履歴を毎回読み直すことはない。
+
+    給油は運転日報の勤務終了後に行われたものとみなし、
+    給油日当日の走行距離はその給油までの区間に含める。
+    """
+    if changes is not None and not changes:
+        return 0
+
+    key_map = build_vehicle_key_map()
+
+    if changes is None:
+        db.session.execute(delete(FuelEfficiencyInterval))
+        anchors = {}
+        since_date = None
+    else:
+        anchors = _load_anchors(changes)
+        db.session.execute(
+            delete(FuelEfficiencyInterval).where(or_(*[
+                and_(
+                    FuelEfficiencyInterval.vehicle_id == vehicle_id,
+                    FuelEfficiencyInterval.end_date >= since
+                )
+                for vehicle_id, since in changes.items()
+            ])).execution_options(synchronize_session=False)
+        )
+        # 起点のない車両がある場合は全期間から読み込む
+        if any(anchors.get(vehicle_id) is None for vehicle_id in changes):
+            since_date = None
+        else:
+            since_date = min(anchors.values())
+
+    fills = _load_fills(key_map, since_date, changes, anchors)
+    logs = _load_logs(since_date, changes)
+    rows = _merge_intervals(fills, logs, anchors)
+
+    if rows:
+        db.session.execute(insert(FuelEfficiencyInterval), rows)
+    db.session.commit()
+
+    return len(rows)
+
+
+def refresh_fuel_efficiency_for_fuel_rows(rows):
+    """給油データ（車番, 給油日）の追加・削除に合わせて燃費集計を差分更新"""
+    key_map = build_vehicle_key_map()
+    changes = {}
+    for vehicle_number, fuel_date in rows:
+        vehicle_id = key_map.get(normalize_vehicle_number(vehicle_number))
+        if vehicle_id is None or fuel_date is None:
+            continue
+        if vehicle_id not in changes or fuel_date < changes[vehicle_id]:
+            changes[vehicle_id] = fuel_date
+    return refresh_fuel_efficiency(changes)
+
+
+def refresh_fuel_efficiency_for_logs(rows):
+    """運転日報（車両ID, 勤務日）の追加・更新・削除に合わせて燃費集計を差分更新"""
+    changes = {}
+    for vehicle_id, log_date in rows:
+        if vehicle_id is None or log_date is None:
+            continue
+        if vehicle_id not in changes or log_date < changes[vehicle_id]:
+            changes[vehicle_id] = log_date
+    return refresh_fuel_efficiency(changes)
+
+
+def _load_anchors(changes):
+    """車両ごとに、変更日より前に終わる最後の給油間隔の給油日（再計算の起点）を取得"""
+    anchors = {vehicle_id: None for vehicle_id in changes}
+    result = db.session.execute(
+        select(
+            FuelEfficiencyInterval.vehicle_id,
+            func.max(FuelEfficiencyInterval.end_date)
+        ).where(or_(*[
+            and_(
+                FuelEfficiencyInterval.vehicle_id == vehicle_id,
+                FuelEfficiencyInterval.end_date < since
+            )
+            for vehicle_id, since in changes.items()
+        ])).group_by(FuelEfficiencyInterval.vehicle_id)
+    )
+    for vehicle_id, anchor in result:
+        anchors[vehicle_id] = anchor
+    return anchors
+
+
+def _load_fills(key_map, since_date, changes, anchors):
+    """給油量を車両・給油日ごとに集計し、(車両ID, 給油日, 給油量) を車両・日付順で返す"""
+    transactions = fuel_transactions(start_date=since_date)
+    result = db.session.execute(
+        select(
+            transactions.c.vehicle_number,
+            transactions.c.fuel_date,
+            func.sum(transactions.c.liters)
+        ).group_by(transactions.c.vehicle_number, transactions.c.fuel_date)
+    )
+
+    liters_by_day = defaultdict(float)
+    for vehicle_number, fuel_date, liters in result:
+        vehicle_id = key_map.get(normalize_vehicle_number(vehicle_number))
+        if vehicle_id is None or not liters:
+            continue
+        if changes is not None:
+            if vehicle_id not in changes:
+                continue
+            anchor = anchors.get(vehicle_id)
+            if anchor is not None and fuel_date <= anchor:
+                continue
+        liters_by_day[(vehicle_id, fuel_date)] += float(liters)
+
+    return sorted(
+        (vehicle_id, fuel_date, liters)
+        for (vehicle_id, fuel_date), liters in liters_by_day.items()
+    )
+
+
+def _load_logs(since_date, changes):
+    """運転日報の走行距離を車両・勤務日ごとに集計し、車両・日付順で返す"""
+    query = select(
+        DrivingLog.vehicle_id,
+        DrivingLog.date,
+        func.sum(DrivingLog.end_mileage - DrivingLog.start_mileage),
+        func.count(DrivingLog.id)
+    ).group_by(DrivingLog.vehicle_id, DrivingLog.date)\
+     .order_by(DrivingLog.vehicle_id, DrivingLog.date)
+
+    if changes is not None:
+        query = query.where(DrivingLog.vehicle_id.in_(list(changes.keys())))
+    if since_date:
+        query = query.where(DrivingLog.date > since_date)
+
+    return db.session.execute(query).all()
+
+
+def _merge_intervals(fills, logs, anchors):
+    """給油と運転日報を (車両ID, 日付) でソートマージ結合し、給油間隔ごとの燃費を算出
+
+    fills, logs はいずれも (車両ID, 日付) の昇順であること。
+    前回給油日の翌日から今回給油日までの走行距離を、今回の給油量で割る（満タン法）。
+    """
+    rows = []
+    log_index = 0
+    log_total = len(logs)
+    current_vehicle = None
+    previous_fill = None
+
+    for vehicle_id, fill_date, liters in fills:
+        if vehicle_id != current_vehicle:
+            current_vehicle = vehicle_id
+            previous_fill = anchors.get(vehicle_id)
+
+        # 前の車両分と起点以前の日報を読み飛ばす
+        while log_index < log_total and (
+            logs[log_index][0] < vehicle_id or
+            (logs[log_index][0] == vehicle_id and previous_fill is not None and logs[log_index][1] <= previous_fill)
+        ):
+            log_index += 1
+
+        distance = 0
+        log_count = 0
+        while log_index < log_total and logs[log_index][0] == vehicle_id and logs[log_index][1] <= fill_date:
+            distance += max(int(logs[log_index][2] or 0), 0)
+            log_count += logs[log_index][3]
+            log_index += 1
+
+        if previous_fill is not None:
+            rows.append({
+                'vehicle_id': vehicle_id,
+                'start_date': previous_fill,
+                'end_date': fill_date,
+                'distance_km': distance,
+                'liters': round(liters, 3),
+                'km_per_liter': round(distance / liters, 3) if distance > 0 and liters > 0 else None,
+                'log_count': log_count,
+            })
+
+        previous_fill = fill_date
+
+    return rows
+
+
+def efficiency_report(start_date=None, end_date=None, vehicle_id=None, threshold=0.15, include_intervals=False):
+    """車両別・月別の燃費レポートを作成（燃費が車両中央値より threshold 以上低い車両を要注意とする）"""
+    period_filters = []
+    if start_date:
+        period_filters.append(FuelEfficiencyInterval.end_date >= start_date)
+    if end_date:
+        period_filters.append(FuelEfficiencyInterval.end_date <= end_date)
+    if vehicle_id:
+        period_filters.append(FuelEfficiencyInterval.vehicle_id == vehicle_id)
+
+    # 走行距離が記録された区間のみ集計（日報のない区間は燃費を算出できない）
+    filters = period_filters + [FuelEfficiencyInterval.distance_km > 0]
+
+    vehicle_rows = db.session.execute(
+        select(
+            FuelEfficiencyInterval.vehicle_id,
+            func.sum(FuelEfficiencyInterval.distance_km).label('distance_km'),
+            func.sum(FuelEfficiencyInterval.liters).label('liters'),
+            func.count(FuelEfficiencyInterval.id).label('interval_count')
+        ).where(*filters).group_by(FuelEfficiencyInterval.vehicle_id)
+    ).all()
+
+    month = func.date_trunc('month', FuelEfficiencyInterval.end_date)
+    monthly_rows = db.session.execute(
+        select(
+            FuelEfficiencyInterval.vehicle_id,
+            month.label('month'),
+            func.sum(FuelEfficiencyInterval.distance_km).label('distance_km'),
+            func.sum(FuelEfficiencyInterval.liters).label('liters')
+        ).where(*filters)
+         .group_by(FuelEfficiencyInterval.vehicle_id, month)
+         .order_by(FuelEfficiencyInterval.vehicle_id, month)
+    ).all()
+
+    vehicle_ids = [row.vehicle_id for row in vehicle_rows]
+    plates = dict(
+        db.session.query(Vehicles.id, Vehicles.自動車登録番号および車両番号)
+        .filter(Vehicles.id.in_(vehicle_ids)).all()
+    ) if vehicle_ids else {}
+
+    vehicles = []
+    for row in vehicle_rows:
+        liters = float(row.liters or 0)
+        distance = int(row.distance_km or 0)
+        vehicles.append({
+            'vehicle_id': row.vehicle_id,
+            'plate': plates.get(row.vehicle_id),
+            'distance_km': distance,
+            'liters': round(liters, 3),
+            'km_per_liter': round(distance / liters, 3) if liters > 0 else None,
+            'interval_count': row.interval_count,
+        })
+
+    ratios = [v['km_per_liter'] for v in vehicles if v['km_per_liter']]
+    fleet_median = median(ratios) if ratios else None
+    for v in vehicles:
+        if fleet_median and v['km_per_liter']:
+            v['deviation_pct'] = round((v['km_per_liter'] - fleet_median) / fleet_median * 100, 1)
+            v['is_underperforming'] = v['km_per_liter'] < fleet_median * (1 - threshold)
+        else:
+            v['deviation_pct'] = None
+            v['is_underperforming'] = False
+    vehicles.sort(key=lambda v: (v['km_per_liter'] is None, v['km_per_liter'] or 0))
+
+    total_distance = sum(v['distance_km'] for v in vehicles)
+    total_liters = sum(v['liters'] for v in vehicles)
+
+    result = {
+        'fleet': {
+            'distance_km': total_distance,
+            'liters': round(total_liters, 3),
+            'km_per_liter': round(total_distance / total_liters, 3) if total_liters > 0 else None,
+            'median_km_per_liter': fleet_median,
+            'threshold': threshold,
+        },
+        'vehicles': vehicles,
+        'monthly': [
+            {
+                'vehicle_id': row.vehicle_id,
+                'month': row.month.strftime('%Y-%m'),
+                'distance_km': int(row.distance_km or 0),
+                'liters': round(float(row.liters or 0), 3),
+                'km_per_liter': round(int(row.distance_km or 0) / float(row.liters), 3) if row.liters else None,
+            }
+            for row in monthly_rows
+        ],
+    }
+
+    if include_intervals:
+        intervals = FuelEfficiencyInterval.query.filter(*period_filters)\
+            .order_by(FuelEfficiencyInterval.vehicle_id, FuelEfficiencyInterval.end_date).all()
+        result['intervals'] = [interval.to_dict() for interval in intervals]
+
+    return result
@@ -343,6 +343,15 @@ class KitasekiRecord(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, comment='更新日時')
     import_batch_id = db.Column(db.String(50), comment='インポートバッチID')
 
+    # インデックス
+    __table_args__ = (
+        # 重複チェック（日付・車番・伝票番号・行番号）と期間指定の一覧
+        db.Index('idx_kitaseki_dedup', 'transaction_date', 'vehicle_number', 'voucher_number', 'line_number'),
+        # 車両別の一覧・集計（集計列を含め、テーブルを読まずに済むようにする）
+        db.Index('idx_kitaseki_vehicle_date', 'vehicle_number', 'transaction_date',
+                 postgresql_include=['quantity', 'unit_price', 'product_amount', 'product_name', 'id']),
+    )
+
     def __repr__(self):
         return f'<KitasekiRecord {self.transaction_date} {self.vehicle_number} {self.quantity}L>'
 
@@ -485,5 +494,165 @@ class KitasekiRecord(db.Model):
     def formatted_fuel_time(self):
         """給油時間を文字列で返す"""
         return self.fuel_time.strftime('%H:%M') if self.fuel_time else None
-    
 
+
+class FuelEfficiencyInterval(db.Model):
+    """燃費集計テーブル（車両・給油間隔ごと）"""
+    __tablename__ = 'fuel_efficiency_intervals'
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), nullable=False, comment='車両ID')
+    start_date = db.Column(db.Date, nullable=False, comment='前回給油日')
+    end_date = db.Column(db.Date, nullable=False, comment='給油日')
+    distance_km = db.Column(db.Integer, nullable=False, default=0, comment='走行距離（km）')
+    liters = db.Column(db.Numeric(10, 3), nullable=False, comment='給油量（リットル）')
+    km_per_liter = db.Column(db.Numeric(8, 3), comment='燃費（km/L）')
+    log_count = db.Column(db.Integer, default=0, comment='対象運転日報件数')
+    created_at = db.Column(db.DateTime, default=datetime.now, comment='作成日時')
+
+    __table_args__ = (
+        db.UniqueConstraint('vehicle_id', 'end_date', name='uq_fuel_efficiency_vehicle_end'),
+        db.Index('idx_fuel_efficiency_end_vehicle', 'end_date', 'vehicle_id'),
+    )
+
+    def __repr__(self):
+        return f'<FuelEfficiencyInterval {self.vehicle_id} {self.start_date}-{self.end_date} {self.km_per_liter}km/L>'
+
+    def to_dict(self):
+        """JSONレスポンス用に辞書化"""
+        return {
+            'id': self.id,
+            'vehicle_id': self.vehicle_id,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'distance_km': self.distance_km,
+            'liters': float(self.liters) if self.liters else None,
+            'km_per_liter': float(self.km_per_liter) if self.km_per_liter else None,
+            'log_count': self.log_count,
+        }
+
+
+class FuelAnomaly(db.Model):
+    """給油データ異常検知結果テーブル"""
+    __tablename__ = 'fuel_anomalies'
+
+    TYPE_LABELS = {
+        'duplicate_fill': '短時間での重複給油',
+        'over_capacity': 'タンク容量超過',
+        'price_outlier': '単価の外れ値',
+        'card_mismatch': 'カード・車番不一致',
+    }
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(20), nullable=False, comment='データ提供元（enefle / eneos_wing / kitaseki）')
+    record_id = db.Column(db.Integer, nullable=False, comment='対象レコードID')
+    anomaly_type = db.Column(db.String(30), nullable=False, comment='異常種別')
+    vehicle_number = db.Column(db.String(20), comment='車番')
+    fuel_date = db.Column(db.Date, nullable=False, comment='給油日')
+    measured_value = db.Column(db.Numeric(12, 3), comment='検出値（給油量・単価・給油間隔時間）')
+    reference_value = db.Column(db.Numeric(12, 3), comment='基準値（タンク容量・単価中央値・判定時間）')
+    expected_vehicle = db.Column(db.String(20), comment='カードに対応する車番')
+    related_source = db.Column(db.String(20), comment='関連レコードの提供元')
+    related_record_id = db.Column(db.Integer, comment='関連レコードID')
+    is_resolved = db.Column(db.Boolean, nullable=False, default=False, comment='確認済みフラグ')
+    resolved_at = db.Column(db.DateTime, comment='確認日時')
+    created_at = db.Column(db.DateTime, default=datetime.now, comment='作成日時')
+
+    __table_args__ = (
+        db.UniqueConstraint('source', 'record_id', 'anomaly_type', name='uq_fuel_anomaly_record_type'),
+        db.Index('idx_fuel_anomaly_resolved_date', 'is_resolved', 'fuel_date', 'id'),
+        db.Index('idx_fuel_anomaly_type_date', 'anomaly_type', 'fuel_date'),
+    )
+
+    def __repr__(self):
+        return f'<FuelAnomaly {self.anomaly_type} {self.source}:{self.record_id}>'
+
+    def to_dict(self):
+        """JSONレスポンス用に辞書化"""
+        return {
+            'id': self.id,
+            'source': self.source,
+            'record_id': self.record_id,
+            'anomaly_type': self.anomaly_type,
+            'anomaly_label': self.TYPE_LABELS.get(self.anomaly_type, self.anomaly_type),
+            'vehicle_number': self.vehicle_number,
+            'fuel_date': self.fuel_date.isoformat() if self.fuel_date else None,
+            'measured_value': float(self.measured_value) if self.measured_value is not None else None,
+            'reference_value': float(self.reference_value) if self.reference_value is not None else None,
+            'expected_vehicle': self.expected_vehicle,
+            'related_source': self.related_source,
+            'related_record_id': self.related_record_id,
+            'is_resolved': self.is_resolved,
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class FuelStation(db.Model):
+    """給油所マスタテーブル（給油データ取り込み時に提供元ごとのSSコードで自動登録）"""
+    __tablename__ = 'fuel_stations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(20), comment='データ提供元（enefle / eneos_wing / kitaseki）')
+    station_code = db.Column(db.String(50), comment='スタンドコード')
+    station_name = db.Column(db.String(200), nullable=False, comment='スタンド名')
+    company_name = db.Column(db.String(100), comment='運営会社名')
+    company_code = db.Column(db.String(20), comment='会社コード')
+    address = db.Column(db.String(500), comment='住所')
+    prefecture = db.Column(db.String(20), comment='都道府県')
+    city = db.Column(db.String(50), comment='市区町村')
+    phone = db.Column(db.String(20), comment='電話番号')
+    is_active = db.Column(db.Boolean, default=True, comment='有効フラグ')
+    created_at = db.Column(db.DateTime, default=datetime.now, comment='作成日時')
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, comment='更新日時')
+
+    __table_args__ = (
+        db.UniqueConstraint('source', 'station_code', name='uq_fuel_stations_source_code'),
+        db.Index('idx_fuel_stations_area', 'prefecture', 'city'),
+    )
+
+    def __repr__(self):
+        return f'<FuelStation {self.source}:{self.station_code} {self.station_name}>'
+
+    def to_dict(self):
+        """JSONレスポンス用に辞書化"""
+        return {
+            'id': self.id,
+            'source': self.source,
+            'station_code': self.station_code,
+            'station_name': self.station_name,
+            'company_name': self.company_name,
+            'address': self.address,
+            'prefecture': self.prefecture,
+            'city': self.city,
+            'phone': self.phone,
+            'is_active': self.is_active,
+        }
+
+
+class FuelStationDailyPrice(db.Model):
+    """給油所・商品ごとの日次単価テーブル（給油データから集計）"""
+    __tablename__ = 'fuel_station_daily_prices'
+
+    id = db.Column(db.Integer, primary_key=True)
+    station_id = db.Column(db.Integer, db.ForeignKey('fuel_stations.id', ondelete='CASCADE'), nullable=False, comment='給油所ID')
+    price_date = db.Column(db.Date, nullable=False, comment='日付')
+    product_name = db.Column(db.String(100), nullable=False, default='', comment='商品名')
+    fill_count = db.Column(db.Integer, nullable=False, default=0, comment='給油件数')
+    total_liters = db.Column(db.Numeric(12, 3), comment='合計給油量（リットル）')
+    total_amount = db.Column(db.Numeric(12, 0), comment='合計金額（円）')
+    min_unit_price = db.Column(db.Numeric(10, 2), comment='最安単価')
+    max_unit_price = db.Column(db.Numeric(10, 2), comment='最高単価')
+    avg_unit_price = db.Column(db.Numeric(10, 2), comment='平均単価（給油量加重）')
+    updated_at = db.Column(db.DateTime, default=datetime.now, comment='集計日時')
+
+    station = db.relationship('FuelStation', backref=db.backref('daily_prices', lazy='dynamic'))
+
+    __table_args__ = (
+        db.UniqueConstraint('station_id', 'price_date', 'product_name', name='uq_station_daily_price'),
+        db.Index('idx_station_daily_price_date_product', 'price_date', 'product_name', 'station_id',
+                 postgresql_include=['avg_unit_price', 'min_unit_price', 'total_liters']),
+    )
+
+    def __repr__(self):
+        return f'<FuelStationDailyPrice {self.station_id} {self.price_date} {self.product_name} {self.avg_unit_price}>'
@@ -0,0 +1,61 @@
+# backend/app/fuel/refresh.py
+
+from flask import current_app
+
+from app.extensions import db
+from .efficiency import refresh_fuel_efficiency_for_fuel_rows, refresh_fuel_efficiency_for_logs
+from .anomaly import detect_anomalies_for_keys
+from .stations import refresh_station_prices_for_keys
+from app.maintenance.costs import refresh_fuel_costs_for_keys
+
+
+def refresh_after_import(source, imported_keys):
+    """給油データ取り込み・削除後の集計更新
+
+    source: 'enefle' / 'eneos_wing' / 'kitaseki'
+    imported_keys: (日付, 車番, ...) 形式の重複チェック用キーの集合
+    インポート自体はコミット済みのため、集計の失敗はログに残して処理を続ける。
+    """
+    if not imported_keys:
+        return
+
+    fuel_rows = [(key[1], key[0]) for key in imported_keys]
+
+    try:
+        refresh_fuel_efficiency_for_fuel_rows(fuel_rows)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'燃費集計の更新エラー（{source}）: {str(e)}')
+
+    try:
+        detect_anomalies_for_keys(source, imported_keys)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'給油データ異常検知エラー（{source}）: {str(e)}')
+
+    try:
+        refresh_station_prices_for_keys(source, imported_keys)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'給油所単価の集計エラー（{source}）: {str(e)}')
+
+    try:
+        refresh_fuel_costs_for_keys(imported_keys)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'車両別燃料費の集計エラー（{source}）: {str(e)}')
+
+
+def refresh_after_driving_log_change(log_keys):
+    """運転日報の登録・更新・削除後の集計更新
+
+    log_keys: (車両ID, 勤務日) の一覧（更新時は変更前・変更後の両方を渡す）
+    """
+    if not log_keys:
+        return
+
+    try:
+        refresh_fuel_efficiency_for_logs(log_keys)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'燃費集計の更新エラー（運転日報）: {str(e)}')
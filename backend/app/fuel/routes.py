@@ -2,15 +2,22 @@
 
 import os
 import csv
+import json
 import pandas as pd
 from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from werkzeug.utils import secure_filename
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func, and_, or_
 
 from app.extensions import db
-from .models import EnefleRecord, EneosWingRecord, KitasekiRecord
+from .models import EnefleRecord, EneosWingRecord, KitasekiRecord, FuelAnomaly, FuelStation
+from .efficiency import refresh_fuel_efficiency, efficiency_report
+from .refresh import refresh_after_import
+from .anomaly import detect_fuel_anomalies
+from .timeline import iter_vehicle_timeline, timeline_key, CURSOR_TYPES
+from .stations import refresh_station_prices, cheapest_stations, SOURCE_COMPANY_NAMES
+from app.utils.pagination import encode_cursor, decode_cursor
 
 fuel_bp = Blueprint('fuel', __name__, url_prefix='/api/fuel')
 
@@ -129,6 +136,9 @@ def import_enefle_csv_file(file_path):
         # 最終コミット
         db.session.commit()
         
+        # 燃費などの集計を差分更新
+        refresh_after_import('enefle', existing_records)
+        
         return {
             'message': 'CSVインポートが完了しました',
             'total_rows': total_rows,
@@ -328,6 +338,9 @@ def import_eneos_wing_csv_file(file_path):
         # 最終コミット
         db.session.commit()
         
+        # 燃費などの集計を差分更新
+        refresh_after_import('eneos_wing', existing_records)
+        
         return {
             'message': 'CSVインポートが完了しました',
             'total_rows': total_rows,
@@ -570,9 +583,16 @@ def delete_enefle_record(record_id):
     
     try:
         record = EnefleRecord.query.get_or_404(record_id)
+        deleted_key = (record.transaction_date, record.input_vehicle_number)
+        FuelAnomaly.query.filter(or_(
+            and_(FuelAnomaly.source == 'enefle', FuelAnomaly.record_id == record_id),
+            and_(FuelAnomaly.related_source == 'enefle', FuelAnomaly.related_record_id == record_id)
+        )).delete(synchronize_session=False)
         db.session.delete(record)
         db.session.commit()
         
+        refresh_after_import('enefle', {deleted_key})
+        
         return jsonify({'message': 'データを削除しました'}), 200
         
     except Exception as e:
@@ -695,6 +715,9 @@ def import_kitaseki_csv_file(file_path):
         # 最終コミット
         db.session.commit()
         
+        # 燃費などの集計を差分更新
+        refresh_after_import('kitaseki', existing_records)
+        
         return {
             'message': 'CSVインポートが完了しました',
             'total_rows': total_rows,
@@ -890,9 +913,16 @@ def delete_kitaseki_record(record_id):
     
     try:
         record = KitasekiRecord.query.get_or_404(record_id)
+        deleted_key = (record.transaction_date, record.vehicle_number)
+        FuelAnomaly.query.filter(or_(
+            and_(FuelAnomaly.source == 'kitaseki', FuelAnomaly.record_id == record_id),
+            and_(FuelAnomaly.related_source == 'kitaseki', FuelAnomaly.related_record_id == record_id)
+        )).delete(synchronize_session=False)
         db.session.delete(record)
         db.session.commit()
         
+        refresh_after_import('kitaseki', {deleted_key})
+        
         return jsonify({'message': 'データを削除しました'}), 200
         
     except Exception as e:
@@ -1099,4 +1129,404 @@ def combined_fuel_summary():
         return jsonify({'error': '統合統計データ取得中にエラーが発生しました'}), 500
 
 
-    
\ No newline at end of file
+# ========== 燃費分析API ==========
+
+@fuel_bp.route('/efficiency', methods=['GET'])
+def get_fuel_efficiency():
+    """車両別・月別の燃費（km/L）を取得"""
+    
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        vehicle_id = request.args.get('vehicle_id', type=int)
+        threshold = request.args.get('threshold', 0.15, type=float)
+        include_intervals = request.args.get('include_intervals', 'false').lower() == 'true'
+        
+        start_date_obj = None
+        end_date_obj = None
+        
+        if start_date:
+            try:
+                start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': '開始日の形式が正しくありません (YYYY-MM-DD)'}), 400
+        
+        if end_date:
+            try:
+                end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': '終了日の形式が正しくありません (YYYY-MM-DD)'}), 400
+        
+        report = efficiency_report(
+            start_date=start_date_obj,
+            end_date=end_date_obj,
+            vehicle_id=vehicle_id,
+            threshold=threshold,
+            include_intervals=include_intervals or bool(vehicle_id)
+        )
+        report['period'] = {
+            'start_date': start_date_obj.isoformat() if start_date_obj else None,
+            'end_date': end_date_obj.isoformat() if end_date_obj else None
+        }
+        
+        return jsonify(report), 200
+        
+    except Exception as e:
+        current_app.logger.error(f'燃費データ取得エラー: {str(e)}')
+        return jsonify({'error': '燃費データ取得中にエラーが発生しました'}), 500
+
+@fuel_bp.route('/efficiency/refresh', methods=['POST'])
+def rebuild_fuel_efficiency():
+    """燃費集計を全件再計算（通常は取り込み時に差分更新される）"""
+    
+    try:
+        interval_count = refresh_fuel_efficiency()
+        
+        return jsonify({
+            'message': '燃費集計を再計算しました',
+            'interval_count': interval_count
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'燃費集計エラー: {str(e)}')
+        return jsonify({'error': '燃費集計中にエラーが発生しました'}), 500
+
+
+# ========== 給油データ異常検知API ==========
+
+@fuel_bp.route('/anomalies', methods=['GET'])
+def get_fuel_anomalies():
+    """給油データの異常一覧を取得（ページネーション付き）"""
+    
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 500)
+        anomaly_type = request.args.get('anomaly_type')
+        source = request.args.get('source')
+        vehicle_number = request.args.get('vehicle_number')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        include_resolved = request.args.get('include_resolved', 'false').lower() == 'true'
+        
+        query = FuelAnomaly.query
+        
+        if not include_resolved:
+            query = query.filter(FuelAnomaly.is_resolved == False)
+        
+        if anomaly_type:
+            query = query.filter(FuelAnomaly.anomaly_type == anomaly_type)
+        
+        if source:
+            query = query.filter(FuelAnomaly.source == source)
+        
+        if vehicle_number:
+            query = query.filter(FuelAnomaly.vehicle_number == vehicle_number)
+        
+        if start_date:
+            try:
+                start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+                query = query.filter(FuelAnomaly.fuel_date >= start_date_obj)
+            except ValueError:
+                return jsonify({'error': '開始日の形式が正しくありません (YYYY-MM-DD)'}), 400
+        
+        if end_date:
+            try:
+                end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+                query = query.filter(FuelAnomaly.fuel_date <= end_date_obj)
+            except ValueError:
+                return jsonify({'error': '終了日の形式が正しくありません (YYYY-MM-DD)'}), 400
+        
+        query = query.order_by(FuelAnomaly.fuel_date.desc(), FuelAnomaly.id.desc())
+        
+        pagination = query.paginate(
+            page=page,
+            per_page=per_page,
+            error_out=False
+        )
+        
+        return jsonify({
+            'anomalies': [anomaly.to_dict() for anomaly in pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_prev': pagination.has_prev,
+                'has_next': pagination.has_next,
+            }
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f'異常データ取得エラー: {str(e)}')
+        return jsonify({'error': '異常データ取得中にエラーが発生しました'}), 500
+
+@fuel_bp.route('/anomalies/scan', methods=['POST'])
+def scan_fuel_anomalies():
+    """指定期間の給油データを再検査（通常は取り込み時に自動で実行される）"""
+    
+    try:
+        data = request.get_json() or {}
+        
+        if not data.get('start_date') or not data.get('end_date'):
+            return jsonify({'error': '開始日と終了日を指定してください'}), 400
+        
+        try:
+            start_date_obj = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': '日付の形式が正しくありません (YYYY-MM-DD)'}), 400
+        
+        if start_date_obj > end_date_obj:
+            return jsonify({'error': '開始日は終了日以前の日付を指定してください'}), 400
+        
+        counts = detect_fuel_anomalies(start_date_obj, end_date_obj, sources=data.get('sources'))
+        
+        return jsonify({
+            'message': '異常検知が完了しました',
+            'detected': counts,
+            'total_detected': sum(counts.values())
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'異常検知エラー: {str(e)}')
+        return jsonify({'error': '異常検知中にエラーが発生しました'}), 500
+
+@fuel_bp.route('/anomalies/<int:anomaly_id>/resolve', methods=['PUT'])
+def resolve_fuel_anomaly(anomaly_id):
+    """異常を確認済みにする"""
+    
+    try:
+        anomaly = FuelAnomaly.query.get_or_404(anomaly_id)
+        data = request.get_json() or {}
+        
+        anomaly.is_resolved = data.get('is_resolved', True)
+        anomaly.resolved_at = datetime.now() if anomaly.is_resolved else None
+        db.session.commit()
+        
+        return jsonify(anomaly.to_dict()), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'異常データ更新エラー: {str(e)}')
+        return jsonify({'error': '異常データ更新中にエラーが発生しました'}), 500
+
+
+# ========== 車両別給油履歴API ==========
+
+@fuel_bp.route('/vehicles/<vehicle_number>/timeline', methods=['GET'])
+def get_vehicle_fuel_timeline(vehicle_number):
+    """車両の給油履歴を3社横断で給油日時順に取得（カーソルページネーション・ストリーミング）"""
+    
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    order = request.args.get('order', 'desc').lower()
+    sources = request.args.getlist('source') or None
+    
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': 'order は asc または desc を指定してください'}), 400
+    
+    try:
+        cursor = decode_cursor(request.args.get('cursor'), CURSOR_TYPES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    descending = order == 'desc'
+    
+    def generate():
+        # 1件余分に読み、次ページの有無を判定する
+        rows = iter_vehicle_timeline(
+            vehicle_number,
+            cursor=cursor,
+            descending=descending,
+            batch_size=min(limit + 1, 200),
+            sources=sources
+        )
+        
+        yield '{"vehicle_number":' + json.dumps(vehicle_number, ensure_ascii=False) + ',"records":['
+        
+        last_row = None
+        has_next = False
+        for count, row in enumerate(rows):
+            if count == limit:
+                has_next = True
+                break
+            record = {
+                'source': row['source'],
+                'record_id': row['record_id'],
+                'vehicle_number': row['vehicle_number'],
+                'fuel_date': row['fuel_date'].isoformat() if row['fuel_date'] else None,
+                'fuel_time': row['fuel_time'].strftime('%H:%M') if row['fuel_time'] else None,
+                'liters': float(row['liters']) if row['liters'] is not None else None,
+                'unit_price': float(row['unit_price']) if row['unit_price'] is not None else None,
+                'amount': float(row['amount']) if row['amount'] is not None else None,
+                'station_code': row['station_code'],
+                'station_name': row['station_name'],
+                'product_name': row['product_name'],
+            }
+            yield (',' if count else '') + json.dumps(record, ensure_ascii=False)
+            last_row = row
+        
+        next_cursor = encode_cursor(timeline_key(last_row)) if has_next and last_row else None
+        yield '],"next_cursor":' + json.dumps(next_cursor) + ',"has_next":' + json.dumps(has_next) + '}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+# ========== 給油所・単価API ==========
+
+@fuel_bp.route('/stations', methods=['GET'])
+def list_fuel_stations():
+    """給油所一覧取得"""
+    
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 200)
+        source = request.args.get('source')
+        prefecture = request.args.get('prefecture')
+        city = request.args.get('city')
+        keyword = request.args.get('q')
+        
+        query = FuelStation.query
+        
+        if source:
+            query = query.filter(FuelStation.source == source)
+        
+        if prefecture:
+            query = query.filter(FuelStation.prefecture == prefecture)
+        
+        if city:
+            query = query.filter(FuelStation.city == city)
+        
+        if keyword:
+            query = query.filter(or_(
+                FuelStation.station_name.like(f'%{keyword}%'),
+                FuelStation.station_code.like(f'%{keyword}%')
+            ))
+        
+        query = query.order_by(FuelStation.source, FuelStation.station_code)
+        
+        pagination = query.paginate(
+            page=page,
+            per_page=per_page,
+            error_out=False
+        )
+        
+        return jsonify({
+            'stations': [station.to_dict() for station in pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_prev': pagination.has_prev,
+                'has_next': pagination.has_next,
+            }
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f'給油所一覧取得エラー: {str(e)}')
+        return jsonify({'error': '給油所一覧取得中にエラーが発生しました'}), 500
+
+@fuel_bp.route('/stations/<int:station_id>', methods=['PUT'])
+def update_fuel_station(station_id):
+    """給油所の所在地などを更新（地域での絞り込みに使用）"""
+    
+    try:
+        station = FuelStation.query.get_or_404(station_id)
+        data = request.get_json() or {}
+        
+        for field in ['station_name', 'address', 'prefecture', 'city', 'phone', 'is_active']:
+            if field in data:
+                setattr(station, field, data[field])
+        
+        db.session.commit()
+        
+        return jsonify(station.to_dict()), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'給油所更新エラー: {str(e)}')
+        return jsonify({'error': '給油所更新中にエラーが発生しました'}), 500
+
+@fuel_bp.route('/stations/cheapest', methods=['GET'])
+def get_cheapest_stations():
+    """期間内の平均単価が安い給油所（地域またはルート上の給油所で絞り込み）"""
+    
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        product = request.args.get('product', '軽油')
+        prefecture = request.args.get('prefecture')
+        city = request.args.get('city')
+        station_ids = request.args.get('station_ids')
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        
+        if not start_date or not end_date:
+            return jsonify({'error': '開始日と終了日を指定してください'}), 400
+        
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': '日付の形式が正しくありません (YYYY-MM-DD)'}), 400
+        
+        try:
+            station_id_list = [int(v) for v in station_ids.split(',') if v.strip()] if station_ids else None
+        except ValueError:
+            return jsonify({'error': 'station_ids はカンマ区切りの給油所IDで指定してください'}), 400
+        
+        stations = cheapest_stations(
+            start_date_obj,
+            end_date_obj,
+            product=product,
+            prefecture=prefecture,
+            city=city,
+            station_ids=station_id_list,
+            limit=limit
+        )
+        
+        return jsonify({
+            'period': {
+                'start_date': start_date_obj.isoformat(),
+                'end_date': end_date_obj.isoformat()
+            },
+            'product': product,
+            'stations': stations
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f'給油所単価取得エラー: {str(e)}')
+        return jsonify({'error': '給油所単価取得中にエラーが発生しました'}), 500
+
+@fuel_bp.route('/stations/refresh', methods=['POST'])
+def rebuild_station_prices():
+    """給油所マスタと日次単価を再集計（通常は取り込み時に差分更新される）"""
+    
+    try:
+        data = request.get_json() or {}
+        start_date_obj = None
+        end_date_obj = None
+        
+        try:
+            if data.get('start_date'):
+                start_date_obj = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            if data.get('end_date'):
+                end_date_obj = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': '日付の形式が正しくありません (YYYY-MM-DD)'}), 400
+        
+        counts = {
+            source: refresh_station_prices(source, start_date_obj, end_date_obj)
+            for source in SOURCE_COMPANY_NAMES
+        }
+        
+        return jsonify({
+            'message': '給油所単価を再集計しました',
+            'daily_price_count': counts
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'給油所単価集計エラー: {str(e)}')
+        return jsonify({'error': '給油所単価集計中にエラーが発生しました'}), 500
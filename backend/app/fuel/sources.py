@@ -0,0 +1,188 @@
+# backend/app/fuel/sources.py
+
+import re
+import unicodedata
+from sqlalchemy import select, literal, null, cast, func, and_, or_, union_all, Time, String
+
+from app.extensions import db
+from app.vehicle.models import Vehicles
+from .models import EnefleRecord, EneosWingRecord, KitasekiRecord
+
+
+def normalize_vehicle_number(value):
+    """車番を照合用のキーに正規化（末尾の数字部分、先頭ゼロ除去）
+
+    給油データの車番（例: '877', '0877'）と車両マスタのナンバープレート
+    （例: '群馬100か8-77'）を突き合わせるためのキーを返す。
+    """
+    if value is None:
+        return None
+    text = unicodedata.normalize('NFKC', str(value))
+    text = re.sub(r'[\s\-・･]', '', text)
+    match = re.search(r'(\d+)\D*$', text)
+    if not match:
+        return None
+    key = match.group(1).lstrip('0')
+    return key or None
+
+
+def vehicle_key_expression(column):
+    """normalize_vehicle_number と同じ照合キーをSQL上で求める式"""
+    digits = func.translate(column, '０１２３４５６７８９', '0123456789')
+    compact = func.regexp_replace(digits, r'[\s\-－・･]', '', 'g')
+    return func.nullif(func.ltrim(func.substring(compact, r'([0-9]+)[^0-9]*$'), '0'), '')
+
+
+def build_vehicle_key_map():
+    """正規化した車番 → 車両IDの対応表を作成（同じキーを持つ車両が複数ある場合は除外）"""
+    key_map = {}
+    ambiguous = set()
+
+    rows = db.session.query(Vehicles.id, Vehicles.自動車登録番号および車両番号).all()
+    for vehicle_id, plate in rows:
+        key = normalize_vehicle_number(plate)
+        if not key:
+            continue
+        if key in key_map and key_map[key] != vehicle_id:
+            ambiguous.add(key)
+        key_map[key] = vehicle_id
+
+    for key in ambiguous:
+        key_map.pop(key, None)
+
+    return key_map
+
+
+class FuelSource:
+    """給油データ提供元（3社）ごとの列対応"""
+
+    def __init__(self, name, model, date_column, time_column, vehicle_column,
+                 liters_column, unit_price_column, amount_column,
+                 station_code_column, station_name_column, card_column, voucher_column, fuel_filter):
+        self.name = name
+        self.model = model
+        self.date_column = date_column
+        self.time_column = time_column
+        self.vehicle_column = vehicle_column
+        self.liters_column = liters_column
+        self.unit_price_column = unit_price_column
+        self.amount_column = amount_column
+        self.station_code_column = station_code_column
+        self.station_name_column = station_name_column
+        self.card_column = card_column
+        self.voucher_column = voucher_column
+        self.fuel_filter = fuel_filter
+
+    def select(self, start_date=None, end_date=None, vehicle_numbers=None):
+        """共通の列名で給油データを取得するSELECT文を作成"""
+        model = self.model
+        stmt = select(
+            literal(self.name).label('source'),
+            model.id.label('record_id'),
+            self.vehicle_column.label('vehicle_number'),
+            self.date_column.label('fuel_date'),
+            (self.time_column if self.time_column is not None else cast(null(), Time)).label('fuel_time'),
+            self.liters_column.label('liters'),
+            self.unit_price_column.label('unit_price'),
+            self.amount_column.label('amount'),
+            self.station_code_column.label('station_code'),
+            self.station_name_column.label('station_name'),
+            model.product_name.label('product_name'),
+            (self.card_column if self.card_column is not None else cast(null(), String)).label('card_number'),
+            self.voucher_column.label('voucher_number'),
+        ).where(self.fuel_filter())
+
+        if start_date:
+            stmt = stmt.where(self.date_column >= start_date)
+        if end_date:
+            stmt = stmt.where(self.date_column <= end_date)
+        if vehicle_numbers is not None:
+            stmt = stmt.where(self.vehicle_column.in_(list(vehicle_numbers)))
+
+        return stmt
+
+
+def _enefle_fuel_filter():
+    return and_(
+        EnefleRecord.quantity > 0,
+        or_(
+            EnefleRecord.product_name.notlike('%消費税%'),
+            EnefleRecord.product_name.is_(None)
+        )
+    )
+
+
+def _eneos_wing_fuel_filter():
+    return and_(
+        EneosWingRecord.quantity > 0,
+        EneosWingRecord.product_category.like('11%')  # 111, 112 など燃料関係
+    )
+
+
+def _kitaseki_fuel_filter():
+    return and_(
+        KitasekiRecord.quantity > 0,
+        or_(
+            KitasekiRecord.product_name.notlike('%消費税%'),
+            KitasekiRecord.product_name.is_(None)
+        )
+    )
+
+
+FUEL_SOURCES = {
+    'enefle': FuelSource(
+        name='enefle',
+        model=EnefleRecord,
+        date_column=EnefleRecord.transaction_date,
+        time_column=EnefleRecord.fuel_time,
+        vehicle_column=EnefleRecord.input_vehicle_number,
+        liters_column=EnefleRecord.quantity,
+        unit_price_column=EnefleRecord.unit_price,
+        amount_column=EnefleRecord.total_amount,
+        station_code_column=EnefleRecord.station_code,
+        station_name_column=EnefleRecord.station_name,
+        card_column=EnefleRecord.card_number,
+        voucher_column=EnefleRecord.slip_number,
+        fuel_filter=_enefle_fuel_filter,
+    ),
+    'eneos_wing': FuelSource(
+        name='eneos_wing',
+        model=EneosWingRecord,
+        date_column=EneosWingRecord.fuel_date,
+        time_column=EneosWingRecord.fuel_time,
+        vehicle_column=EneosWingRecord.vehicle_number,
+        liters_column=EneosWingRecord.quantity,
+        unit_price_column=EneosWingRecord.unit_price_with_tax,
+        amount_column=EneosWingRecord.total_amount,
+        station_code_column=EneosWingRecord.station_code,
+        station_name_column=EneosWingRecord.station_name,
+        card_column=EneosWingRecord.card_code,
+        voucher_column=EneosWingRecord.receipt_number,
+        fuel_filter=_eneos_wing_fuel_filter,
+    ),
+    'kitaseki': FuelSource(
+        name='kitaseki',
+        model=KitasekiRecord,
+        date_column=KitasekiRecord.transaction_date,
+        time_column=None,
+        vehicle_column=KitasekiRecord.vehicle_number,
+        liters_column=KitasekiRecord.quantity,
+        unit_price_column=KitasekiRecord.unit_price,
+        amount_column=KitasekiRecord.product_amount,
+        station_code_column=KitasekiRecord.fuel_station_code,
+        station_name_column=KitasekiRecord.fuel_station_name,
+        card_column=None,
+        voucher_column=KitasekiRecord.voucher_number,
+        fuel_filter=_kitaseki_fuel_filter,
+    ),
+}
+
+
+def fuel_transactions(start_date=None, end_date=None, vehicle_numbers=None, sources=None):
+    """3社の給油データを共通の列名でUNION ALLしたサブクエリを返す"""
+    names = sources or list(FUEL_SOURCES.keys())
+    selects = [
+        FUEL_SOURCES[name].select(start_date, end_date, vehicle_numbers)
+        for name in names
+    ]
+    return union_all(*selects).subquery('fuel_transactions')
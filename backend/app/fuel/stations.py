@@ -0,0 +1,162 @@
+# backend/app/fuel/stations.py
+
+from datetime import date
+from sqlalchemy import select, delete, func, literal, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.extensions import db
+from .models import FuelStation, FuelStationDailyPrice
+from .sources import fuel_transactions
+
+# 提供元ごとの運営会社名
+SOURCE_COMPANY_NAMES = {
+    'enefle': 'エネフレ',
+    'eneos_wing': 'エネオスウィング',
+    'kitaseki': 'キタセキ',
+}
+
+
+def refresh_station_prices(source, start_date=None, end_date=None):
+    """給油データから給油所マスタと日次単価を更新
+
+    1. 期間内に現れた給油所を (提供元, SSコード) で登録（名称は最新の取引のものに更新）
+    2. 期間内の日次単価を削除し、給油所・日付・商品ごとに集計し直して登録
+    日付を省略した場合は全期間を対象にする。戻り値は登録した日次単価の件数。
+    """
+    _upsert_stations(source, start_date, end_date)
+
+    station_ids = select(FuelStation.id).where(FuelStation.source == source)
+    stale = delete(FuelStationDailyPrice).where(FuelStationDailyPrice.station_id.in_(station_ids))
+    if start_date:
+        stale = stale.where(FuelStationDailyPrice.price_date >= start_date)
+    if end_date:
+        stale = stale.where(FuelStationDailyPrice.price_date <= end_date)
+    db.session.execute(stale.execution_options(synchronize_session=False))
+
+    t = fuel_transactions(start_date, end_date, sources=[source])
+    product_name = func.coalesce(t.c.product_name, '')
+    total_liters = func.sum(t.c.liters)
+    daily = select(
+        FuelStation.id,
+        t.c.fuel_date,
+        product_name,
+        func.count(),
+        total_liters,
+        func.sum(t.c.amount),
+        func.min(t.c.unit_price),
+        func.max(t.c.unit_price),
+        func.round(func.sum(t.c.unit_price * t.c.liters) / func.nullif(total_liters, 0), 2),
+        func.now(),
+    ).select_from(
+        t.join(FuelStation, and_(
+            FuelStation.source == t.c.source,
+            FuelStation.station_code == t.c.station_code
+        ))
+    ).where(t.c.unit_price > 0)\
+     .group_by(FuelStation.id, t.c.fuel_date, product_name)
+
+    result = db.session.execute(
+        pg_insert(FuelStationDailyPrice.__table__).from_select(
+            ['station_id', 'price_date', 'product_name', 'fill_count', 'total_liters', 'total_amount',
+             'min_unit_price', 'max_unit_price', 'avg_unit_price', 'updated_at'],
+            daily
+        )
+    )
+    db.session.commit()
+    return max(result.rowcount or 0, 0)
+
+
+def refresh_station_prices_for_keys(source, imported_keys):
+    """取り込んだデータ（日付, 車番, ...）の日付範囲の日次単価を更新"""
+    dates = [key[0] for key in imported_keys if key and isinstance(key[0], date)]
+    if not dates:
+        return 0
+    return refresh_station_prices(source, min(dates), max(dates))
+
+
+def _upsert_stations(source, start_date, end_date):
+    """期間内の取引に現れた給油所を登録（SSコードごとに最新の名称を採用）"""
+    t = fuel_transactions(start_date, end_date, sources=[source])
+    latest = select(
+        t.c.source,
+        t.c.station_code,
+        func.coalesce(t.c.station_name, t.c.station_code).label('station_name'),
+        literal(SOURCE_COMPANY_NAMES.get(source, source)).label('company_name'),
+        literal(True).label('is_active'),
+        func.now().label('created_at'),
+        func.now().label('updated_at'),
+    ).where(
+        t.c.station_code.isnot(None),
+        t.c.station_code != ''
+    ).distinct(t.c.station_code)\
+     .order_by(t.c.station_code, t.c.fuel_date.desc())
+
+    stmt = pg_insert(FuelStation.__table__).from_select(
+        ['source', 'station_code', 'station_name', 'company_name', 'is_active', 'created_at', 'updated_at'],
+        latest
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint='uq_fuel_stations_source_code',
+        set_={'station_name': stmt.excluded.station_name, 'updated_at': stmt.excluded.updated_at}
+    )
+    db.session.execute(stmt)
+
+
+def cheapest_stations(start_date, end_date, product=None, prefecture=None, city=None,
+                      station_ids=None, limit=10):
+    """期間内の平均単価が安い給油所を日次単価から求める
+
+    product: 商品名の部分一致（例: '軽油'）
+    station_ids: ルート上の給油所IDなど、対象を限定する場合に指定
+    """
+    total_liters = func.sum(FuelStationDailyPrice.total_liters)
+    avg_price = func.round(
+        func.sum(FuelStationDailyPrice.avg_unit_price * FuelStationDailyPrice.total_liters)
+        / func.nullif(total_liters, 0), 2
+    )
+
+    query = db.session.query(
+        FuelStation,
+        avg_price.label('avg_unit_price'),
+        func.min(FuelStationDailyPrice.min_unit_price).label('min_unit_price'),
+        func.max(FuelStationDailyPrice.max_unit_price).label('max_unit_price'),
+        func.sum(FuelStationDailyPrice.fill_count).label('fill_count'),
+        total_liters.label('total_liters'),
+        func.count(func.distinct(FuelStationDailyPrice.price_date)).label('price_days'),
+        func.max(FuelStationDailyPrice.price_date).label('last_price_date'),
+    ).join(FuelStationDailyPrice, FuelStationDailyPrice.station_id == FuelStation.id)\
+     .filter(
+        FuelStationDailyPrice.price_date >= start_date,
+        FuelStationDailyPrice.price_date <= end_date,
+        FuelStation.is_active.isnot(False)
+    )
+
+    if product:
+        query = query.filter(FuelStationDailyPrice.product_name.like(f'%{product}%'))
+    if prefecture:
+        query = query.filter(FuelStation.prefecture == prefecture)
+    if city:
+        query = query.filter(FuelStation.city == city)
+    if station_ids:
+        query = query.filter(FuelStation.id.in_(station_ids))
+
+    rows = query.group_by(FuelStation.id)\
+        .having(avg_price.isnot(None))\
+        .order_by(avg_price.asc(), FuelStation.id)\
+        .limit(limit).all()
+
+    stations = []
+    for row in rows:
+        station = row[0].to_dict()
+        station.update({
+            'avg_unit_price': float(row.avg_unit_price),
+            'min_unit_price': float(row.min_unit_price) if row.min_unit_price is not None else None,
+            'max_unit_price': float(row.max_unit_price) if row.max_unit_price is not None else None,
+            'fill_count': int(row.fill_count or 0),
+            'total_liters': float(row.total_liters or 0),
+            'price_days': row.price_days,
+            'last_price_date': row.last_price_date.isoformat() if row.last_price_date else None,
+        })
+        stations.append(station)
+
+    return stations
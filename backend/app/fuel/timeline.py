@@ -0,0 +1,94 @@
+# backend/app/fuel/timeline.py
+
+import heapq
+from datetime import date, time
+from sqlalchemy import func, literal, tuple_, Time
+
+from app.extensions import db
+from .sources import FUEL_SOURCES
+
+# 同じ日時の給油を並べるときの提供元の順序
+SOURCE_ORDER = ['enefle', 'eneos_wing', 'kitaseki']
+
+# カーソルの型（給油日, 給油時刻, 提供元の順序, レコードID）
+CURSOR_TYPES = [date, time, int, int]
+
+
+def vehicle_number_variants(number):
+    """提供元ごとに表記の異なる車番（'877' / '0877' など）の候補を返す"""
+    number = (number or '').strip()
+    stripped = number.lstrip('0') or number
+    variants = {number, stripped}
+    if stripped.isdigit():
+        variants.add(stripped.zfill(4))
+    return sorted(v for v in variants if v)
+
+
+def iter_vehicle_timeline(vehicle_number, cursor=None, descending=True, batch_size=100, sources=None):
+    """車両の給油履歴を3社分、給油日時順にマージして1件ずつ返す
+
+    提供元ごとに (日付, 車番) インデックスを使うキーセットページングで batch_size 件ずつ読み、
+    heapq.merge で k-way マージする。どの提供元も全履歴を一度に読み込むことはない。
+    cursor: 前ページ最後の行のキー（給油日, 給油時刻, 提供元の順序, レコードID）
+    """
+    variants = vehicle_number_variants(vehicle_number)
+    names = [name for name in SOURCE_ORDER if not sources or name in sources]
+
+    streams = [
+        _iter_source(FUEL_SOURCES[name], SOURCE_ORDER.index(name), variants, cursor, descending, batch_size)
+        for name in names
+    ]
+    return heapq.merge(*streams, key=timeline_key, reverse=descending)
+
+
+def timeline_key(row):
+    """マージ・カーソル用の並び順キー"""
+    return (row['fuel_date'], row['fuel_time'] or time(0, 0), row['source_rank'], row['record_id'])
+
+
+def _iter_source(source, source_rank, variants, cursor, descending, batch_size):
+    """1提供元分の給油データをキーセットページングで順に返す"""
+    fuel_time = func.coalesce(source.time_column, literal(time(0, 0), Time)) \
+        if source.time_column is not None else literal(time(0, 0), Time)
+    order_columns = [source.date_column, fuel_time, source.model.id]
+
+    position = cursor
+    while True:
+        stmt = source.select(vehicle_numbers=variants)
+        if position is not None:
+            stmt = stmt.where(_after(order_columns, position, source_rank, descending))
+        stmt = stmt.order_by(*[column.desc() if descending else column.asc() for column in order_columns])\
+            .limit(batch_size)
+
+        rows = db.session.execute(stmt).mappings().all()
+        for row in rows:
+            item = dict(row)
+            item['source_rank'] = source_rank
+            yield item
+
+        if len(rows) < batch_size:
+            return
+        position = list(timeline_key(item))
+
+
+def _after(order_columns, cursor, source_rank, descending):
+    """カーソルより後（降順なら前）の行を表す条件
+
+    提供元の順序はクエリ内で一定のため、カーソルと同じ日時の行を含めるかどうかだけが
+    提供元によって変わる。
+    """
+    date_column, time_column, id_column = order_columns
+    cursor_date, cursor_time, cursor_rank, cursor_id = cursor
+    date_time = tuple_(date_column, time_column)
+    cursor_date_time = tuple_(literal(cursor_date), literal(cursor_time, Time))
+
+    if source_rank == cursor_rank:
+        full = tuple_(date_column, time_column, id_column)
+        cursor_full = tuple_(literal(cursor_date), literal(cursor_time, Time), literal(cursor_id))
+        return full < cursor_full if descending else full > cursor_full
+
+    # 同じ日時の場合、降順では順序が小さい提供元、昇順では大きい提供元の行が後に来る
+    includes_same_time = (source_rank < cursor_rank) if descending else (source_rank > cursor_rank)
+    if descending:
+        return date_time <= cursor_date_time if includes_same_time else date_time < cursor_date_time
+    return date_time >= cursor_date_time if includes_same_time else date_time > cursor_date_time
@@ -0,0 +1,52 @@
+# backend/app/jobs.py
+
+from datetime import datetime, time, timedelta
+
+from flask import current_app
+
+from app.utils.scheduler import JobScheduler
+from app.maintenance.tasks import sweep_overdue_schedules, regenerate_tentative_schedules
+from app.fuel.sources import FUEL_SOURCES
+from app.fuel.stations import refresh_station_prices
+from app.maintenance.costs import refresh_fuel_costs, refresh_etc_costs
+from app.maintenance.previews import generate_file_derivatives
+
+
+def refresh_rollups():
+    """直近の給油所日次単価と車両別の燃料費・高速料金を集計し直す（取り込み時の更新漏れの補正）"""
+    today = datetime.now().date()
+    start_date = today - timedelta(days=current_app.config.get('SCHEDULER_ROLLUP_DAYS', 7))
+    result = {
+        source: refresh_station_prices(source, start_date, today)
+        for source in FUEL_SOURCES
+    }
+    result['fuel_costs'] = refresh_fuel_costs(start_date, today)
+    result['etc_costs'] = refresh_etc_costs(start_date, today)
+    return result
+
+
+def create_scheduler(app):
+    """定期ジョブを登録したスケジューラを作成
+
+    - overdue_sweep: 期限切れの予定を未実施に更新（SCHEDULER_OVERDUE_SWEEP_MINUTES ごと）
+    - refresh_rollups: 給油所日次単価・車両別燃料費・高速料金の再集計（毎日 SCHEDULER_NIGHTLY_TIME）
+    - regenerate_tentative: 車検・3ヶ月点検の仮予定生成（毎日 SCHEDULER_NIGHTLY_TIME）
+    - file_derivatives: サムネイル・プレビュー未作成の整備ファイルの処理（SCHEDULER_DERIVATIVE_MINUTES ごと）
+    """
+    config = app.config
+    nightly = time.fromisoformat(config.get('SCHEDULER_NIGHTLY_TIME', '02:00'))
+
+    scheduler = JobScheduler(app)
+    scheduler.every(
+        'overdue_sweep',
+        timedelta(minutes=config.get('SCHEDULER_OVERDUE_SWEEP_MINUTES', 60)),
+        sweep_overdue_schedules
+    )
+    scheduler.daily('refresh_rollups', nightly, refresh_rollups)
+    scheduler.daily('regenerate_tentative', nightly, regenerate_tentative_schedules)
+    scheduler.every(
+        'file_derivatives',
+        timedelta(minutes=config.get('SCHEDULER_DERIVATIVE_MINUTES', 10)),
+        generate_file_derivatives
+    )
+    return scheduler
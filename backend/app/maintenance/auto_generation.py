@@ -3,163 +3,112 @@
 from datetime import datetime, timedelta
 from app.extensions import db
 from app.vehicle.models import Vehicles
-from app.maintenance.models import MaintenanceType, MaintenanceStatus, MaintenanceSchedule
+from app.maintenance.models import MaintenanceType, MaintenanceStatus
+from app.maintenance.recurrence import expand_cycle_dates
+from app.maintenance.masters import get_maintenance_type, get_maintenance_status
+from app.maintenance.schedule_generator import load_vehicle_expiry_dates, insert_missing_schedules
 
 def generate_maintenance_schedules_for_all_vehicles():
-    """全車両の点検予定を自動生成"""
+    """全車両の点検予定を自動生成
+
+    全車両の候補日をメモリ上で算出し、既存予定の取得・一括登録をそれぞれ1回ずつ行う。
+    """
     
     # 点検種類の取得
-    inspection_3month = MaintenanceType.query.filter_by(name='3ヶ月点検').first()
-    inspection_12month = MaintenanceType.query.filter_by(name='車検').first()
+    inspection_3month = get_maintenance_type('3ヶ月点検')
+    inspection_12month = get_maintenance_type('車検')
     
     # 状態の取得
-    scheduled_status = MaintenanceStatus.query.filter_by(name='予定').first()
+    scheduled_status = get_maintenance_status('予定')
+    completed_status = get_maintenance_status('完了')
     
     if not inspection_3month or not inspection_12month or not scheduled_status:
         print("必要なマスタデータが不足しています")
         return
     
-    vehicles = Vehicles.query.filter_by(ステータス='運行中').all()
-    generated_count = 0
+    today = datetime.now().date()
+    candidates = []
+    
+    for vehicle_id, expiry_date in load_vehicle_expiry_dates(Vehicles.ステータス == '運行中'):
+        candidates.extend(generate_vehicle_maintenance_schedule(
+            vehicle_id, expiry_date, inspection_3month, inspection_12month,
+            scheduled_status, completed_status, today
+        ))
     
-    for vehicle in vehicles:
-        generated_count += generate_vehicle_maintenance_schedule(
-            vehicle, inspection_3month, inspection_12month, scheduled_status
-        )
+    generated_count = insert_missing_schedules(candidates)
     
     db.session.commit()
     print(f"合計 {generated_count} 件の点検予定を生成しました")
     return generated_count
 
-def generate_vehicle_maintenance_schedule(vehicle, inspection_3month, inspection_12month, scheduled_status):
-    """単一車両の点検予定を生成"""
-    generated_count = 0
-    
-    # 車検有効期限から点検予定を算出
-    if vehicle.有効期間の満了する日:
-        expiry_date = parse_expiry_date(vehicle.有効期間の満了する日)
-        if expiry_date:
-            # 12ヶ月点検（車検）の予定を生成
-            generated_count += generate_12month_inspection_schedule(
-                vehicle, inspection_12month, scheduled_status, expiry_date
-            )
-            
-            # 3ヶ月点検の予定を生成
-            generated_count += generate_3month_inspection_schedule(
-                vehicle, inspection_3month, scheduled_status, expiry_date
-            )
-    
-    return generated_count
-
-def parse_expiry_date(expiry_date_value):
-    """有効期限の数値を日付に変換"""
-    try:
-        if isinstance(expiry_date_value, int):
-            date_str = str(expiry_date_value)
-        else:
-            date_str = str(int(expiry_date_value))
-        
-        if len(date_str) == 8:
-            year = int(date_str[:4])
-            month = int(date_str[4:6])
-            day = int(date_str[6:8])
-            return datetime(year, month, day).date()
-    except (ValueError, TypeError):
-        pass
-    
-    return None
+def generate_vehicle_maintenance_schedule(vehicle_id, expiry_date, inspection_3month, inspection_12month,
+                                          scheduled_status, completed_status, today):
+    """単一車両の点検予定の候補を作成"""
+    # 12ヶ月点検（車検）の予定
+    candidates = generate_12month_inspection_schedule(
+        vehicle_id, inspection_12month, scheduled_status, expiry_date, today
+    )
+    
+    # 3ヶ月点検の予定
+    candidates += generate_3month_inspection_schedule(
+        vehicle_id, inspection_3month, scheduled_status, completed_status, expiry_date, today
+    )
+    
+    return candidates
 
-def generate_12month_inspection_schedule(vehicle, inspection_type, status, base_expiry_date):
-    """12ヶ月点検（車検）の予定を生成"""
-    generated_count = 0
+def generate_12month_inspection_schedule(vehicle_id, inspection_type, status, base_expiry_date, today):
+    """12ヶ月点検（車検）の予定の候補を作成"""
+    candidates = []
     
     # 今日から2年先までの車検予定を生成
     current_expiry = base_expiry_date
-    today = datetime.now().date()
     end_date = today + timedelta(days=730)  # 2年先まで
     
     while current_expiry <= end_date:
-        # 既に同じ日付の予定があるかチェック
-        existing = MaintenanceSchedule.query.filter_by(
-            vehicle_id=vehicle.id,
-            maintenance_type_id=inspection_type.id,
-            scheduled_date=current_expiry
-        ).first()
-        
-        if not existing:
-            # 新しい点検予定を作成
-            new_schedule = MaintenanceSchedule(
-                vehicle_id=vehicle.id,
-                maintenance_type_id=inspection_type.id,
-                scheduled_date=current_expiry,
-                status_id=status.id,
-                notes=f'車検有効期限({current_expiry.strftime("%Y年%m月%d日")})から自動生成'
-            )
-            db.session.add(new_schedule)
-            generated_count += 1
-            print(f"車検予定生成: {vehicle.自動車登録番号および車両番号} - {current_expiry}")
+        candidates.append({
+            'vehicle_id': vehicle_id,
+            'maintenance_type_id': inspection_type.id,
+            'scheduled_date': current_expiry,
+            'status_id': status.id,
+            'notes': f'車検有効期限({current_expiry.strftime("%Y年%m月%d日")})から自動生成'
+        })
         
-        # 次の車検は2年後
-        current_expiry = datetime(current_expiry.year + 2, current_expiry.month, current_expiry.day).date()
+        # 次の車検は2年後（2月29日は2月28日に読み替え）
+        try:
+            current_expiry = current_expiry.replace(year=current_expiry.year + 2)
+        except ValueError:
+            current_expiry = current_expiry.replace(year=current_expiry.year + 2, day=28)
     
-    return generated_count
+    return candidates
 
-def generate_3month_inspection_schedule(vehicle, inspection_type, status, base_expiry_date):
-    """3ヶ月点検の予定を生成"""
-    generated_count = 0
+def generate_3month_inspection_schedule(vehicle_id, inspection_type, status, completed_status, base_expiry_date, today):
+    """3ヶ月点検の予定の候補を作成"""
+    candidates = []
     
-    # 車検有効期限から逆算して3ヶ月ごとの点検日を計算
-    today = datetime.now().date()
+    # 車検有効期限を基準に、暦月で3ヶ月ごとの点検日を前後1年分算出
     start_date = today - timedelta(days=365)  # 1年前から
     end_date = today + timedelta(days=365)    # 1年後まで
+    _, dates = expand_cycle_dates([base_expiry_date], 3, start_date, end_date)
     
-    # 車検有効期限を基準に3ヶ月前の日付を算出
-    base_3month_date = base_expiry_date - timedelta(days=90)  # 約3ヶ月前
-    
-    # 3ヶ月間隔で点検日を生成
-    current_date = base_3month_date
-    
-    # 過去分も含めて生成（開始日まで遡る）
-    while current_date > start_date:
-        current_date = current_date - timedelta(days=90)
-    
-    # 指定期間内の3ヶ月点検を生成
-    while current_date <= end_date:
-        if start_date <= current_date <= end_date:
-            # 既に同じ日付の予定があるかチェック
-            existing = MaintenanceSchedule.query.filter_by(
-                vehicle_id=vehicle.id,
-                maintenance_type_id=inspection_type.id,
-                scheduled_date=current_date
-            ).first()
-            
-            if not existing:
-                # 過去の日付は完了扱い、未来の日付は予定扱い
-                if current_date < today:
-                    # 完了状態を取得
-                    completed_status = MaintenanceStatus.query.filter_by(name='完了').first()
-                    schedule_status = completed_status if completed_status else status
-                    completion_date = current_date
-                else:
-                    schedule_status = status
-                    completion_date = None
-                
-                new_schedule = MaintenanceSchedule(
-                    vehicle_id=vehicle.id,
-                    maintenance_type_id=inspection_type.id,
-                    scheduled_date=current_date,
-                    completion_date=completion_date,
-                    status_id=schedule_status.id,
-                    notes=f'車検有効期限から3ヶ月間隔で自動生成'
-                )
-                db.session.add(new_schedule)
-                generated_count += 1
-                print(f"3ヶ月点検予定生成: {vehicle.自動車登録番号および車両番号} - {current_date}")
+    for current_date in dates.tolist():
+        # 過去の日付は完了扱い、未来の日付は予定扱い
+        if current_date < today:
+            schedule_status = completed_status if completed_status else status
+            completion_date = current_date
+        else:
+            schedule_status = status
+            completion_date = None
         
-        # 次の3ヶ月後
-        current_date = current_date + timedelta(days=90)
-    
-    return generated_count
+        candidates.append({
+            'vehicle_id': vehicle_id,
+            'maintenance_type_id': inspection_type.id,
+            'scheduled_date': current_date,
+            'completion_date': completion_date,
+            'status_id': schedule_status.id,
+            'notes': '車検有効期限から3ヶ月間隔で自動生成'
+        })
+    
+    return candidates
 
 def initialize_maintenance_master_data():
     """整備マスタデータの初期化"""
@@ -168,8 +117,8 @@ def initialize_maintenance_master_data():
     maintenance_types = [
         {'name': '車検', 'description': '法定12ヶ月点検（車検）', 'cycle_months': 12},
         {'name': '3ヶ月点検', 'description': '定期3ヶ月点検', 'cycle_months': 3},
-        {'name': 'オイル交換', 'description': 'エンジンオイル交換', 'cycle_months': 3},
-        {'name': 'タイヤ交換', 'description': 'タイヤ交換または位置交換', 'cycle_months': 6},
+        {'name': 'オイル交換', 'description': 'エンジンオイル交換', 'cycle_months': 3, 'distance_interval_km': 10000},
+        {'name': 'タイヤ交換', 'description': 'タイヤ交換または位置交換', 'cycle_months': 6, 'distance_interval_km': 30000},
         {'name': 'ブレーキパッド交換', 'description': 'ブレーキパッドの点検と交換', 'cycle_months': 12},
     ]
 
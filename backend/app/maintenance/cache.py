@@ -0,0 +1,100 @@
+# backend/app/maintenance/cache.py
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+_caches = []
+
+
+class TableCache:
+    """依存テーブルが変更されたら破棄する、TTL付きのプロセス内キャッシュ
+
+    同じプロセス内のセッションで依存テーブルへの変更がコミットされると全件破棄する。
+    別プロセス（CLIや他のワーカー）からの変更はTTLが過ぎるまで反映されない。
+    """
+
+    def __init__(self, name, tables, ttl_seconds=60):
+        self.name = name
+        self.tables = frozenset(tables)
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._generation = 0  # invalidate のたびに増やし、読み込み中に破棄されたかを判定する
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def get_or_load(self, key, loader, ttl_seconds=None):
+        """キャッシュがあれば返し、なければ loader() の結果を保存して返す
+
+        読み込み中に invalidate された場合、結果は変更前の内容の可能性があるため保存しない。
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        value = loader()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl > 0:
+            with self._lock:
+                if self._generation == generation:
+                    self._entries[key] = (now + ttl, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+def invalidate_tables(tables):
+    """指定したテーブルに依存するキャッシュを破棄"""
+    tables = set(tables)
+    for cache in _caches:
+        if cache.tables & tables:
+            cache.invalidate()
+
+
+def _mark_changed(session, tables):
+    session.info.setdefault('changed_cache_tables', set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    tables = set()
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(instance, '__tablename__', None)
+        if table:
+            tables.add(table)
+    if tables:
+        _mark_changed(session, tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_executed_tables(orm_execute_state):
+    """一括UPDATE/DELETE/INSERT や text() によるSQLの実行を記録"""
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(statement, 'table', None)
+        if table is not None and getattr(table, 'name', None):
+            _mark_changed(orm_execute_state.session, {table.name})
+    elif isinstance(statement, TextClause):
+        # SQL関数（generate_maintenance_schedules など）は変更先を判別できないため全キャッシュを対象にする
+        _mark_changed(orm_execute_state.session, {table for cache in _caches for table in cache.tables})
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_tables(session):
+    tables = session.info.pop('changed_cache_tables', None)
+    if tables:
+        invalidate_tables(tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_tables(session):
+    session.info.pop('changed_cache_tables', None)
@@ -0,0 +1,210 @@
+# backend/app/maintenance/checklist.py
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.extensions import db
+from app.maintenance.models import MaintenanceSchedule, MaintenanceDetail, MaintenanceChecklistItem
+
+DETAIL_FIELDS = ['result', 'is_ok', 'action_taken', 'parts_used', 'parts_cost', 'notes']
+
+
+def _item_name(item):
+    name = (item.get('item_name') or '').strip() if isinstance(item, dict) else ''
+    if not name:
+        raise ValueError('item_name は必須です')
+    if len(name) > 100:
+        raise ValueError(f'item_name は100文字以内で指定してください: {name[:20]}...')
+    return name
+
+
+def _parts_cost(value):
+    if value in (None, ''):
+        return None
+    try:
+        cost = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f'parts_cost が数値ではありません: {value}')
+    if cost < 0:
+        raise ValueError('parts_cost は0以上を指定してください')
+    return cost
+
+
+def _dedupe(rows):
+    """同じ項目名が複数ある場合は後のものを採用（ON CONFLICT は1文中の重複キーを扱えないため）"""
+    return list({row['item_name']: row for row in rows}.values())
+
+
+def replace_checklist_template(maintenance_type_id, items):
+    """点検種類のチェックリスト項目を items の内容に置き換える（コミットは呼び出し側で行う）
+
+    送られた順を表示順とし、既存の項目は1文で上書き、送られなかった項目は削除する。
+    """
+    now = datetime.now()
+    rows = _dedupe([{
+        'maintenance_type_id': maintenance_type_id,
+        'item_name': _item_name(item),
+        'category': item.get('category'),
+        'sort_order': int(item.get('sort_order', index)),
+        'is_required': bool(item.get('is_required', True)),
+        'created_at': now,
+        'updated_at': now,
+    } for index, item in enumerate(items)])
+
+    table = MaintenanceChecklistItem.__table__
+    db.session.execute(
+        delete(MaintenanceChecklistItem).where(
+            MaintenanceChecklistItem.maintenance_type_id == maintenance_type_id,
+            MaintenanceChecklistItem.item_name.notin_([row['item_name'] for row in rows])
+        ).execution_options(synchronize_session=False)
+    )
+    if rows:
+        stmt = pg_insert(table).values(rows)
+        db.session.execute(stmt.on_conflict_do_update(
+            constraint='uq_checklist_item_type_name',
+            set_={
+                'category': stmt.excluded.category,
+                'sort_order': stmt.excluded.sort_order,
+                'is_required': stmt.excluded.is_required,
+                'updated_at': stmt.excluded.updated_at,
+            }
+        ))
+    return list_checklist_template(maintenance_type_id)
+
+
+def list_checklist_template(maintenance_type_id):
+    items = MaintenanceChecklistItem.query.filter_by(maintenance_type_id=maintenance_type_id)\
+        .order_by(MaintenanceChecklistItem.sort_order, MaintenanceChecklistItem.id).all()
+    return [serialize_checklist_item(item) for item in items]
+
+
+def serialize_checklist_item(item):
+    return {
+        'id': item.id,
+        'item_name': item.item_name,
+        'category': item.category,
+        'sort_order': item.sort_order,
+        'is_required': item.is_required,
+    }
+
+
+def serialize_detail(detail):
+    return {
+        'id': detail.id,
+        'item_name': detail.item_name,
+        'result': detail.result,
+        'is_ok': detail.is_ok,
+        'action_taken': detail.action_taken,
+        'parts_used': detail.parts_used,
+        'parts_cost': float(detail.parts_cost) if detail.parts_cost is not None else None,
+        'notes': detail.notes,
+    }
+
+
+def upsert_schedule_details(schedule_id, items):
+    """予定の点検結果を (予定, 項目名) 単位で一括登録・更新する（INSERT ... ON CONFLICT 1文）
+
+    送られた項目は DETAIL_FIELDS の内容で置き換え、送られなかった項目はそのまま残す。
+    コミットは呼び出し側で行う。戻り値は登録・更新した明細。
+    """
+    now = datetime.now()
+    rows = []
+    for item in items:
+        name = _item_name(item)
+        is_ok = item.get('is_ok')
+        if is_ok is not None and not isinstance(is_ok, bool):
+            raise ValueError(f'is_ok は true / false / null で指定してください: {name}')
+        rows.append({
+            'maintenance_schedule_id': schedule_id,
+            'item_name': name,
+            'result': item.get('result'),
+            'is_ok': is_ok,
+            'action_taken': item.get('action_taken'),
+            'parts_used': item.get('parts_used'),
+            'parts_cost': _parts_cost(item.get('parts_cost')),
+            'notes': item.get('notes'),
+            'created_at': now,
+            'updated_at': now,
+        })
+    rows = _dedupe(rows)
+    if not rows:
+        return []
+
+    stmt = pg_insert(MaintenanceDetail.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint='uq_maintenance_details_schedule_item',
+        set_={field: stmt.excluded[field] for field in DETAIL_FIELDS + ['updated_at']}
+    ).returning(MaintenanceDetail.__table__.c.id)
+    detail_ids = db.session.execute(stmt).scalars().all()
+
+    details = MaintenanceDetail.query.filter(MaintenanceDetail.id.in_(detail_ids))\
+        .order_by(MaintenanceDetail.id)\
+        .populate_existing().all()
+    return [serialize_detail(detail) for detail in details]
+
+
+def checklist_summary(schedule_id):
+    """予定の点検結果の集計（項目数・合否・部品費用・未記録の必須項目数）を1クエリで求める"""
+    d = MaintenanceDetail
+    recorded = select(
+        func.count(d.id).label('item_count'),
+        func.count(d.id).filter(d.is_ok.is_(True)).label('ok_count'),
+        func.count(d.id).filter(d.is_ok.is_(False)).label('ng_count'),
+        func.count(d.id).filter(d.is_ok.is_(None)).label('pending_count'),
+        func.coalesce(func.sum(d.parts_cost), 0).label('parts_cost'),
+    ).where(d.maintenance_schedule_id == schedule_id).subquery('recorded')
+
+    missing_required = select(func.count(MaintenanceChecklistItem.id))\
+        .select_from(MaintenanceSchedule)\
+        .join(MaintenanceChecklistItem,
+              MaintenanceChecklistItem.maintenance_type_id == MaintenanceSchedule.maintenance_type_id)\
+        .where(
+            MaintenanceSchedule.id == schedule_id,
+            MaintenanceChecklistItem.is_required.is_(True),
+            ~select(d.id).where(
+                d.maintenance_schedule_id == schedule_id,
+                d.item_name == MaintenanceChecklistItem.item_name
+            ).exists()
+        ).scalar_subquery()
+
+    row = db.session.execute(select(recorded, missing_required.label('missing_required_count'))).one()
+    return {
+        'item_count': row.item_count,
+        'ok_count': row.ok_count,
+        'ng_count': row.ng_count,
+        'pending_count': row.pending_count,
+        'parts_cost': float(row.parts_cost),
+        'missing_required_count': row.missing_required_count,
+        'is_complete': row.missing_required_count == 0 and row.pending_count == 0,
+    }
+
+
+def build_schedule_checklist(schedule):
+    """点検種類のテンプレートに記録済みの結果を重ねたチェックリスト（テンプレート外の記録は末尾）"""
+    template = MaintenanceChecklistItem.query.filter_by(maintenance_type_id=schedule.maintenance_type_id)\
+        .order_by(MaintenanceChecklistItem.sort_order, MaintenanceChecklistItem.id).all()
+    details = {
+        detail.item_name: detail
+        for detail in MaintenanceDetail.query.filter_by(maintenance_schedule_id=schedule.id)
+            .order_by(MaintenanceDetail.id).all()
+    }
+
+    items = []
+    for item in template:
+        detail = details.pop(item.item_name, None)
+        items.append({
+            **serialize_checklist_item(item),
+            'detail': serialize_detail(detail) if detail else None,
+        })
+    for detail in details.values():
+        items.append({
+            'id': None,
+            'item_name': detail.item_name,
+            'category': None,
+            'sort_order': None,
+            'is_required': False,
+            'detail': serialize_detail(detail),
+        })
+    return items
@@ -0,0 +1,219 @@
+# backend/app/maintenance/costs.py
+
+from datetime import date, timedelta
+from sqlalchemy import select, delete, func, literal, cast, tuple_, Date, Numeric
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.extensions import db
+from app.vehicle.models import Vehicles
+from app.etc.models import ETCUsage
+from app.fuel.sources import fuel_transactions, vehicle_key_expression
+from app.maintenance.models import MaintenanceType, VehicleMonthlyCost
+
+COST_COLUMNS = ['vehicle_id', 'month', 'category', 'maintenance_type_id',
+                'amount', 'parts_amount', 'quantity', 'record_count', 'updated_at']
+
+
+def month_range(start_date, end_date):
+    """期間を含む月初〜月末に広げる（集計は月単位で入れ替えるため）"""
+    start_month = start_date.replace(day=1)
+    next_month = (end_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return start_month, next_month - timedelta(days=1)
+
+
+def _vehicle_keys():
+    """車番の照合キー → 車両ID（キーが重複する車両は除外。build_vehicle_key_map と同じ規則）"""
+    plate_key = vehicle_key_expression(Vehicles.自動車登録番号および車両番号)
+    return select(
+        plate_key.label('vehicle_key'),
+        func.min(Vehicles.id).label('vehicle_id')
+    ).where(plate_key.isnot(None))\
+     .group_by(plate_key)\
+     .having(func.count(func.distinct(Vehicles.id)) == 1)\
+     .subquery('vehicle_keys')
+
+
+def _replace_months(category, start_month, end_month, rollup):
+    """rollup（COST_COLUMNS 順のSELECT）で期間内の区分の集計行を上書きし、集計されなくなった行を削除する
+
+    同じ期間を同時に集計し直しても一意制約違反にならないよう、DELETE してから INSERT せず
+    主キーで上書き登録する。戻り値は登録・更新した行数。
+    """
+    table = VehicleMonthlyCost.__table__
+    stmt = pg_insert(table).from_select(COST_COLUMNS, rollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['vehicle_id', 'month', 'category', 'maintenance_type_id'],
+        set_={column: stmt.excluded[column]
+              for column in ['amount', 'parts_amount', 'quantity', 'record_count', 'updated_at']}
+    ).returning(table.c.vehicle_id, table.c.month)
+    produced = db.session.execute(stmt).all()
+
+    stale = delete(VehicleMonthlyCost).where(
+        VehicleMonthlyCost.category == category,
+        VehicleMonthlyCost.month >= start_month,
+        VehicleMonthlyCost.month <= end_month
+    )
+    if produced:
+        stale = stale.where(
+            tuple_(VehicleMonthlyCost.vehicle_id, VehicleMonthlyCost.month).notin_(
+                [tuple(row) for row in produced])
+        )
+    db.session.execute(stale.execution_options(synchronize_session=False))
+    return len(produced)
+
+
+def refresh_fuel_costs(start_date, end_date):
+    """3社の給油データから車両・月ごとの燃料費を集計し直す（INSERT ... SELECT 1文）"""
+    start_month, end_month = month_range(start_date, end_date)
+    t = fuel_transactions(start_month, end_month)
+    keys = _vehicle_keys()
+    month = cast(func.date_trunc('month', t.c.fuel_date), Date)
+
+    rollup = select(
+        keys.c.vehicle_id,
+        month,
+        literal('fuel'),
+        literal(0),
+        func.coalesce(func.sum(func.coalesce(t.c.amount, t.c.liters * t.c.unit_price)), 0),
+        literal(0),
+        func.sum(t.c.liters),
+        func.count(),
+        func.now(),
+    ).select_from(
+        t.join(keys, keys.c.vehicle_key == vehicle_key_expression(t.c.vehicle_number))
+    ).group_by(keys.c.vehicle_id, month)
+
+    count = _replace_months('fuel', start_month, end_month, rollup)
+    db.session.commit()
+    return count
+
+
+def refresh_etc_costs(start_date, end_date):
+    """ETC利用明細から車両・月ごとの高速料金を集計し直す（INSERT ... SELECT 1文）"""
+    start_month, end_month = month_range(start_date, end_date)
+    keys = _vehicle_keys()
+    month = cast(func.date_trunc('month', ETCUsage.start_date), Date)
+
+    rollup = select(
+        keys.c.vehicle_id,
+        month,
+        literal('etc'),
+        literal(0),
+        func.coalesce(func.sum(ETCUsage.final_fee), 0),
+        literal(0),
+        literal(None, Numeric),
+        func.count(),
+        func.now(),
+    ).select_from(ETCUsage)\
+     .join(keys, keys.c.vehicle_key == vehicle_key_expression(ETCUsage.vehicle_number))\
+     .where(ETCUsage.start_date >= start_month, ETCUsage.start_date <= end_month)\
+     .group_by(keys.c.vehicle_id, month)
+
+    count = _replace_months('etc', start_month, end_month, rollup)
+    db.session.commit()
+    return count
+
+
+def refresh_fuel_costs_for_keys(imported_keys):
+    """取り込んだ給油データ（日付, 車番, ...）の日付範囲の燃料費を更新"""
+    dates = [key[0] for key in imported_keys if key and isinstance(key[0], date)]
+    if not dates:
+        return 0
+    return refresh_fuel_costs(min(dates), max(dates))
+
+
+def monthly_costs(start_date, end_date, vehicle_id=None, category=None):
+    """車両・月・区分・点検種類ごとの費用一覧"""
+    start_month, end_month = month_range(start_date, end_date)
+    query = db.session.query(
+        VehicleMonthlyCost,
+        MaintenanceType.name.label('maintenance_type_name')
+    ).outerjoin(MaintenanceType, MaintenanceType.id == VehicleMonthlyCost.maintenance_type_id)\
+     .filter(VehicleMonthlyCost.month >= start_month, VehicleMonthlyCost.month <= end_month)
+
+    if vehicle_id:
+        query = query.filter(VehicleMonthlyCost.vehicle_id == vehicle_id)
+    if category:
+        query = query.filter(VehicleMonthlyCost.category == category)
+
+    rows = query.order_by(
+        VehicleMonthlyCost.month,
+        VehicleMonthlyCost.vehicle_id,
+        VehicleMonthlyCost.category,
+        VehicleMonthlyCost.maintenance_type_id
+    ).all()
+
+    return [{
+        'vehicle_id': cost.vehicle_id,
+        'month': cost.month.strftime('%Y-%m'),
+        'category': cost.category,
+        'category_label': VehicleMonthlyCost.CATEGORY_LABELS.get(cost.category, cost.category),
+        'maintenance_type_id': cost.maintenance_type_id or None,
+        'maintenance_type': type_name,
+        'amount': float(cost.amount or 0),
+        'parts_amount': float(cost.parts_amount or 0),
+        'total': float((cost.amount or 0) + (cost.parts_amount or 0)),
+        'quantity': float(cost.quantity) if cost.quantity is not None else None,
+        'record_count': cost.record_count,
+    } for cost, type_name in rows]
+
+
+def tco_report(start_date, end_date, vehicle_id=None):
+    """車両ごとの総保有コスト（整備・部品・燃料・高速料金）と全車両の合計を集計から求める（1クエリ）"""
+    start_month, end_month = month_range(start_date, end_date)
+    c = VehicleMonthlyCost
+
+    def total(category, column=c.amount):
+        return func.coalesce(func.sum(column).filter(c.category == category), 0)
+
+    maintenance = total('maintenance')
+    parts = total('maintenance', c.parts_amount)
+    fuel = total('fuel')
+    etc = total('etc')
+
+    query = db.session.query(
+        c.vehicle_id,
+        Vehicles.自動車登録番号および車両番号.label('plate'),
+        Vehicles.車名.label('manufacturer'),
+        maintenance.label('maintenance'),
+        parts.label('parts'),
+        fuel.label('fuel'),
+        etc.label('etc'),
+        func.coalesce(func.sum(c.quantity).filter(c.category == 'fuel'), 0).label('fuel_liters'),
+        func.coalesce(func.sum(c.record_count).filter(c.category == 'maintenance'), 0).label('maintenance_count'),
+    ).join(Vehicles, Vehicles.id == c.vehicle_id)\
+     .filter(c.month >= start_month, c.month <= end_month)
+
+    if vehicle_id:
+        query = query.filter(c.vehicle_id == vehicle_id)
+
+    rows = query.group_by(c.vehicle_id, Vehicles.自動車登録番号および車両番号, Vehicles.車名)\
+        .order_by((maintenance + parts + fuel + etc).desc(), c.vehicle_id).all()
+
+    vehicles = []
+    totals = {'maintenance': 0.0, 'parts': 0.0, 'fuel': 0.0, 'etc': 0.0, 'total': 0.0}
+    for row in rows:
+        costs = {
+            'maintenance': float(row.maintenance),
+            'parts': float(row.parts),
+            'fuel': float(row.fuel),
+            'etc': float(row.etc),
+        }
+        costs['total'] = sum(costs.values())
+        for key, value in costs.items():
+            totals[key] += value
+        vehicles.append({
+            'vehicle_id': row.vehicle_id,
+            'plate': row.plate,
+            'manufacturer': row.manufacturer,
+            **costs,
+            'fuel_liters': float(row.fuel_liters),
+            'maintenance_count': int(row.maintenance_count),
+        })
+
+    return {
+        'period': {'start_month': start_month.strftime('%Y-%m'), 'end_month': end_month.strftime('%Y-%m')},
+        'vehicle_count': len(vehicles),
+        'totals': totals,
+        'vehicles': vehicles,
+    }
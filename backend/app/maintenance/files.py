@@ -0,0 +1,112 @@
+# backend/app/maintenance/files.py
+
+import os
+
+from flask import current_app
+
+from app.extensions import db
+from app.maintenance.models import MaintenanceFile
+from app.utils.storage import get_storage, spool_upload, content_path
+from app.maintenance.previews import derivative_path
+
+# 整備記録として受け付けるファイル（点検記録簿のPDF・現場写真）
+ALLOWED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png', '.webp', '.heic'}
+
+DERIVATIVE_COLUMNS = [
+    'thumbnail_path', 'thumbnail_width', 'thumbnail_height',
+    'preview_path', 'preview_width', 'preview_height',
+    'derivatives_generated_at',
+]
+
+
+def save_maintenance_file(schedule_id, upload, description=None, uploaded_by=None):
+    """アップロードされたファイルを保存し、整備ファイルを登録する（コミットは呼び出し側で行う）
+
+    内容のハッシュが同じファイルが既にあれば保存先を共有し、アップロードは行わない。
+    戻り値は (MaintenanceFile, 重複のためアップロードを省略したか)。
+    """
+    file_name = upload.filename or ''
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise ValueError(f'対応していないファイル形式です: {ext or file_name}')
+
+    max_bytes = current_app.config.get('MAINTENANCE_FILE_MAX_MB', 50) * 1024 * 1024
+    with spool_upload(upload.stream, max_bytes=max_bytes) as (tmp_path, content_hash, size):
+        existing = MaintenanceFile.query.filter_by(content_hash=content_hash)\
+            .order_by(MaintenanceFile.id).first()
+        if existing:
+            file_path = existing.file_path
+        else:
+            file_path = content_path(content_hash, ext)
+            get_storage().save(file_path, tmp_path, upload.mimetype)
+
+    maintenance_file = MaintenanceFile(
+        maintenance_schedule_id=schedule_id,
+        file_name=file_name,
+        file_path=file_path,
+        file_type=upload.mimetype,
+        file_size=size,
+        content_hash=content_hash,
+        description=description,
+        uploaded_by=uploaded_by
+    )
+    if existing:
+        # サムネイル・プレビューも同じものを使う
+        for column in DERIVATIVE_COLUMNS:
+            setattr(maintenance_file, column, getattr(existing, column))
+    db.session.add(maintenance_file)
+    db.session.flush()
+    return maintenance_file, existing is not None
+
+
+def delete_maintenance_file(maintenance_file):
+    """整備ファイルの登録を削除し、他から参照されなくなった保存先のパスを返す（コミットは呼び出し側で行う）
+
+    保存先のファイルはコミット後に remove_stored_file で削除する。
+    """
+    file_path = maintenance_file.file_path
+    db.session.delete(maintenance_file)
+    db.session.flush()
+
+    still_used = db.session.query(MaintenanceFile.id).filter_by(file_path=file_path).first()
+    return None if still_used else file_path
+
+
+def remove_stored_file(file_path):
+    """保存先からファイルとサムネイル・プレビューを削除（失敗しても登録の削除は取り消さない）"""
+    storage = get_storage()
+    for path in (file_path, derivative_path(file_path, 'thumbnail'), derivative_path(file_path, 'preview')):
+        try:
+            storage.delete(path)
+        except Exception as e:
+            current_app.logger.warning(f'整備ファイルの削除エラー（{path}）: {str(e)}')
+
+
+def _derivative(storage, maintenance_file, kind):
+    path = getattr(maintenance_file, f'{kind}_path')
+    if not path:
+        return None
+    return {
+        'url': storage.url(path),
+        'width': getattr(maintenance_file, f'{kind}_width'),
+        'height': getattr(maintenance_file, f'{kind}_height'),
+    }
+
+
+def serialize_file(maintenance_file):
+    """一覧表示用（サムネイル・プレビューのURLと大きさを含む。未作成の間は None）"""
+    storage = get_storage()
+    return {
+        'id': maintenance_file.id,
+        'file_name': maintenance_file.file_name,
+        'file_path': maintenance_file.file_path,
+        'url': storage.url(maintenance_file.file_path),
+        'thumbnail': _derivative(storage, maintenance_file, 'thumbnail'),
+        'preview': _derivative(storage, maintenance_file, 'preview'),
+        'file_type': maintenance_file.file_type,
+        'file_size': maintenance_file.file_size,
+        'content_hash': maintenance_file.content_hash,
+        'description': maintenance_file.description,
+        'uploaded_by': maintenance_file.uploaded_by,
+        'created_at': maintenance_file.created_at.isoformat() if maintenance_file.created_at else None,
+    }
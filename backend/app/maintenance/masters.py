@@ -0,0 +1,84 @@
+# backend/app/maintenance/masters.py
+
+from collections import namedtuple
+
+from flask import current_app
+
+from app.maintenance.models import MaintenanceType, MaintenanceStatus
+from app.maintenance.cache import TableCache
+
+# キャッシュに保持するマスタの値（セッションに依存しないようORMオブジェクトではなく値で持つ）
+MaintenanceTypeInfo = namedtuple('MaintenanceTypeInfo', ['id', 'name', 'description', 'cycle_months', 'distance_interval_km', 'is_active'])
+MaintenanceStatusInfo = namedtuple('MaintenanceStatusInfo', ['id', 'name', 'description', 'color_code'])
+
+# 点検種類・整備状態マスタのキャッシュ（マスタの変更がコミットされたら破棄）
+master_cache = TableCache('maintenance_masters', ['maintenance_types', 'maintenance_statuses'], ttl_seconds=300)
+
+
+def _load_masters():
+    """両マスタを全件読み込み、ID・名称で引けるようにする（同名がある場合はIDの小さい方）"""
+    types = [
+        MaintenanceTypeInfo(t.id, t.name, t.description, t.cycle_months, t.distance_interval_km, t.is_active)
+        for t in MaintenanceType.query.order_by(MaintenanceType.id).all()
+    ]
+    statuses = [
+        MaintenanceStatusInfo(s.id, s.name, s.description, s.color_code)
+        for s in MaintenanceStatus.query.order_by(MaintenanceStatus.id).all()
+    ]
+
+    types_by_name = {}
+    for t in types:
+        types_by_name.setdefault(t.name, t)
+    statuses_by_name = {}
+    for s in statuses:
+        statuses_by_name.setdefault(s.name, s)
+
+    return {
+        'types': types,
+        'types_by_id': {t.id: t for t in types},
+        'types_by_name': types_by_name,
+        'statuses': statuses,
+        'statuses_by_id': {s.id: s for s in statuses},
+        'statuses_by_name': statuses_by_name,
+    }
+
+
+def _masters():
+    return master_cache.get_or_load(
+        'all', _load_masters,
+        ttl_seconds=current_app.config.get('MAINTENANCE_MASTER_CACHE_SECONDS')
+    )
+
+
+def get_maintenance_type(name):
+    """名称から点検種類を取得（なければ None）"""
+    return _masters()['types_by_name'].get(name)
+
+
+def get_maintenance_type_by_id(type_id):
+    return _masters()['types_by_id'].get(type_id)
+
+
+def list_maintenance_types(active_only=False):
+    types = _masters()['types']
+    if active_only:
+        types = [t for t in types if t.is_active is not False]
+    return types
+
+
+def get_maintenance_status(name):
+    """名称から整備状態を取得（なければ None）"""
+    return _masters()['statuses_by_name'].get(name)
+
+
+def get_maintenance_status_by_id(status_id):
+    return _masters()['statuses_by_id'].get(status_id)
+
+
+def list_maintenance_statuses():
+    return _masters()['statuses']
+
+
+def invalidate_master_cache():
+    """マスタを直接SQLで変更した場合などに明示的に破棄する"""
+    master_cache.invalidate()
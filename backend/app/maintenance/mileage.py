@@ -0,0 +1,133 @@
+# backend/app/maintenance/mileage.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, func, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from flask import current_app
+
+from app.extensions import db
+from app.maintenance.models import MaintenanceType, VehicleOdometer, MaintenanceMileageTrigger
+from app.maintenance.schedule_generator import insert_missing_schedules
+from app.maintenance.tasks import get_or_create_status
+
+
+def record_odometer_readings(readings):
+    """運転日報の終了時走行距離で車両ごとの最新走行距離を更新し、距離による点検予定を作成する
+
+    readings: (車両ID, 勤務日, 終了時走行距離, 運転日報ID) の一覧
+    走行距離は増える方向にのみ更新する（修正で減った場合は元の値のまま）。
+    日報の履歴は読み直さず、更新された車両の最新値だけで判定する。戻り値は作成した予定の件数。
+    """
+    latest = {}
+    for vehicle_id, reading_date, odometer, log_id in readings:
+        if vehicle_id is None or odometer is None:
+            continue
+        if vehicle_id not in latest or odometer > latest[vehicle_id][1]:
+            latest[vehicle_id] = (reading_date, odometer, log_id)
+    if not latest:
+        return 0
+
+    now = datetime.now()
+    stmt = pg_insert(VehicleOdometer.__table__).values([
+        {
+            'vehicle_id': vehicle_id,
+            'odometer': odometer,
+            'reading_date': reading_date,
+            'driving_log_id': log_id,
+            'updated_at': now,
+        }
+        for vehicle_id, (reading_date, odometer, log_id) in latest.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['vehicle_id'],
+        set_={
+            'odometer': stmt.excluded.odometer,
+            'reading_date': stmt.excluded.reading_date,
+            'driving_log_id': stmt.excluded.driving_log_id,
+            'updated_at': stmt.excluded.updated_at,
+        },
+        where=stmt.excluded.odometer > VehicleOdometer.__table__.c.odometer
+    ).returning(VehicleOdometer.__table__.c.vehicle_id)
+    updated_vehicle_ids = db.session.execute(stmt).scalars().all()
+
+    created_count = process_mileage_triggers(updated_vehicle_ids) if updated_vehicle_ids else 0
+    db.session.commit()
+    return created_count
+
+
+def process_mileage_triggers(vehicle_ids):
+    """指定車両の最新走行距離が次回の走行距離に達した点検種類について仮予定を作成
+
+    1. 初めての車両×点検種類は「現在の走行距離 + 間隔」を次回として登録
+    2. 次回に達したものを「現在の走行距離 + 間隔」に進め、達した分の予定を作成
+    予定日は日報の日付ではなく、今日から MAINTENANCE_MILEAGE_LEAD_DAYS 日後とする
+    （過去の日付にすると期限切れとしてすぐ未実施に更新されるため）。コミットは呼び出し側で行う。
+    """
+    distance_types = select(MaintenanceType.id, MaintenanceType.distance_interval_km).where(
+        MaintenanceType.distance_interval_km > 0,
+        MaintenanceType.is_active.isnot(False)
+    ).subquery('distance_types')
+
+    now = datetime.now()
+    baseline = select(
+        VehicleOdometer.vehicle_id,
+        distance_types.c.id,
+        VehicleOdometer.odometer + distance_types.c.distance_interval_km,
+        func.now(),
+        func.now(),
+    ).select_from(VehicleOdometer).join(distance_types, true())\
+     .where(VehicleOdometer.vehicle_id.in_(vehicle_ids))
+    db.session.execute(
+        pg_insert(MaintenanceMileageTrigger.__table__).from_select(
+            ['vehicle_id', 'maintenance_type_id', 'next_due_odometer', 'created_at', 'updated_at'],
+            baseline
+        ).on_conflict_do_nothing(constraint='uq_mileage_trigger_vehicle_type')
+    )
+
+    due = db.session.execute(
+        update(MaintenanceMileageTrigger)
+        .where(
+            MaintenanceMileageTrigger.vehicle_id == VehicleOdometer.vehicle_id,
+            MaintenanceMileageTrigger.maintenance_type_id == distance_types.c.id,
+            VehicleOdometer.vehicle_id.in_(vehicle_ids),
+            VehicleOdometer.odometer >= MaintenanceMileageTrigger.next_due_odometer
+        )
+        .values(
+            last_triggered_odometer=VehicleOdometer.odometer,
+            next_due_odometer=VehicleOdometer.odometer + distance_types.c.distance_interval_km,
+            updated_at=now
+        )
+        .returning(
+            MaintenanceMileageTrigger.vehicle_id,
+            MaintenanceMileageTrigger.maintenance_type_id,
+            VehicleOdometer.odometer
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not due:
+        return 0
+
+    lead_days = current_app.config.get('MAINTENANCE_MILEAGE_LEAD_DAYS', 7)
+    scheduled_date = now.date() + timedelta(days=lead_days)
+    tentative_status = get_or_create_status('仮予定', '自動生成された仮の点検予定', '#6c757d')
+    return insert_missing_schedules([
+        {
+            'vehicle_id': vehicle_id,
+            'maintenance_type_id': type_id,
+            'scheduled_date': scheduled_date,
+            'status_id': tentative_status.id,
+            'notes': f'走行距離 {odometer:,}km に達したため自動生成',
+        }
+        for vehicle_id, type_id, odometer in due
+    ])
+
+
+def track_odometer_after_log_change(readings):
+    """運転日報の登録・更新後の走行距離の更新（日報自体はコミット済みのため、失敗はログに残して続ける）"""
+    try:
+        return record_odometer_readings(readings)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'走行距離・距離点検の更新エラー: {str(e)}')
+        return 0
@@ -13,6 +13,7 @@ class MaintenanceType(db.Model):
     name = db.Column(db.String(50), nullable=False, comment='点検種類名')  # 例: '車検', '3ヶ月点検', 'オイル交換'
     description = db.Column(db.Text, comment='説明')
     cycle_months = db.Column(db.Integer, comment='点検周期（月）')  # 例: 12, 3, 6
+    distance_interval_km = db.Column(db.Integer, comment='点検間隔（走行距離km）')  # 例: オイル交換 10000
     is_active = db.Column(db.Boolean, default=True, comment='有効フラグ')
     created_at = db.Column(db.DateTime, default=datetime.now, comment='作成日時')
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, comment='更新日時')
@@ -39,6 +40,9 @@ class MaintenanceStatus(db.Model):
 class MaintenanceSchedule(db.Model):
     """整備予定・実績テーブル"""
     __tablename__ = 'maintenance_schedules'
+    __table_args__ = (
+        db.Index('idx_maintenance_schedules_vehicle_type_date', 'vehicle_id', 'maintenance_type_id', 'scheduled_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), nullable=False, comment='車両ID')
@@ -64,9 +68,101 @@ class MaintenanceSchedule(db.Model):
         return f'<MaintenanceSchedule {self.id} - {self.vehicle_id} - {self.scheduled_date}>'
 
 
+class VehicleOdometer(db.Model):
+    """車両ごとの最新の走行距離（運転日報の終了時走行距離から更新）"""
+    __tablename__ = 'vehicle_odometers'
+
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), primary_key=True, comment='車両ID')
+    odometer = db.Column(db.Integer, nullable=False, comment='走行距離（km）')
+    reading_date = db.Column(db.Date, nullable=False, comment='記録日')
+    driving_log_id = db.Column(db.Integer, db.ForeignKey('driving_logs.id', ondelete='SET NULL'), comment='運転日報ID')
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, comment='更新日時')
+
+    def __repr__(self):
+        return f'<VehicleOdometer {self.vehicle_id} - {self.odometer}km>'
+
+
+class MaintenanceMileageTrigger(db.Model):
+    """走行距離による点検の発生状況（車両×点検種類ごとの次回の走行距離）"""
+    __tablename__ = 'maintenance_mileage_triggers'
+    __table_args__ = (
+        db.UniqueConstraint('vehicle_id', 'maintenance_type_id', name='uq_mileage_trigger_vehicle_type'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), nullable=False, comment='車両ID')
+    maintenance_type_id = db.Column(db.Integer, db.ForeignKey('maintenance_types.id'), nullable=False, comment='点検種類ID')
+    next_due_odometer = db.Column(db.Integer, nullable=False, comment='次回の走行距離（km）')
+    last_triggered_odometer = db.Column(db.Integer, comment='前回予定を作成した走行距離（km）')
+    created_at = db.Column(db.DateTime, default=datetime.now, comment='作成日時')
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, comment='更新日時')
+
+    def __repr__(self):
+        return f'<MaintenanceMileageTrigger {self.vehicle_id} - {self.maintenance_type_id} - {self.next_due_odometer}km>'
+
+
+class VehicleMonthlyCost(db.Model):
+    """車両・月ごとの費用集計（整備は点検種類ごと、給油・ETCは maintenance_type_id = 0）
+
+    整備費用は maintenance_schedules / maintenance_details のトリガーで、
+    給油・ETCは取り込み時と定期ジョブで更新する。
+    """
+    __tablename__ = 'vehicle_monthly_costs'
+    __table_args__ = (
+        db.Index('idx_vehicle_monthly_costs_month', 'month', 'category'),
+    )
+
+    CATEGORY_LABELS = {
+        'maintenance': '整備',
+        'fuel': '燃料',
+        'etc': '高速料金',
+    }
+
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), primary_key=True, comment='車両ID')
+    month = db.Column(db.Date, primary_key=True, comment='月（1日）')
+    category = db.Column(db.String(20), primary_key=True, comment='費用区分')  # 'maintenance' / 'fuel' / 'etc'
+    maintenance_type_id = db.Column(db.Integer, primary_key=True, default=0, comment='点検種類ID（整備以外は0）')
+    amount = db.Column(db.Numeric(14, 2), nullable=False, default=0, comment='金額（整備は作業費用）')
+    parts_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0, comment='部品費用')
+    quantity = db.Column(db.Numeric(12, 2), comment='数量（燃料はリットル）')
+    record_count = db.Column(db.Integer, nullable=False, default=0, comment='件数')
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, comment='更新日時')
+
+    def __repr__(self):
+        return f'<VehicleMonthlyCost {self.vehicle_id} - {self.month} - {self.category}>'
+
+
+class MaintenanceChecklistItem(db.Model):
+    """点検種類ごとのチェックリスト項目（テンプレート）テーブル"""
+    __tablename__ = 'maintenance_checklist_items'
+    __table_args__ = (
+        db.UniqueConstraint('maintenance_type_id', 'item_name', name='uq_checklist_item_type_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    maintenance_type_id = db.Column(db.Integer, db.ForeignKey('maintenance_types.id', ondelete='CASCADE'), nullable=False, comment='点検種類ID')
+    item_name = db.Column(db.String(100), nullable=False, comment='点検項目名')
+    category = db.Column(db.String(50), comment='区分')  # 例: 'エンジン', 'ブレーキ'
+    sort_order = db.Column(db.Integer, nullable=False, default=0, comment='表示順')
+    is_required = db.Column(db.Boolean, default=True, comment='必須フラグ')
+    created_at = db.Column(db.DateTime, default=datetime.now, comment='作成日時')
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, comment='更新日時')
+
+    # リレーションシップ
+    maintenance_type = db.relationship('MaintenanceType', backref=db.backref('checklist_items', order_by='MaintenanceChecklistItem.sort_order'))
+
+    def __repr__(self):
+        return f'<MaintenanceChecklistItem {self.maintenance_type_id} - {self.item_name}>'
+
+
 class MaintenanceDetail(db.Model):
     """整備詳細テーブル"""
     __tablename__ = 'maintenance_details'
+    __table_args__ = (
+        db.Index('idx_maintenance_details_schedule', 'maintenance_schedule_id'),
+        # チェックリストの一括登録で (予定, 項目名) 単位に上書きするため
+        db.UniqueConstraint('maintenance_schedule_id', 'item_name', name='uq_maintenance_details_schedule_item'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     maintenance_schedule_id = db.Column(db.Integer, db.ForeignKey('maintenance_schedules.id'), nullable=False, comment='整備予定ID')
@@ -90,6 +186,10 @@ class MaintenanceDetail(db.Model):
 class MaintenanceFile(db.Model):
     """整備関連ファイルテーブル"""
     __tablename__ = 'maintenance_files'
+    __table_args__ = (
+        db.Index('idx_maintenance_files_pending_derivatives', 'id',
+                 postgresql_where=db.text('derivatives_generated_at IS NULL')),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     maintenance_schedule_id = db.Column(db.Integer, db.ForeignKey('maintenance_schedules.id'), nullable=False, comment='整備予定ID')
@@ -97,6 +197,14 @@ class MaintenanceFile(db.Model):
     file_path = db.Column(db.String(255), nullable=False, comment='ファイルパス')
     file_type = db.Column(db.String(50), comment='ファイルタイプ')  # 例: 'image/jpeg', 'application/pdf'
     file_size = db.Column(db.Integer, comment='ファイルサイズ（バイト）')
+    content_hash = db.Column(db.String(64), index=True, comment='内容のSHA-256（同じ内容は保存先を共有）')
+    thumbnail_path = db.Column(db.String(255), comment='サムネイルのパス')
+    thumbnail_width = db.Column(db.Integer, comment='サムネイルの幅（px）')
+    thumbnail_height = db.Column(db.Integer, comment='サムネイルの高さ（px）')
+    preview_path = db.Column(db.String(255), comment='プレビュー（PDFは1ページ目）のパス')
+    preview_width = db.Column(db.Integer, comment='プレビューの幅（px）')
+    preview_height = db.Column(db.Integer, comment='プレビューの高さ（px）')
+    derivatives_generated_at = db.Column(db.DateTime, comment='サムネイル・プレビューの作成日時')
     description = db.Column(db.Text, comment='説明')
     uploaded_by = db.Column(db.String(100), comment='アップロード者')
     created_at = db.Column(db.DateTime, default=datetime.now, comment='作成日時')
@@ -108,6 +216,31 @@ class MaintenanceFile(db.Model):
         return f'<MaintenanceFile {self.id} - {self.file_name}>'
 
 
+# 点検種類ごとの初期チェックリスト（区分, 点検項目名）
+_BASIC_CHECKLIST = [
+    ('かじ取り装置', 'ハンドルの操作具合'),
+    ('制動装置', 'ブレーキペダルの遊び・踏みしろ'),
+    ('制動装置', '駐車ブレーキの引きしろ'),
+    ('走行装置', 'タイヤの空気圧・亀裂・損傷'),
+    ('走行装置', 'ホイールナットの緩み'),
+    ('エンジン', 'エンジンオイルの量・汚れ'),
+    ('エンジン', '冷却水の量'),
+    ('エンジン', 'ファンベルトの張り・損傷'),
+    ('電気装置', 'バッテリー液の量'),
+    ('電気装置', '灯火装置・方向指示器'),
+    ('その他', 'ワイパー・ウォッシャー液'),
+]
+DEFAULT_CHECKLISTS = {
+    '3ヶ月点検': _BASIC_CHECKLIST,
+    '車検': _BASIC_CHECKLIST + [
+        ('制動装置', 'ブレーキパッド・ライニングの摩耗'),
+        ('走行装置', 'サスペンションの損傷'),
+        ('排気装置', '排気管・マフラーの損傷'),
+        ('その他', '下回りの油漏れ'),
+    ],
+}
+
+
 # 初期データ登録用関数
 def init_maintenance_data():
     """マスタデータの初期登録"""
@@ -115,8 +248,8 @@ def init_maintenance_data():
     maintenance_types = [
         {'name': '車検', 'description': '法定12ヶ月点検（車検）', 'cycle_months': 12},
         {'name': '3ヶ月点検', 'description': '定期3ヶ月点検', 'cycle_months': 3},
-        {'name': 'オイル交換', 'description': 'エンジンオイル交換', 'cycle_months': 3},
-        {'name': 'タイヤ交換', 'description': 'タイヤ交換または位置交換', 'cycle_months': 6},
+        {'name': 'オイル交換', 'description': 'エンジンオイル交換', 'cycle_months': 3, 'distance_interval_km': 10000},
+        {'name': 'タイヤ交換', 'description': 'タイヤ交換または位置交換', 'cycle_months': 6, 'distance_interval_km': 30000},
         {'name': 'ブレーキパッド交換', 'description': 'ブレーキパッドの点検と交換', 'cycle_months': 12},
     ]
 
@@ -138,4 +271,18 @@ def init_maintenance_data():
         if not MaintenanceStatus.query.filter_by(name=ms['name']).first():
             db.session.add(MaintenanceStatus(**ms))
 
+    db.session.flush()
+
+    # チェックリストが未登録の点検種類のみ初期項目を登録
+    for type_name, items in DEFAULT_CHECKLISTS.items():
+        maintenance_type = MaintenanceType.query.filter_by(name=type_name).first()
+        if maintenance_type and not maintenance_type.checklist_items:
+            for index, (category, item_name) in enumerate(items):
+                db.session.add(MaintenanceChecklistItem(
+                    maintenance_type_id=maintenance_type.id,
+                    item_name=item_name,
+                    category=category,
+                    sort_order=index
+                ))
+
     db.session.commit()
\ No newline at end of file
@@ -0,0 +1,201 @@
+# backend/app/maintenance/optimizer.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, update, distinct
+
+from app.extensions import db
+from app.employee.models import Employee
+from app.driving_log.models import DrivingLog
+from app.maintenance.models import MaintenanceSchedule
+from app.maintenance import masters
+
+
+def plan_schedules(jobs, days, technicians, capacity, existing_load=None, usage_rates=None, busy_days=None):
+    """点検予定を整備士の1日あたりの受け持ち件数を超えないよう日付・担当者に割り当てる（貪欲法）
+
+    jobs: [{'id', 'vehicle_id', 'earliest', 'latest'}]（latest が期限。earliest〜latest の間で割り当てる）
+    days: 割り当て可能な日付の一覧
+    technicians: 整備士IDの一覧
+    capacity: 整備士1人あたりの1日の受け持ち件数
+    existing_load: {(整備士ID, 日付): 件数} 対象外の予定で既に埋まっている件数
+    usage_rates: {(車両ID, 曜日): 0〜1} 運転日報から求めた曜日ごとの稼働率（稼働が少ない曜日を優先）
+    busy_days: {(車両ID, 日付)} 運転日報があり車両が使えない日
+
+    期限の早い予定から順に、空きのある日のうち「車両の稼働率・その日の混み具合・期限からの距離」が
+    最も小さい日と、その日の受け持ちが最も少ない整備士を選ぶ。
+    戻り値は ({予定ID: (日付, 整備士ID)}, [割り当てられなかった予定ID])。
+    """
+    load = defaultdict(int, existing_load or {})
+    usage_rates = usage_rates or {}
+    busy_days = busy_days or set()
+    day_set = set(days)
+    total_capacity = max(capacity * len(technicians), 1)
+
+    day_load = defaultdict(int)
+    for (technician_id, day), count in load.items():
+        day_load[day] += count
+
+    assignments = {}
+    unassigned = []
+    for job in sorted(jobs, key=lambda j: (j['latest'], j['earliest'], j['id'])):
+        best = None
+        day = job['earliest']
+        while day <= job['latest']:
+            if day in day_set and (job['vehicle_id'], day) not in busy_days:
+                technician_id = min(technicians, key=lambda t: (load[(t, day)], t), default=None)
+                if technician_id is not None and load[(technician_id, day)] < capacity:
+                    cost = (
+                        usage_rates.get((job['vehicle_id'], day.weekday()), 0.0) * 2
+                        + day_load[day] / total_capacity
+                        + (job['latest'] - day).days * 0.01
+                    )
+                    if best is None or cost < best[0]:
+                        best = (cost, day, technician_id)
+            day += timedelta(days=1)
+
+        if best is None:
+            unassigned.append(job['id'])
+            continue
+
+        _, day, technician_id = best
+        load[(technician_id, day)] += 1
+        day_load[day] += 1
+        assignments[job['id']] = (day, technician_id)
+
+    return assignments, unassigned
+
+
+def optimize_schedules(start_date, end_date, window_days=14, capacity=2, skip_weekends=True,
+                       usage_weeks=8, apply=False):
+    """期間内の未完了の予定（予定・仮予定）を、期限（現在の予定日）までの window_days 日の間で平準化する
+
+    整備士は在籍中の is_mechanic の従業員。車両の稼働状況は運転日報から求める。
+    apply=True の場合は予定日・担当者を1回の一括UPDATEで反映する（コミットは呼び出し側で行う）。
+    """
+    open_status_ids = [
+        status.id for status in (masters.get_maintenance_status('予定'), masters.get_maintenance_status('仮予定'))
+        if status
+    ]
+    today = datetime.now().date()
+    first_day = max(start_date - timedelta(days=window_days), today)
+
+    schedules = db.session.query(
+        MaintenanceSchedule.id,
+        MaintenanceSchedule.vehicle_id,
+        MaintenanceSchedule.scheduled_date,
+        MaintenanceSchedule.technician_id
+    ).filter(
+        MaintenanceSchedule.scheduled_date.between(start_date, end_date),
+        MaintenanceSchedule.status_id.in_(open_status_ids),
+        MaintenanceSchedule.completion_date.is_(None)
+    ).all() if open_status_ids else []
+
+    technicians = Employee.query.filter(
+        Employee.is_mechanic.is_(True),
+        Employee.is_active.isnot(False)
+    ).order_by(Employee.id).all()
+    technician_ids = [t.id for t in technicians]
+
+    jobs = [{
+        'id': s.id,
+        'vehicle_id': s.vehicle_id,
+        'earliest': max(s.scheduled_date - timedelta(days=window_days), first_day),
+        'latest': s.scheduled_date,
+    } for s in schedules if s.scheduled_date >= first_day]
+    job_ids = [job['id'] for job in jobs]
+    vehicle_ids = {job['vehicle_id'] for job in jobs}
+
+    days = []
+    day = first_day
+    while day <= end_date:
+        if not (skip_weekends and day.weekday() >= 5):
+            days.append(day)
+        day += timedelta(days=1)
+
+    # 対象外の予定（完了・他の担当など）で既に埋まっている整備士の枠
+    existing_load = {}
+    if technician_ids and job_ids:
+        existing_load = {
+            (technician_id, scheduled_date): count
+            for technician_id, scheduled_date, count in db.session.query(
+                MaintenanceSchedule.technician_id,
+                MaintenanceSchedule.scheduled_date,
+                func.count()
+            ).filter(
+                MaintenanceSchedule.technician_id.in_(technician_ids),
+                MaintenanceSchedule.scheduled_date.between(first_day, end_date),
+                MaintenanceSchedule.id.notin_(job_ids)
+            ).group_by(MaintenanceSchedule.technician_id, MaintenanceSchedule.scheduled_date).all()
+        }
+
+    usage_rates, busy_days = _vehicle_availability(vehicle_ids, first_day, end_date, usage_weeks)
+
+    assignments, unassigned = plan_schedules(
+        jobs, days, technician_ids, capacity, existing_load, usage_rates, busy_days
+    )
+
+    technician_names = {t.id: t.full_name for t in technicians}
+    original = {s.id: (s.scheduled_date, s.technician_id) for s in schedules}
+    changes = [
+        {
+            'id': schedule_id,
+            'scheduled_date': day,
+            'technician_id': technician_id,
+            'technician': technician_names[technician_id],
+            'updated_at': datetime.now(),
+        }
+        for schedule_id, (day, technician_id) in assignments.items()
+        if original[schedule_id] != (day, technician_id)
+    ]
+
+    if apply and changes:
+        db.session.execute(update(MaintenanceSchedule), changes)
+
+    return {
+        'schedule_count': len(jobs),
+        'technician_count': len(technician_ids),
+        'changes': [{
+            'id': change['id'],
+            'previous_date': original[change['id']][0].isoformat(),
+            'scheduled_date': change['scheduled_date'].isoformat(),
+            'technician_id': change['technician_id'],
+            'technician': change['technician'],
+        } for change in sorted(changes, key=lambda c: (c['scheduled_date'], c['id']))],
+        'unassigned_ids': sorted(unassigned),
+        'applied': bool(apply and changes),
+    }
+
+
+def _vehicle_availability(vehicle_ids, start_date, end_date, usage_weeks):
+    """運転日報から車両の曜日別稼働率と、期間内で日報がある（使用中の）日を求める"""
+    if not vehicle_ids:
+        return {}, set()
+
+    since = start_date - timedelta(weeks=usage_weeks)
+    weekday = func.extract('isodow', DrivingLog.date)
+    rows = db.session.query(
+        DrivingLog.vehicle_id,
+        weekday,
+        func.count(distinct(DrivingLog.date))
+    ).filter(
+        DrivingLog.vehicle_id.in_(vehicle_ids),
+        DrivingLog.date >= since,
+        DrivingLog.date < start_date
+    ).group_by(DrivingLog.vehicle_id, weekday).all()
+
+    # isodow は月曜=1。date.weekday() は月曜=0
+    usage_rates = {
+        (vehicle_id, int(isodow) - 1): min(count / usage_weeks, 1.0)
+        for vehicle_id, isodow, count in rows
+    }
+
+    busy_days = {
+        (vehicle_id, log_date)
+        for vehicle_id, log_date in db.session.query(DrivingLog.vehicle_id, DrivingLog.date).filter(
+            DrivingLog.vehicle_id.in_(vehicle_ids),
+            DrivingLog.date.between(start_date, end_date)
+        ).distinct().all()
+    }
+
+    return usage_rates, busy_days
@@ -0,0 +1,187 @@
+# backend/app/maintenance/previews.py
+"""整備ファイルのサムネイル・プレビュー作成
+
+画像は Pillow、PDF の1ページ目は PyMuPDF（fitz）で描画する（どちらも requirements.txt に記載）。
+インストールされていない環境ではその形式を作成せずに残し、インストール後の定期ジョブで作成する。
+作成した画像は元のファイルと同じ場所に <元のパス>.thumbnail.jpg / .preview.jpg として保存する。
+"""
+
+import os
+import tempfile
+import threading
+from datetime import datetime
+from sqlalchemy import update, or_
+
+from flask import current_app
+
+from app.extensions import db
+from app.maintenance.models import MaintenanceFile
+from app.utils.storage import get_storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 未インストール
+    Image = None
+
+try:
+    import fitz
+except ImportError:  # PyMuPDF 未インストール
+    fitz = None
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    IMAGE_EXTENSIONS.add('.heic')
+except ImportError:  # pillow-heif 未インストール（HEIC は作成しない）
+    pass
+
+
+def derivative_path(file_path, kind):
+    root, _ = os.path.splitext(file_path)
+    return f'{root}.{kind}.jpg'
+
+
+def renderable_extensions():
+    """この環境で描画できる拡張子"""
+    if Image is None:
+        return set()
+    return IMAGE_EXTENSIONS | ({'.pdf'} if fitz is not None else set())
+
+
+def _open_image(source_path):
+    if source_path.lower().endswith('.pdf'):
+        with fitz.open(source_path) as document:
+            page = document.load_page(0)
+            # プレビューの長辺が足りる程度の解像度で描画（既定の72dpiの2倍）
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+    image = Image.open(source_path)
+    image = ImageOps.exif_transpose(image)  # スマートフォン写真の向きを補正
+    return image.convert('RGB')
+
+
+def render_derivatives(source_path, sizes):
+    """sizes（種類 → 長辺px）ごとに縮小した JPEG を一時ファイルに書き出す
+
+    戻り値は 種類 → (一時ファイルのパス, 幅, 高さ)。一時ファイルの削除は呼び出し側で行う。
+    """
+    image = _open_image(source_path)
+    rendered = {}
+    try:
+        for kind, max_px in sizes.items():
+            derivative = image.copy()
+            derivative.thumbnail((max_px, max_px))
+            fd, tmp_path = tempfile.mkstemp(suffix=f'.{kind}.jpg')
+            with os.fdopen(fd, 'wb') as tmp:
+                derivative.save(tmp, 'JPEG', quality=80, optimize=True, progressive=True)
+            rendered[kind] = (tmp_path, derivative.width, derivative.height)
+    except Exception:
+        for tmp_path, _, _ in rendered.values():
+            os.remove(tmp_path)
+        raise
+    return rendered
+
+
+class RenderError(Exception):
+    """ファイルの内容が描画できない（壊れている・対応していない）"""
+
+
+def _generate_for_path(storage, file_path, sizes):
+    """1つの保存済みファイルからサムネイル・プレビューを作成して保存し、更新する値を返す
+
+    描画の失敗は RenderError、保存先からの取得・保存の失敗はそのままの例外で送出する。
+    """
+    with storage.fetch(file_path) as source_path:
+        try:
+            rendered = render_derivatives(source_path, sizes)
+        except Exception as e:
+            raise RenderError(str(e)) from e
+
+    values = {}
+    try:
+        for kind, (tmp_path, width, height) in rendered.items():
+            path = derivative_path(file_path, kind)
+            storage.save(path, tmp_path, 'image/jpeg')
+            values.update({f'{kind}_path': path, f'{kind}_width': width, f'{kind}_height': height})
+    finally:
+        for tmp_path, _, _ in rendered.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return values
+
+
+def generate_file_derivatives(file_ids=None, limit=100):
+    """サムネイル未作成のファイル（file_ids 指定時はその中）についてサムネイル・プレビューを作成
+
+    同じ内容のファイルは保存先を共有しているため、保存パスごとに1度だけ作成して
+    そのパスを参照する行をまとめて更新する。描画できない形式は未作成のまま残す。
+    内容が描画できないファイルは作成済み（パスなし）とし、保存先の取得・保存に失敗したものは次回に再試行する。
+    戻り値は作成した保存パスの件数。
+    """
+    extensions = renderable_extensions()
+    if not extensions:
+        return 0
+
+    query = db.session.query(MaintenanceFile.file_path).filter(
+        MaintenanceFile.derivatives_generated_at.is_(None),
+        or_(*[MaintenanceFile.file_path.ilike(f'%{ext}') for ext in sorted(extensions)])
+    )
+    if file_ids is not None:
+        query = query.filter(MaintenanceFile.id.in_(file_ids))
+    file_paths = [path for (path,) in query.distinct().limit(limit).all()]
+    if not file_paths:
+        return 0
+
+    config = current_app.config
+    sizes = {
+        'thumbnail': config.get('MAINTENANCE_THUMBNAIL_PX', 320),
+        'preview': config.get('MAINTENANCE_PREVIEW_PX', 1280),
+    }
+    storage = get_storage()
+
+    generated = 0
+    for file_path in file_paths:
+        try:
+            values = _generate_for_path(storage, file_path, sizes)
+            generated += 1
+        except RenderError as e:
+            # 壊れたファイルなどは作成済み扱いにして繰り返し処理しない
+            current_app.logger.warning(f'サムネイルを作成できないファイルです（{file_path}）: {str(e)}')
+            values = {}
+        except Exception as e:
+            # 保存先の通信エラーなどは未作成のまま残し、定期ジョブ file_derivatives で再試行する
+            current_app.logger.warning(f'サムネイルの作成エラー（{file_path}）: {str(e)}')
+            continue
+
+        db.session.execute(
+            update(MaintenanceFile)
+            .where(MaintenanceFile.file_path == file_path)
+            .values(derivatives_generated_at=datetime.now(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    return generated
+
+
+def start_derivative_generation(file_ids):
+    """アップロードされたファイルのサムネイルをバックグラウンドで作成
+
+    MAINTENANCE_DERIVATIVES_ASYNC が False の場合はその場で作成する。
+    漏れたものは定期ジョブ file_derivatives が拾う。
+    """
+    app = current_app._get_current_object()
+    if not app.config.get('MAINTENANCE_DERIVATIVES_ASYNC', True):
+        return generate_file_derivatives(file_ids)
+
+    def run():
+        with app.app_context():
+            try:
+                generate_file_derivatives(file_ids)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning(f'サムネイルの作成エラー: {str(e)}')
+
+    threading.Thread(target=run, name='maintenance-file-derivatives', daemon=True).start()
@@ -0,0 +1,89 @@
+# backend/app/maintenance/recurrence.py
+
+import numpy as np
+
+from app.maintenance.masters import list_maintenance_types
+from app.maintenance.schedule_generator import EXPIRY_TYPE_NAMES, load_vehicle_expiry_dates, insert_missing_schedules
+
+
+def expand_cycle_dates(anchor_dates, cycle_months, start_date, end_date):
+    """基準日から cycle_months ヶ月ごとの日付のうち、期間内のものを全車両分まとめて求める
+
+    基準日の前後どちらの方向にも展開する（基準日 ± n × 周期）。
+    月末を超える日は月末に読み替える（例: 1/31 の1ヶ月後は 2/28）。
+    戻り値は (基準日のインデックスの配列, 日付の配列)。
+    """
+    anchors = np.asarray(anchor_dates, dtype='datetime64[D]')
+    if anchors.size == 0 or not cycle_months or cycle_months <= 0:
+        return np.array([], dtype=int), np.array([], dtype='datetime64[D]')
+
+    start = np.datetime64(start_date, 'D')
+    end = np.datetime64(end_date, 'D')
+
+    anchor_months = anchors.astype('datetime64[M]')
+    anchor_days = (anchors - anchor_months.astype('datetime64[D]')).astype(np.int64)  # 0始まりの日
+
+    # 期間の最初・最後の月までの周期数（前後1周期分の余裕を持たせ、後で日付で絞り込む）
+    offset_start = (start.astype('datetime64[M]') - anchor_months).astype(np.int64)
+    offset_end = (end.astype('datetime64[M]') - anchor_months).astype(np.int64)
+    cycle_start = np.floor_divide(offset_start, cycle_months)
+    cycle_end = -np.floor_divide(-offset_end, cycle_months)
+
+    width = int((cycle_end - cycle_start).max()) + 1
+    cycles = cycle_start[:, None] + np.arange(width)[None, :]
+
+    months = anchor_months[:, None] + (cycles * cycle_months).astype('timedelta64[M]')
+    month_first = months.astype('datetime64[D]')
+    month_length = ((months + np.timedelta64(1, 'M')).astype('datetime64[D]') - month_first).astype(np.int64)
+    days = np.minimum(anchor_days[:, None], month_length - 1)
+    dates = month_first + days.astype('timedelta64[D]')
+
+    mask = (cycles <= cycle_end[:, None]) & (dates >= start) & (dates <= end)
+    anchor_index, cycle_index = np.nonzero(mask)
+    return anchor_index, dates[anchor_index, cycle_index]
+
+
+def build_recurring_candidates(vehicle_expiries, maintenance_types, start_date, end_date, status_id):
+    """有効な全点検種類について、車検有効期限を基準に周期（月）ごとの点検予定の候補を作成"""
+    if not vehicle_expiries:
+        return []
+
+    vehicle_ids = [vehicle_id for vehicle_id, _ in vehicle_expiries]
+    anchor_dates = [expiry_date for _, expiry_date in vehicle_expiries]
+
+    candidates = []
+    for maintenance_type in maintenance_types:
+        anchor_index, dates = expand_cycle_dates(
+            anchor_dates, maintenance_type.cycle_months, start_date, end_date
+        )
+        notes = f'{maintenance_type.name}の周期（{maintenance_type.cycle_months}ヶ月）から自動生成'
+        for index, scheduled_date in zip(anchor_index.tolist(), dates.tolist()):
+            candidates.append({
+                'vehicle_id': vehicle_ids[index],
+                'maintenance_type_id': maintenance_type.id,
+                'scheduled_date': scheduled_date,
+                'status_id': status_id,
+                'notes': notes,
+            })
+
+    return candidates
+
+
+def generate_recurring_schedules(start_date, end_date, status_id, type_ids=None, vehicle_filters=()):
+    """周期が設定された有効な全点検種類の予定を期間内に生成し、登録件数を返す
+
+    既に同じ車両・点検種類・予定日の予定がある場合は登録しないため、何度実行してもよい。
+    車検・3ヶ月点検は有効期限から日数で生成する側（EXPIRY_TYPE_NAMES）に任せ、
+    暦月で重複した予定を作らないよう対象外とする。コミットは呼び出し側で行う。
+    """
+    maintenance_types = [
+        t for t in list_maintenance_types(active_only=True)
+        if t.cycle_months and t.cycle_months > 0 and t.name not in EXPIRY_TYPE_NAMES
+        and (not type_ids or t.id in type_ids)
+    ]
+
+    vehicle_expiries = load_vehicle_expiry_dates(*vehicle_filters)
+    candidates = build_recurring_candidates(
+        vehicle_expiries, maintenance_types, start_date, end_date, status_id
+    )
+    return insert_missing_schedules(candidates)
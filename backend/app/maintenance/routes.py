@@ -1,14 +1,40 @@
 # app/maintenance/routes.py - 改良版（Supabase対応）
 
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, abort, send_file
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text, and_, or_
-from datetime import datetime, timedelta
+from sqlalchemy import text, and_, or_, select, update, func, true, tuple_, literal, bindparam, any_, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import joinedload, selectinload, contains_eager
+from datetime import date, datetime, timedelta
+import hashlib
 import os
 
 from app.extensions import db
 from app.vehicle.models import Vehicles
-from app.maintenance.models import MaintenanceType, MaintenanceStatus, MaintenanceSchedule, MaintenanceDetail, MaintenanceFile
+from app.employee.models import Employee
+from app.maintenance.models import MaintenanceType, MaintenanceStatus, MaintenanceSchedule, MaintenanceDetail, MaintenanceFile, VehicleMonthlyCost
+from app.maintenance.schedule_generator import generate_expiry_schedules
+from app.maintenance.recurrence import generate_recurring_schedules
+from app.maintenance.cache import TableCache
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.maintenance import masters
+from app.maintenance.tasks import sweep_overdue_schedules
+from app.maintenance.optimizer import optimize_schedules
+from app.maintenance.checklist import (
+    list_checklist_template, replace_checklist_template,
+    build_schedule_checklist, upsert_schedule_details, checklist_summary
+)
+from app.maintenance.files import save_maintenance_file, delete_maintenance_file, remove_stored_file, serialize_file
+from app.maintenance.previews import start_derivative_generation
+from app.utils.storage import get_storage, LocalStorage, IMMUTABLE_MAX_AGE
+from app.maintenance.costs import monthly_costs, tco_report, refresh_fuel_costs, refresh_etc_costs
+
+# ダッシュボード概要のキャッシュ（点検予定・マスタ・車両の変更がコミットされたら破棄）
+summary_cache = TableCache(
+    'maintenance_summary',
+    ['maintenance_schedules', 'maintenance_statuses', 'maintenance_types', 'vehicles'],
+    ttl_seconds=60
+)
 
 # ブループリント定義
 maintenance_bp = Blueprint('maintenance', __name__, url_prefix='/api/maintenance')
@@ -16,18 +42,19 @@ maintenance_bp = Blueprint('maintenance', __name__, url_prefix='/api/maintenance
 # 点検種類一覧取得
 @maintenance_bp.route('/types/', methods=['GET'])
 def list_maintenance_types():
-    types = MaintenanceType.query.filter_by(is_active=True).all()
+    types = [t for t in masters.list_maintenance_types() if t.is_active]
     return jsonify([{
         'id': t.id,
         'name': t.name,
         'description': t.description,
-        'cycle_months': t.cycle_months
+        'cycle_months': t.cycle_months,
+        'distance_interval_km': t.distance_interval_km
     } for t in types])
 
 # 整備状態一覧取得
 @maintenance_bp.route('/statuses/', methods=['GET'])
 def list_maintenance_statuses():
-    statuses = MaintenanceStatus.query.all()
+    statuses = masters.list_maintenance_statuses()
     return jsonify([{
         'id': s.id,
         'name': s.name,
@@ -38,12 +65,27 @@ def list_maintenance_statuses():
 # 点検予定/実績一覧取得
 @maintenance_bp.route('/schedules/', methods=['GET'])
 def list_maintenance_schedules():
+    """点検予定/実績一覧（予定日の新しい順）
+
+    常にカーソルページネーションで返す（limit の既定は100件、上限1000件）。
+    続きは next_cursor を cursor に指定して取得する。
+    format=compact の場合は予定には各IDのみを載せ、参照する車両・点検種類・状態を別の辞書で返す。
+    """
     # クエリパラメータの取得
     vehicle_id = request.args.get('vehicle_id', type=int)
     maintenance_type_id = request.args.get('maintenance_type_id', type=int)
     status_id = request.args.get('status_id', type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
+    limit = request.args.get('limit', type=int)
+    compact = request.args.get('format') == 'compact'
+    
+    try:
+        cursor = decode_cursor(request.args.get('cursor'), [date, int])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    limit = max(1, min(limit or 100, 1000))
     
     # クエリビルダー
     query = MaintenanceSchedule.query
@@ -67,33 +109,93 @@ def list_maintenance_schedules():
             query = query.filter(MaintenanceSchedule.scheduled_date <= end_date)
         except ValueError:
             pass
+    if cursor:
+        query = query.filter(
+            tuple_(MaintenanceSchedule.scheduled_date, MaintenanceSchedule.id) < tuple_(*cursor)
+        )
+    
+    # compact では参照先を別途まとめて取得するため、通常表示のときだけ同時に読み込む
+    if not compact:
+        query = query.options(
+            joinedload(MaintenanceSchedule.vehicle),
+            joinedload(MaintenanceSchedule.maintenance_type),
+            joinedload(MaintenanceSchedule.status)
+        )
     
     # 整備予定の取得（日付の新しい順）
-    schedules = query.order_by(MaintenanceSchedule.scheduled_date.desc()).all()
+    query = query.order_by(MaintenanceSchedule.scheduled_date.desc(), MaintenanceSchedule.id.desc())
+    # 1件余分に読み、次ページの有無を判定する
+    schedules = query.limit(limit + 1).all()
+    has_next = len(schedules) > limit
+    schedules = schedules[:limit]
     
-    # レスポンスデータの構築
-    result = []
-    for schedule in schedules:
-        # 車両情報の取得
-        vehicle = schedule.vehicle
-        
-        schedule_data = {
+    if compact:
+        result = build_compact_schedules(schedules)
+    else:
+        result = [serialize_schedule(schedule) for schedule in schedules]
+    
+    if not compact:
+        result = {'schedules': result}
+    last = schedules[-1] if schedules else None
+    result['next_cursor'] = encode_cursor([last.scheduled_date, last.id]) if has_next and last else None
+    result['has_next'] = has_next
+    return jsonify(result)
+
+
+def serialize_schedule(schedule):
+    """点検予定を車両・点検種類・状態の情報付きで辞書に変換"""
+    vehicle = schedule.vehicle
+    
+    return {
+        'id': schedule.id,
+        'vehicle_id': schedule.vehicle_id,
+        'vehicle_info': {
+            'plate': vehicle.自動車登録番号および車両番号 if hasattr(vehicle, '自動車登録番号および車両番号') else None,
+            'number': vehicle.型式 if hasattr(vehicle, '型式') else None,
+            'manufacturer': vehicle.車名 if hasattr(vehicle, '車名') else None
+        },
+        'maintenance_type': {
+            'id': schedule.maintenance_type_id,
+            'name': schedule.maintenance_type.name
+        },
+        'status': {
+            'id': schedule.status_id,
+            'name': schedule.status.name,
+            'color_code': schedule.status.color_code
+        },
+        'scheduled_date': schedule.scheduled_date.isoformat() if schedule.scheduled_date else None,
+        'completion_date': schedule.completion_date.isoformat() if schedule.completion_date else None,
+        'technician': schedule.technician,
+        'technician_id': schedule.technician_id,
+        'location': schedule.location,
+        'cost': float(schedule.cost) if schedule.cost else None,
+        'notes': schedule.notes,
+        'created_at': schedule.created_at.isoformat(),
+        'updated_at': schedule.updated_at.isoformat()
+    }
+
+
+def build_compact_schedules(schedules):
+    """予定はIDのみで返し、参照される車両・点検種類・状態は種類ごとに1クエリで取得して辞書で返す"""
+    vehicle_ids = {schedule.vehicle_id for schedule in schedules}
+    type_ids = {schedule.maintenance_type_id for schedule in schedules}
+    status_ids = {schedule.status_id for schedule in schedules}
+    
+    vehicles = db.session.query(
+        Vehicles.id,
+        Vehicles.自動車登録番号および車両番号,
+        Vehicles.型式,
+        Vehicles.車名
+    ).filter(Vehicles.id.in_(vehicle_ids)).all() if vehicle_ids else []
+    types = [t for t in map(masters.get_maintenance_type_by_id, type_ids) if t]
+    statuses = [s for s in map(masters.get_maintenance_status_by_id, status_ids) if s]
+    
+    return {
+        'schedules': [{
             'id': schedule.id,
             'vehicle_id': schedule.vehicle_id,
-            'vehicle_info': {
-                'plate': vehicle.自動車登録番号および車両番号 if hasattr(vehicle, '自動車登録番号および車両番号') else None,
-                'number': vehicle.型式 if hasattr(vehicle, '型式') else None,
-                'manufacturer': vehicle.車名 if hasattr(vehicle, '車名') else None
-            },
-            'maintenance_type': {
-                'id': schedule.maintenance_type_id,
-                'name': schedule.maintenance_type.name
-            },
-            'status': {
-                'id': schedule.status_id,
-                'name': schedule.status.name,
-                'color_code': schedule.status.color_code
-            },
+            'maintenance_type_id': schedule.maintenance_type_id,
+            'status_id': schedule.status_id,
             'scheduled_date': schedule.scheduled_date.isoformat() if schedule.scheduled_date else None,
             'completion_date': schedule.completion_date.isoformat() if schedule.completion_date else None,
             'technician': schedule.technician,
@@ -103,10 +205,21 @@ def list_maintenance_schedules():
             'notes': schedule.notes,
             'created_at': schedule.created_at.isoformat(),
             'updated_at': schedule.updated_at.isoformat()
+        } for schedule in schedules],
+        'vehicles': {
+            str(v.id): {
+                'plate': v.自動車登録番号および車両番号,
+                'number': v.型式,
+                'manufacturer': v.車名
+            } for v in vehicles
+        },
+        'maintenance_types': {
+            str(t.id): {'name': t.name} for t in types
+        },
+        'statuses': {
+            str(s.id): {'name': s.name, 'color_code': s.color_code} for s in statuses
         }
-        result.append(schedule_data)
-    
-    return jsonify(result)
+    }
 
 # 改良版自動点検スケジュール生成
 @maintenance_bp.route('/generate-schedules/', methods=['POST'])
@@ -126,7 +239,7 @@ def generate_maintenance_schedules():
             end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
         
         # 必要なステータスと点検種類のIDを取得
-        tentative_status = MaintenanceStatus.query.filter_by(name='仮予定').first()
+        tentative_status = masters.get_maintenance_status('仮予定')
         if not tentative_status:
             # 仮予定がなければ作成
             tentative_status = MaintenanceStatus(
@@ -137,15 +250,18 @@ def generate_maintenance_schedules():
             db.session.add(tentative_status)
             db.session.commit()
         
-        inspection_type = MaintenanceType.query.filter_by(name='車検').first()
-        three_month_type = MaintenanceType.query.filter_by(name='3ヶ月点検').first()
+        inspection_type = masters.get_maintenance_type('車検')
+        three_month_type = masters.get_maintenance_type('3ヶ月点検')
         
         if not inspection_type or not three_month_type:
             return jsonify({'error': '点検種類が正しく設定されていません'}), 400
         
-        # PostgreSQL用のSQL実行（ストアドプロシージャ呼び出し）
+        # PostgreSQL用のSQL実行（ストアドプロシージャ呼び出し、マイグレーション f7c3a9e0d512 で作成）
         try:
-            result = db.session.execute(text("SELECT * FROM generate_maintenance_schedules()"))
+            result = db.session.execute(
+                text("SELECT * FROM generate_maintenance_schedules(:start_date, :end_date, :status_id)"),
+                {'start_date': start_date, 'end_date': end_date, 'status_id': tentative_status.id}
+            )
             row = result.fetchone()
             generated_count = row[0] if row else 0
             
@@ -157,7 +273,9 @@ def generate_maintenance_schedules():
             })
             
         except Exception as e:
-            # ストアドプロシージャがない場合はPythonロジックで実行
+            # ストアドプロシージャがない場合はPythonロジックで実行（失敗したトランザクションを破棄してから）
+            db.session.rollback()
+            current_app.logger.warning(f'generate_maintenance_schedules() の実行に失敗したためPythonロジックで生成します: {str(e)}')
             return generate_schedules_python_logic(
                 start_date, end_date, tentative_status, inspection_type, three_month_type
             )
@@ -169,68 +287,10 @@ def generate_maintenance_schedules():
         return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
 
 def generate_schedules_python_logic(start_date, end_date, tentative_status, inspection_type, three_month_type):
-    """Pythonロジックによる点検予定生成"""
-    generated_count = 0
-    today = datetime.now().date()
-    
-    # 全車両を取得
-    vehicles = Vehicles.query.filter(
-        Vehicles.有効期間の満了する日.isnot(None)
-    ).all()
-    
-    for vehicle in vehicles:
-        try:
-            # 有効期限の日付を変換（8桁数値 → DATE型）
-            expiry_date_str = str(vehicle.有効期間の満了する日)
-            if len(expiry_date_str) == 8:
-                year = int(expiry_date_str[:4])
-                month = int(expiry_date_str[4:6])
-                day = int(expiry_date_str[6:8])
-                expiry_date = datetime(year, month, day).date()
-                
-                # 現在日時より未来の期限のみ処理
-                if expiry_date > today and start_date <= expiry_date <= end_date:
-                    # 12ヶ月点検（車検）の予定生成
-                    if not MaintenanceSchedule.query.filter_by(
-                        vehicle_id=vehicle.id,
-                        maintenance_type_id=inspection_type.id,
-                        scheduled_date=expiry_date
-                    ).first():
-                        new_schedule = MaintenanceSchedule(
-                            vehicle_id=vehicle.id,
-                            maintenance_type_id=inspection_type.id,
-                            scheduled_date=expiry_date,
-                            status_id=tentative_status.id,
-                            notes='自動生成された車検予定'
-                        )
-                        db.session.add(new_schedule)
-                        generated_count += 1
-                    
-                    # 3ヶ月点検の予定生成（車検日から逆算して複数生成）
-                    for i in range(1, 5):  # 3ヶ月、6ヶ月、9ヶ月、12ヶ月前
-                        three_month_date = expiry_date - timedelta(days=90 * i)
-                        
-                        # 過去の日付または既存の予定がある場合はスキップ
-                        if (three_month_date > today and 
-                            start_date <= three_month_date <= end_date and
-                            not MaintenanceSchedule.query.filter_by(
-                                vehicle_id=vehicle.id,
-                                maintenance_type_id=three_month_type.id,
-                                scheduled_date=three_month_date
-                            ).first()):
-                            
-                            new_schedule = MaintenanceSchedule(
-                                vehicle_id=vehicle.id,
-                                maintenance_type_id=three_month_type.id,
-                                scheduled_date=three_month_date,
-                                status_id=tentative_status.id,
-                                notes='自動生成された3ヶ月点検予定'
-                            )
-                            db.session.add(new_schedule)
-                            generated_count += 1
-        
-        except (ValueError, TypeError):
-            continue  # 無効な日付の場合はスキップ
+    """Pythonロジックによる点検予定生成（候補をまとめて作成し、未登録分のみ一括登録）"""
+    generated_count = generate_expiry_schedules(
+        start_date, end_date, tentative_status.id, inspection_type.id, three_month_type.id
+    )
     
     db.session.commit()
     
@@ -239,98 +299,195 @@ def generate_schedules_python_logic(start_date, end_date, tentative_status, insp
         'count': generated_count
     })
 
-# 整備点検概要の取得（ダッシュボード用）- 仮予定対応版
-@maintenance_bp.route('/summary/', methods=['GET'])
-def get_maintenance_summary():
+# 点検周期（cycle_months）に基づく全点検種類の予定生成
+@maintenance_bp.route('/generate-recurring-schedules/', methods=['POST'])
+def generate_recurring_maintenance_schedules():
+    """周期が設定された有効な点検種類の予定を、車検有効期限を基準に暦月単位で生成
+
+    車検・3ヶ月点検は /generate-schedules/ と夜間ジョブが生成するため対象外。
+    """
+    data = request.json or {}
+    
     try:
         today = datetime.now().date()
-        month_start = datetime(today.year, today.month, 1).date()
-        month_end = (datetime(today.year, today.month + 1, 1) - timedelta(days=1)).date() if today.month < 12 else datetime(today.year, 12, 31).date()
-        
-        # ステータスIDの取得
-        status_map = {}
-        for status in MaintenanceStatus.query.all():
-            status_map[status.name] = status.id
-        
-        # 仮予定の件数
-        tentative_count = MaintenanceSchedule.query.filter(
-            MaintenanceSchedule.status_id == status_map.get('仮予定', 0)
-        ).count()
-        
-        # 今月の点検予定件数（確定予定のみ）
-        scheduled_count = MaintenanceSchedule.query.filter(
-            MaintenanceSchedule.scheduled_date.between(month_start, month_end),
-            MaintenanceSchedule.status_id == status_map.get('予定', 0)
-        ).count()
-        
-        # 今月の点検完了件数
-        completed_count = MaintenanceSchedule.query.filter(
-            MaintenanceSchedule.scheduled_date.between(month_start, month_end),
-            MaintenanceSchedule.status_id == status_map.get('完了', 0)
-        ).count()
-        
-        # 未実施の点検件数
-        overdue_count = MaintenanceSchedule.query.filter(
-            MaintenanceSchedule.scheduled_date < today,
-            or_(
-                MaintenanceSchedule.status_id == status_map.get('予定', 0),
-                MaintenanceSchedule.status_id == status_map.get('仮予定', 0)
-            ),
-            MaintenanceSchedule.completion_date.is_(None)
-        ).count()
-        
-        # 今後30日以内の点検予定
-        upcoming_schedules = MaintenanceSchedule.query.filter(
-            MaintenanceSchedule.scheduled_date.between(today, today + timedelta(days=30)),
-            or_(
-                MaintenanceSchedule.status_id == status_map.get('予定', 0),
-                MaintenanceSchedule.status_id == status_map.get('仮予定', 0)
+        start_date = today
+        end_date = today + timedelta(days=365)  # デフォルトは1年間
+        
+        if 'start_date' in data:
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+        if 'end_date' in data:
+            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        
+        if start_date > end_date:
+            return jsonify({'error': '開始日は終了日以前の日付を指定してください'}), 400
+        
+        tentative_status = masters.get_maintenance_status('仮予定')
+        if not tentative_status:
+            tentative_status = MaintenanceStatus(
+                name='仮予定', 
+                description='自動生成された仮の点検予定', 
+                color_code='#6c757d'
             )
-        ).order_by(MaintenanceSchedule.scheduled_date).limit(5).all()
+            db.session.add(tentative_status)
+            db.session.flush()
         
-        # 未実施の点検予定
-        overdue_schedules = MaintenanceSchedule.query.filter(
-            MaintenanceSchedule.scheduled_date < today,
-            or_(
-                MaintenanceSchedule.status_id == status_map.get('予定', 0),
-                MaintenanceSchedule.status_id == status_map.get('仮予定', 0)
-            ),
-            MaintenanceSchedule.completion_date.is_(None)
-        ).order_by(MaintenanceSchedule.scheduled_date).limit(5).all()
-        
-        # レスポンスデータの構築
-        result = {
-            'counts': {
-                'tentative': tentative_count,
-                'scheduled_this_month': scheduled_count,
-                'completed_this_month': completed_count,
-                'overdue': overdue_count
-            },
-            'upcoming_schedules': [{
-                'id': schedule.id,
-                'vehicle_id': schedule.vehicle_id,
-                'vehicle_plate': schedule.vehicle.自動車登録番号および車両番号 if hasattr(schedule.vehicle, '自動車登録番号および車両番号') else None,
-                'maintenance_type': schedule.maintenance_type.name,
-                'scheduled_date': schedule.scheduled_date.isoformat(),
-                'days_until': (schedule.scheduled_date - today).days,
-                'status': schedule.status.name
-            } for schedule in upcoming_schedules],
-            'overdue_schedules': [{
-                'id': schedule.id,
-                'vehicle_id': schedule.vehicle_id,
-                'vehicle_plate': schedule.vehicle.自動車登録番号および車両番号 if hasattr(schedule.vehicle, '自動車登録番号および車両番号') else None,
-                'maintenance_type': schedule.maintenance_type.name,
-                'scheduled_date': schedule.scheduled_date.isoformat(),
-                'days_overdue': (today - schedule.scheduled_date).days,
-                'status': schedule.status.name
-            } for schedule in overdue_schedules]
-        }
+        generated_count = generate_recurring_schedules(
+            start_date, end_date, tentative_status.id, type_ids=data.get('maintenance_type_ids')
+        )
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{generated_count}件の点検予定を生成しました',
+            'count': generated_count
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': f'日付形式が正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+
+# 整備士の受け持ち件数を考慮した予定日・担当者の平準化
+@maintenance_bp.route('/optimize-schedules/', methods=['POST'])
+def optimize_maintenance_schedules():
+    """期間内の未完了の予定を、期限までの数日間に整備士の受け持ち件数を超えないよう割り振る
+
+    apply が true の場合のみ反映し、それ以外は割り当て案だけを返す。
+    """
+    data = request.json or {}
+    config = current_app.config
+    
+    try:
+        today = datetime.now().date()
+        start_date = today
+        end_date = today + timedelta(days=90)  # デフォルトは四半期
+        
+        if 'start_date' in data:
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+        if 'end_date' in data:
+            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        
+        if start_date > end_date:
+            return jsonify({'error': '開始日は終了日以前の日付を指定してください'}), 400
         
+        window_days = int(data.get('window_days', config.get('MAINTENANCE_SCHEDULE_WINDOW_DAYS', 14)))
+        capacity = int(data.get('capacity', config.get('MAINTENANCE_TECHNICIAN_DAILY_CAPACITY', 2)))
+        if window_days < 0 or capacity < 1:
+            return jsonify({'error': 'window_days は0以上、capacity は1以上を指定してください'}), 400
+        
+        apply = bool(data.get('apply', False))
+        result = optimize_schedules(
+            start_date, end_date,
+            window_days=window_days,
+            capacity=capacity,
+            skip_weekends=bool(data.get('skip_weekends', True)),
+            apply=apply
+        )
+        
+        if apply:
+            db.session.commit()
+        
+        return jsonify(result)
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'パラメータが正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f'点検予定の平準化エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+
+# 整備点検概要の取得（ダッシュボード用）- 仮予定対応版
+@maintenance_bp.route('/summary/', methods=['GET'])
+def get_maintenance_summary():
+    try:
+        today = datetime.now().date()
+        result = summary_cache.get_or_load(
+            today,
+            lambda: build_maintenance_summary(today),
+            ttl_seconds=current_app.config.get('MAINTENANCE_SUMMARY_CACHE_SECONDS')
+        )
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': f'エラーが発生しました: {str(e)}'}), 500
 
+
+def build_maintenance_summary(today):
+    """ダッシュボード用の件数（1クエリ）と直近・未実施の予定一覧（各1クエリ）を作成"""
+    month_start = datetime(today.year, today.month, 1).date()
+    month_end = (datetime(today.year, today.month + 1, 1) - timedelta(days=1)).date() if today.month < 12 else datetime(today.year, 12, 31).date()
+    
+    open_status = MaintenanceStatus.name.in_(['予定', '仮予定'])
+    this_month = MaintenanceSchedule.scheduled_date.between(month_start, month_end)
+    # 定期ジョブで未実施に更新済みのものと、まだ更新されていない期限切れの予定・仮予定
+    overdue = or_(
+        MaintenanceStatus.name == '未実施',
+        and_(
+            MaintenanceSchedule.scheduled_date < today,
+            open_status,
+            MaintenanceSchedule.completion_date.is_(None)
+        )
+    )
+    
+    # 仮予定・今月の確定予定・今月の完了・未実施の件数を条件付き集計でまとめて取得
+    counts = db.session.query(
+        func.count().filter(MaintenanceStatus.name == '仮予定').label('tentative'),
+        func.count().filter(this_month, MaintenanceStatus.name == '予定').label('scheduled_this_month'),
+        func.count().filter(this_month, MaintenanceStatus.name == '完了').label('completed_this_month'),
+        func.count().filter(overdue).label('overdue')
+    ).select_from(MaintenanceSchedule)\
+     .join(MaintenanceStatus, MaintenanceStatus.id == MaintenanceSchedule.status_id)\
+     .one()
+    
+    def schedule_list(*conditions):
+        return MaintenanceSchedule.query\
+            .join(MaintenanceSchedule.status)\
+            .options(
+                contains_eager(MaintenanceSchedule.status),
+                joinedload(MaintenanceSchedule.vehicle),
+                joinedload(MaintenanceSchedule.maintenance_type)
+            ).filter(*conditions)\
+            .order_by(MaintenanceSchedule.scheduled_date, MaintenanceSchedule.id)\
+            .limit(5).all()
+    
+    # 今後30日以内の点検予定
+    upcoming_schedules = schedule_list(
+        MaintenanceSchedule.scheduled_date.between(today, today + timedelta(days=30)),
+        open_status
+    )
+    
+    # 未実施の点検予定
+    overdue_schedules = schedule_list(overdue)
+    
+    # レスポンスデータの構築
+    return {
+        'counts': {
+            'tentative': counts.tentative,
+            'scheduled_this_month': counts.scheduled_this_month,
+            'completed_this_month': counts.completed_this_month,
+            'overdue': counts.overdue
+        },
+        'upcoming_schedules': [{
+            'id': schedule.id,
+            'vehicle_id': schedule.vehicle_id,
+            'vehicle_plate': schedule.vehicle.自動車登録番号および車両番号 if schedule.vehicle else None,
+            'maintenance_type': schedule.maintenance_type.name,
+            'scheduled_date': schedule.scheduled_date.isoformat(),
+            'days_until': (schedule.scheduled_date - today).days,
+            'status': schedule.status.name
+        } for schedule in upcoming_schedules],
+        'overdue_schedules': [{
+            'id': schedule.id,
+            'vehicle_id': schedule.vehicle_id,
+            'vehicle_plate': schedule.vehicle.自動車登録番号および車両番号 if schedule.vehicle else None,
+            'maintenance_type': schedule.maintenance_type.name,
+            'scheduled_date': schedule.scheduled_date.isoformat(),
+            'days_overdue': (today - schedule.scheduled_date).days,
+            'status': schedule.status.name
+        } for schedule in overdue_schedules]
+    }
+
 # 点検予定の一括操作API
 @maintenance_bp.route('/schedules/bulk-update/', methods=['POST'])
 def bulk_update_schedules():
@@ -347,73 +504,75 @@ def bulk_update_schedules():
         return jsonify({'error': '更新対象の予定が選択されていません'}), 400
     
     try:
-        updated_count = 0
-        
-        # 操作の種類に応じて処理
+        schedule_ids = sorted({int(schedule_id) for schedule_id in schedule_ids})
+    except (TypeError, ValueError):
+        return jsonify({'error': '予定IDは整数で指定してください'}), 400
+    
+    try:
+        # 操作の種類に応じて更新内容を決め、1つのUPDATE文でまとめて更新する
         if operation == 'confirm':
             # 仮予定を確定予定に変更
-            scheduled_status = MaintenanceStatus.query.filter_by(name='予定').first()
+            scheduled_status = masters.get_maintenance_status('予定')
             if not scheduled_status:
                 return jsonify({'error': '確定状態が見つかりません'}), 404
             
-            updated_count = MaintenanceSchedule.query.filter(
-                MaintenanceSchedule.id.in_(schedule_ids)
-            ).update(
-                {'status_id': scheduled_status.id, 'updated_at': datetime.now()},
-                synchronize_session=False
-            )
+            values = {'status_id': scheduled_status.id}
             
         elif operation == 'complete':
             # 一括完了処理
-            completed_status = MaintenanceStatus.query.filter_by(name='完了').first()
+            completed_status = masters.get_maintenance_status('完了')
             if not completed_status:
                 return jsonify({'error': '完了状態が見つかりません'}), 404
             
             completion_date = data.get('completion_date', datetime.now().date().isoformat())
             completion_date = datetime.strptime(completion_date, '%Y-%m-%d').date()
             
-            updated_count = MaintenanceSchedule.query.filter(
-                MaintenanceSchedule.id.in_(schedule_ids)
-            ).update({
+            values = {
                 'status_id': completed_status.id,
-                'completion_date': completion_date,
-                'updated_at': datetime.now()
-            }, synchronize_session=False)
+                'completion_date': completion_date
+            }
             
         elif operation == 'postpone':
             # 一括延期処理
-            days_to_postpone = data.get('days', 7)  # デフォルト7日
+            try:
+                days_to_postpone = int(data.get('days', 7))  # デフォルト7日
+            except (TypeError, ValueError):
+                return jsonify({'error': '延期日数は整数で指定してください'}), 400
             
-            for schedule_id in schedule_ids:
-                schedule = MaintenanceSchedule.query.get(schedule_id)
-                if schedule:
-                    new_date = schedule.scheduled_date + timedelta(days=days_to_postpone)
-                    schedule.scheduled_date = new_date
-                    schedule.updated_at = datetime.now()
-                    updated_count += 1
+            values = {
+                'scheduled_date': MaintenanceSchedule.scheduled_date + literal(days_to_postpone, Integer)
+            }
                     
         elif operation == 'cancel':
-            # 一括キャンセル処理
-            cancelled_status = MaintenanceStatus.query.filter_by(name='キャンセル').first()
+            # 一括キャンセル処理（備考が空の場合もキャンセルの記録を残す）
+            cancelled_status = masters.get_maintenance_status('キャンセル')
             if not cancelled_status:
                 return jsonify({'error': 'キャンセル状態が見つかりません'}), 404
             
-            updated_count = MaintenanceSchedule.query.filter(
-                MaintenanceSchedule.id.in_(schedule_ids)
-            ).update({
+            values = {
                 'status_id': cancelled_status.id,
-                'updated_at': datetime.now(),
-                'notes': MaintenanceSchedule.notes + '\n一括キャンセル処理'
-            }, synchronize_session=False)
+                'notes': func.coalesce(MaintenanceSchedule.notes + '\n一括キャンセル処理', '一括キャンセル処理')
+            }
             
         else:
             return jsonify({'error': f'未対応の操作: {operation}'}), 400
         
+        values['updated_at'] = datetime.now()
+        
+        # id = ANY(:schedule_ids) で件数に関係なく1往復で更新し、更新した予定IDを返す
+        stmt = update(MaintenanceSchedule)\
+            .where(MaintenanceSchedule.id == any_(bindparam('schedule_ids', schedule_ids, type_=ARRAY(Integer))))\
+            .values(values)\
+            .returning(MaintenanceSchedule.id)\
+            .execution_options(synchronize_session=False)
+        updated_ids = sorted(db.session.execute(stmt).scalars().all())
+        
         db.session.commit()
         
         return jsonify({
-            'message': f'{updated_count}件の予定を更新しました',
-            'updated_count': updated_count,
+            'message': f'{len(updated_ids)}件の予定を更新しました',
+            'updated_count': len(updated_ids),
+            'updated_ids': updated_ids,
             'operation': operation
         })
         
@@ -426,39 +585,9 @@ def bulk_update_schedules():
 # 期限切れ予定の自動更新
 @maintenance_bp.route('/update-overdue-schedules/', methods=['POST'])
 def update_overdue_schedules():
-    """期限切れの予定を未実施状態に自動更新"""
+    """期限切れの予定を未実施状態に自動更新（定期ジョブ overdue_sweep と同じ処理）"""
     try:
-        today = datetime.now().date()
-        
-        # ステータスIDを取得
-        scheduled_status = MaintenanceStatus.query.filter_by(name='予定').first()
-        tentative_status = MaintenanceStatus.query.filter_by(name='仮予定').first()
-        overdue_status = MaintenanceStatus.query.filter_by(name='未実施').first()
-        
-        if not overdue_status:
-            # 未実施状態がない場合は作成
-            overdue_status = MaintenanceStatus(
-                name='未実施',
-                description='期限切れ未実施',
-                color_code='#dc3545'
-            )
-            db.session.add(overdue_status)
-            db.session.commit()
-        
-        # 期限切れの予定を未実施に更新
-        updated_count = MaintenanceSchedule.query.filter(
-            MaintenanceSchedule.scheduled_date < today,
-            or_(
-                MaintenanceSchedule.status_id == scheduled_status.id if scheduled_status else 0,
-                MaintenanceSchedule.status_id == tentative_status.id if tentative_status else 0
-            ),
-            MaintenanceSchedule.completion_date.is_(None)
-        ).update({
-            'status_id': overdue_status.id,
-            'updated_at': datetime.now()
-        }, synchronize_session=False)
-        
-        db.session.commit()
+        updated_count = sweep_overdue_schedules()
         
         return jsonify({
             'message': f'{updated_count}件の期限切れ予定を更新しました',
@@ -479,72 +608,61 @@ def get_expiry_alerts():
         today = datetime.now().date()
         target_date = today + timedelta(days=days)
         
-        # 車検有効期限が近づいている車両を抽出
+        # 車両ごとの次の車検予定（期限切れの車両は期限日以降、それ以外は今日以降で最も早いもの）
+        inspection_type_ids = select(MaintenanceType.id).where(MaintenanceType.name == '車検')
+        next_schedule = select(
+            MaintenanceSchedule.id,
+            MaintenanceSchedule.status_id
+        ).where(
+            MaintenanceSchedule.vehicle_id == Vehicles.id,
+            MaintenanceSchedule.maintenance_type_id.in_(inspection_type_ids),
+            MaintenanceSchedule.scheduled_date >= func.least(Vehicles.有効期限日, today)
+        ).order_by(
+            MaintenanceSchedule.scheduled_date,
+            MaintenanceSchedule.id
+        ).limit(1).lateral('next_schedule')
+
+        # 車検有効期限が近づいている車両・期限切れの車両と次の車検予定・状態を1クエリで取得
+        # （期限が近い順 = 期限切れの長い順 → 残り日数の少ない順）
+        rows = db.session.query(
+            Vehicles.id,
+            Vehicles.自動車登録番号および車両番号,
+            Vehicles.型式,
+            Vehicles.車名,
+            Vehicles.有効期限日,
+            next_schedule.c.id.label('schedule_id'),
+            MaintenanceStatus.name.label('schedule_status')
+        ).outerjoin(next_schedule, true())\
+         .outerjoin(MaintenanceStatus, MaintenanceStatus.id == next_schedule.c.status_id)\
+         .filter(
+            Vehicles.有効期限日.isnot(None),
+            Vehicles.有効期限日 <= target_date
+        ).order_by(Vehicles.有効期限日, Vehicles.id).all()
+
         alerts = []
-        vehicles = Vehicles.query.filter(
-            Vehicles.有効期間の満了する日.isnot(None)
-        ).all()
-        
-        for vehicle in vehicles:
-            if vehicle.有効期間の満了する日:
-                expiry_date_str = str(vehicle.有効期間の満了する日)
-                if len(expiry_date_str) == 8:
-                    try:
-                        year = int(expiry_date_str[:4])
-                        month = int(expiry_date_str[4:6])
-                        day = int(expiry_date_str[6:8])
-                        expiry_date = datetime(year, month, day).date()
-                        
-                        # 今日から指定日数以内に期限が来る車両
-                        if today <= expiry_date <= target_date:
-                            days_left = (expiry_date - today).days
-                            
-                            # 既に車検予定が登録されているかチェック
-                            existing_schedule = MaintenanceSchedule.query.filter(
-                                MaintenanceSchedule.vehicle_id == vehicle.id,
-                                MaintenanceSchedule.scheduled_date >= today,
-                                MaintenanceSchedule.maintenance_type.has(name='車検')
-                            ).first()
-                            
-                            alerts.append({
-                                'vehicle_id': vehicle.id,
-                                'plate': vehicle.自動車登録番号および車両番号 if hasattr(vehicle, '自動車登録番号および車両番号') else None,
-                                'number': vehicle.型式 if hasattr(vehicle, '型式') else None,
-                                'manufacturer': vehicle.車名 if hasattr(vehicle, '車名') else None,
-                                'expiry_date': expiry_date.isoformat(),
-                                'days_left': days_left,
-                                'has_schedule': existing_schedule is not None,
-                                'schedule_id': existing_schedule.id if existing_schedule else None,
-                                'schedule_status': existing_schedule.status.name if existing_schedule else None
-                            })
-                        
-                        # 既に期限切れの車両
-                        elif expiry_date < today:
-                            days_overdue = (today - expiry_date).days
-                            
-                            # 既に車検予定が登録されているかチェック
-                            existing_schedule = MaintenanceSchedule.query.filter(
-                                MaintenanceSchedule.vehicle_id == vehicle.id,
-                                MaintenanceSchedule.scheduled_date >= expiry_date,
-                                MaintenanceSchedule.maintenance_type.has(name='車検')
-                            ).first()
-                            
-                            alerts.append({
-                                'vehicle_id': vehicle.id,
-                                'plate': vehicle.自動車登録番号および車両番号 if hasattr(vehicle, '自動車登録番号および車両番号') else None,
-                                'number': vehicle.型式 if hasattr(vehicle, '型式') else None,
-                                'manufacturer': vehicle.車名 if hasattr(vehicle, '車名') else None,
-                                'expiry_date': expiry_date.isoformat(),
-                                'days_overdue': days_overdue,
-                                'has_schedule': existing_schedule is not None,
-                                'schedule_id': existing_schedule.id if existing_schedule else None,
-                                'schedule_status': existing_schedule.status.name if existing_schedule else None
-                            })
-                    except ValueError:
-                        pass
-        
-        # 期限が近い順にソート
-        alerts.sort(key=lambda x: x.get('days_left', float('inf')) if 'days_left' in x else -x.get('days_overdue', 0))
+        for row in rows:
+            expiry_date = row.有効期限日
+            alert = {
+                'vehicle_id': row.id,
+                'plate': row.自動車登録番号および車両番号,
+                'number': row.型式,
+                'manufacturer': row.車名,
+                'expiry_date': expiry_date.isoformat(),
+            }
+
+            if today <= expiry_date:
+                # 今日から指定日数以内に期限が来る車両
+                alert['days_left'] = (expiry_date - today).days
+            else:
+                # 既に期限切れの車両
+                alert['days_overdue'] = (today - expiry_date).days
+
+            alert.update({
+                'has_schedule': row.schedule_id is not None,
+                'schedule_id': row.schedule_id,
+                'schedule_status': row.schedule_status
+            })
+            alerts.append(alert)
         
         return jsonify(alerts)
         
@@ -557,17 +675,60 @@ def get_expiry_alerts():
 # 点検予定/実績詳細取得（改良版）
 @maintenance_bp.route('/schedules/<int:schedule_id>/', methods=['GET'])
 def get_maintenance_schedule(schedule_id):
-    # 整備予定の取得
-    schedule = MaintenanceSchedule.query.get_or_404(schedule_id)
+    """点検予定の詳細（点検項目・ファイル・担当者を含む）
+
+    予定・点検項目・ファイルの更新日時と件数（ファイルはサムネイルの作成日時も）と、
+    本体に含める車両・点検種類・状態・担当者の内容から ETag を作り、
+    If-None-Match が一致する場合は本体を読み込まずに 304 を返す。
+    """
+    # 変更検知用のバージョン（1クエリ。車両には更新日時がないため表示する列そのものを使う）
+    version = db.session.query(
+        MaintenanceSchedule.updated_at,
+        Vehicles.自動車登録番号および車両番号.label('plate'),
+        Vehicles.型式.label('model'),
+        Vehicles.車名.label('manufacturer'),
+        MaintenanceType.updated_at.label('type_updated_at'),
+        MaintenanceStatus.updated_at.label('status_updated_at'),
+        Employee.updated_at.label('technician_updated_at'),
+        select(func.concat(func.count(MaintenanceDetail.id), ':', func.max(MaintenanceDetail.updated_at)))
+            .where(MaintenanceDetail.maintenance_schedule_id == MaintenanceSchedule.id)
+            .correlate(MaintenanceSchedule).scalar_subquery().label('details'),
+        select(func.concat(
+                func.count(MaintenanceFile.id), ':', func.max(MaintenanceFile.id),
+                ':', func.max(MaintenanceFile.derivatives_generated_at)  # サムネイル作成後は別の版にする
+            ))
+            .where(MaintenanceFile.maintenance_schedule_id == MaintenanceSchedule.id)
+            .correlate(MaintenanceSchedule).scalar_subquery().label('files')
+    ).outerjoin(Vehicles, Vehicles.id == MaintenanceSchedule.vehicle_id)\
+     .outerjoin(MaintenanceType, MaintenanceType.id == MaintenanceSchedule.maintenance_type_id)\
+     .outerjoin(MaintenanceStatus, MaintenanceStatus.id == MaintenanceSchedule.status_id)\
+     .outerjoin(Employee, Employee.id == MaintenanceSchedule.technician_id)\
+     .filter(MaintenanceSchedule.id == schedule_id).first()
+    if version is None:
+        abort(404)
     
-    # 車両情報の取得
-    vehicle = schedule.vehicle
+    etag = hashlib.sha1('|'.join(str(value) for value in (schedule_id, *version)).encode('utf-8')).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
     
-    # 詳細情報の取得
-    details = MaintenanceDetail.query.filter_by(maintenance_schedule_id=schedule_id).all()
+    # 整備予定と車両・点検種類・状態・担当者を1文で、点検項目・ファイルを selectinload でまとめて取得
+    schedule = MaintenanceSchedule.query.options(
+        joinedload(MaintenanceSchedule.vehicle),
+        joinedload(MaintenanceSchedule.maintenance_type),
+        joinedload(MaintenanceSchedule.status),
+        joinedload(MaintenanceSchedule.technician_employee),
+        selectinload(MaintenanceSchedule.details),
+        selectinload(MaintenanceSchedule.files)
+    ).filter(MaintenanceSchedule.id == schedule_id).first()
+    if schedule is None:
+        abort(404)
     
-    # ファイル情報の取得
-    files = MaintenanceFile.query.filter_by(maintenance_schedule_id=schedule_id).all()
+    # 車両情報の取得
+    vehicle = schedule.vehicle
+    details = schedule.details
+    files = schedule.files
     
     # レスポンスデータの構築
     schedule_data = {
@@ -606,16 +767,7 @@ def get_maintenance_schedule(schedule_id):
             'parts_cost': float(detail.parts_cost) if detail.parts_cost else None,
             'notes': detail.notes
         } for detail in details],
-        'files': [{
-            'id': file.id,
-            'file_name': file.file_name,
-            'file_path': file.file_path,
-            'file_type': file.file_type,
-            'file_size': file.file_size,
-            'description': file.description,
-            'uploaded_by': file.uploaded_by,
-            'created_at': file.created_at.isoformat()
-        } for file in files]
+        'files': [serialize_file(file) for file in files]
     }
     
     # 担当者情報を追加
@@ -627,4 +779,247 @@ def get_maintenance_schedule(schedule_id):
             'department': schedule.technician_employee.department
         }
     
-    return jsonify(schedule_data)
\ No newline at end of file
+    response = jsonify(schedule_data)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# 点検種類のチェックリスト（テンプレート）
+@maintenance_bp.route('/types/<int:type_id>/checklist/', methods=['GET'])
+def get_checklist_template(type_id):
+    if not masters.get_maintenance_type_by_id(type_id):
+        abort(404)
+    return jsonify(list_checklist_template(type_id))
+
+@maintenance_bp.route('/types/<int:type_id>/checklist/', methods=['PUT'])
+def update_checklist_template(type_id):
+    """チェックリスト項目を送られた内容（items の順が表示順）に置き換える"""
+    if not masters.get_maintenance_type_by_id(type_id):
+        abort(404)
+    
+    data = request.json or {}
+    items = data.get('items')
+    if not isinstance(items, list):
+        return jsonify({'error': 'items を配列で指定してください'}), 400
+    
+    try:
+        result = replace_checklist_template(type_id, items)
+        db.session.commit()
+        return jsonify(result)
+        
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': f'パラメータが正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f'チェックリストの更新エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+
+# 点検予定のチェックリスト（テンプレート＋記録済みの結果）
+@maintenance_bp.route('/schedules/<int:schedule_id>/checklist/', methods=['GET'])
+def get_schedule_checklist(schedule_id):
+    schedule = db.session.get(MaintenanceSchedule, schedule_id)
+    if schedule is None:
+        abort(404)
+    
+    return jsonify({
+        'schedule_id': schedule_id,
+        'items': build_schedule_checklist(schedule),
+        'summary': checklist_summary(schedule_id)
+    })
+
+@maintenance_bp.route('/schedules/<int:schedule_id>/checklist/', methods=['PUT'])
+def save_schedule_checklist(schedule_id):
+    """点検結果を項目名単位でまとめて登録・更新し、更新後の集計を返す
+
+    送られなかった項目は変更しない。部品費用の月別集計はトリガーで更新される。
+    """
+    if db.session.get(MaintenanceSchedule, schedule_id) is None:
+        abort(404)
+    
+    data = request.json or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items を1件以上の配列で指定してください'}), 400
+    
+    try:
+        details = upsert_schedule_details(schedule_id, items)
+        summary = checklist_summary(schedule_id)
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(details)}件の点検結果を保存しました',
+            'updated_count': len(details),
+            'details': details,
+            'summary': summary
+        })
+        
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': f'パラメータが正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f'点検結果の一括保存エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+
+# 整備ファイル一覧（一覧表示にはサムネイルのURLを使う）
+@maintenance_bp.route('/schedules/<int:schedule_id>/files/', methods=['GET'])
+def list_schedule_files(schedule_id):
+    if db.session.get(MaintenanceSchedule, schedule_id) is None:
+        abort(404)
+    
+    files = MaintenanceFile.query.filter_by(maintenance_schedule_id=schedule_id)\
+        .order_by(MaintenanceFile.created_at, MaintenanceFile.id).all()
+    return jsonify([serialize_file(file) for file in files])
+
+# 整備ファイルのアップロード（同じ内容のファイルは保存先を共有）
+@maintenance_bp.route('/schedules/<int:schedule_id>/files/', methods=['POST'])
+def upload_maintenance_file(schedule_id):
+    if db.session.get(MaintenanceSchedule, schedule_id) is None:
+        abort(404)
+    
+    if 'file' not in request.files:
+        return jsonify({'error': 'ファイルが選択されていません'}), 400
+    upload = request.files['file']
+    if not upload.filename:
+        return jsonify({'error': 'ファイルが選択されていません'}), 400
+    
+    try:
+        maintenance_file, deduplicated = save_maintenance_file(
+            schedule_id, upload,
+            description=request.form.get('description'),
+            uploaded_by=request.form.get('uploaded_by')
+        )
+        db.session.commit()
+        
+        if maintenance_file.derivatives_generated_at is None:
+            start_derivative_generation([maintenance_file.id])
+        
+        return jsonify({
+            **serialize_file(maintenance_file),
+            'deduplicated': deduplicated
+        }), 201
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f'整備ファイルの登録エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'整備ファイルの保存エラー: {str(e)}')
+        return jsonify({'error': f'ファイルの保存に失敗しました: {str(e)}'}), 500
+
+@maintenance_bp.route('/schedules/<int:schedule_id>/files/<int:file_id>/', methods=['DELETE'])
+def delete_schedule_file(schedule_id, file_id):
+    maintenance_file = MaintenanceFile.query.filter_by(id=file_id, maintenance_schedule_id=schedule_id).first()
+    if maintenance_file is None:
+        abort(404)
+    
+    try:
+        unused_path = delete_maintenance_file(maintenance_file)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f'整備ファイルの削除エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+    
+    # 他の予定から参照されていなければ保存先からも削除
+    if unused_path:
+        remove_stored_file(unused_path)
+    
+    return jsonify({'message': 'ファイルを削除しました', 'removed_from_storage': bool(unused_path)})
+
+# ローカル保存時のファイル配信（Supabase の場合は公開URLを直接使う）
+@maintenance_bp.route('/files/<path:file_path>', methods=['GET'])
+def download_maintenance_file(file_path):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        abort(404)
+    
+    try:
+        full_path = storage.full_path(file_path)
+    except ValueError:
+        abort(404)
+    if not storage.exists(file_path):
+        abort(404)
+    
+    # 内容が変わらないパス（ハッシュ）なので長期間キャッシュさせる
+    response = send_file(full_path, conditional=True, max_age=IMMUTABLE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+def _cost_period(params):
+    """費用集計の期間（デフォルトは当月を含む直近12ヶ月）"""
+    today = datetime.now().date()
+    end_date = today
+    start_date = (today.replace(day=1) - timedelta(days=335)).replace(day=1)
+    
+    if params.get('start_date'):
+        start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
+    if params.get('end_date'):
+        end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date()
+    
+    if start_date > end_date:
+        raise ValueError('開始日は終了日以前の日付を指定してください')
+    return start_date, end_date
+
+# 車両・月別の費用一覧（整備・燃料・高速料金）
+@maintenance_bp.route('/costs/monthly/', methods=['GET'])
+def get_monthly_costs():
+    try:
+        start_date, end_date = _cost_period(request.args)
+        vehicle_id = request.args.get('vehicle_id', type=int)
+        category = request.args.get('category')
+        
+        if category and category not in VehicleMonthlyCost.CATEGORY_LABELS:
+            return jsonify({'error': f'category は {", ".join(VehicleMonthlyCost.CATEGORY_LABELS)} のいずれかを指定してください'}), 400
+        
+        return jsonify(monthly_costs(start_date, end_date, vehicle_id=vehicle_id, category=category))
+        
+    except ValueError as e:
+        return jsonify({'error': f'パラメータが正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        current_app.logger.error(f'月別費用の取得エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+
+# 車両ごとの総保有コスト（TCO）
+@maintenance_bp.route('/costs/tco/', methods=['GET'])
+def get_tco_report():
+    try:
+        start_date, end_date = _cost_period(request.args)
+        vehicle_id = request.args.get('vehicle_id', type=int)
+        
+        return jsonify(tco_report(start_date, end_date, vehicle_id=vehicle_id))
+        
+    except ValueError as e:
+        return jsonify({'error': f'パラメータが正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        current_app.logger.error(f'TCOの集計エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
+
+@maintenance_bp.route('/costs/refresh/', methods=['POST'])
+def refresh_costs():
+    """期間内の燃料費・高速料金の集計をやり直す（整備費用はトリガーで常に最新）"""
+    data = request.json or {}
+    
+    try:
+        start_date, end_date = _cost_period(data)
+        
+        fuel_count = refresh_fuel_costs(start_date, end_date)
+        etc_count = refresh_etc_costs(start_date, end_date)
+        
+        return jsonify({
+            'message': '費用集計を更新しました',
+            'fuel_rows': fuel_count,
+            'etc_rows': etc_count
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': f'パラメータが正しくありません: {str(e)}'}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f'費用集計の更新エラー: {str(e)}')
+        return jsonify({'error': f'データベースエラー: {str(e)}'}), 500
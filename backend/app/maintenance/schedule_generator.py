@@ -0,0 +1,124 @@
+# backend/app/maintenance/schedule_generator.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.vehicle.models import Vehicles
+from app.maintenance.models import MaintenanceSchedule
+
+# 車検有効期限から日数で予定を作る点検種類（build_expiry_candidates と generate_maintenance_schedules() が生成する）
+EXPIRY_TYPE_NAMES = ('車検', '3ヶ月点検')
+
+def load_vehicle_expiry_dates(*filters, expiry_after=None, expiry_from=None, expiry_to=None):
+    """車両ID と車検有効期限（日付）の一覧を1クエリで取得
+
+    有効期限は生成列 有効期限日（無効な日付は NULL）を使い、期間の絞り込みもSQLで行う。
+    """
+    query = db.session.query(Vehicles.id, Vehicles.有効期限日)\
+        .filter(Vehicles.有効期限日.isnot(None), *filters)
+
+    if expiry_after:
+        query = query.filter(Vehicles.有効期限日 > expiry_after)
+    if expiry_from:
+        query = query.filter(Vehicles.有効期限日 >= expiry_from)
+    if expiry_to:
+        query = query.filter(Vehicles.有効期限日 <= expiry_to)
+
+    return [(vehicle_id, expiry_date) for vehicle_id, expiry_date in query.all()]
+
+
+def build_expiry_candidates(vehicle_expiries, start_date, end_date, today,
+                            inspection_type_id, three_month_type_id, status_id):
+    """有効期限が期間内にある車両について、車検と3ヶ月点検（期限の90日×1〜4前）の候補を作成"""
+    candidates = []
+    for vehicle_id, expiry_date in vehicle_expiries:
+        # 現在日時より未来の期限のみ処理
+        if not (expiry_date > today and start_date <= expiry_date <= end_date):
+            continue
+
+        candidates.append({
+            'vehicle_id': vehicle_id,
+            'maintenance_type_id': inspection_type_id,
+            'scheduled_date': expiry_date,
+            'status_id': status_id,
+            'notes': '自動生成された車検予定',
+        })
+
+        for i in range(1, 5):  # 3ヶ月、6ヶ月、9ヶ月、12ヶ月前
+            three_month_date = expiry_date - timedelta(days=90 * i)
+            if three_month_date > today and start_date <= three_month_date <= end_date:
+                candidates.append({
+                    'vehicle_id': vehicle_id,
+                    'maintenance_type_id': three_month_type_id,
+                    'scheduled_date': three_month_date,
+                    'status_id': status_id,
+                    'notes': '自動生成された3ヶ月点検予定',
+                })
+
+    return candidates
+
+
+def insert_missing_schedules(candidates):
+    """候補のうち未登録の点検予定だけを一括登録し、登録件数を返す
+
+    候補の日付範囲・点検種類に該当する既存予定を1クエリで取得し、
+    (車両, 点検種類, 予定日) でアンチジョインしてから一括INSERTする。
+    コミットは呼び出し側で行う。
+    """
+    unique = {}
+    for candidate in candidates:
+        key = (candidate['vehicle_id'], candidate['maintenance_type_id'], candidate['scheduled_date'])
+        unique.setdefault(key, candidate)
+
+    if not unique:
+        return 0
+
+    type_ids = {key[1] for key in unique}
+    dates = [key[2] for key in unique]
+
+    existing = set(
+        db.session.query(
+            MaintenanceSchedule.vehicle_id,
+            MaintenanceSchedule.maintenance_type_id,
+            MaintenanceSchedule.scheduled_date
+        ).filter(
+            MaintenanceSchedule.maintenance_type_id.in_(type_ids),
+            MaintenanceSchedule.scheduled_date >= min(dates),
+            MaintenanceSchedule.scheduled_date <= max(dates)
+        ).all()
+    )
+
+    rows = [
+        {
+            'vehicle_id': candidate['vehicle_id'],
+            'maintenance_type_id': candidate['maintenance_type_id'],
+            'scheduled_date': candidate['scheduled_date'],
+            'status_id': candidate['status_id'],
+            'completion_date': candidate.get('completion_date'),
+            'notes': candidate.get('notes'),
+        }
+        for key, candidate in unique.items()
+        if key not in existing
+    ]
+
+    if rows:
+        db.session.execute(insert(MaintenanceSchedule), rows)
+
+    return len(rows)
+
+
+def generate_expiry_schedules(start_date, end_date, status_id, inspection_type_id, three_month_type_id, today=None):
+    """generate_maintenance_schedules()（PostgreSQL関数）と同じ予定をPythonで生成し、登録件数を返す
+
+    関数が使えない環境でのフォールバック。コミットは呼び出し側で行う。
+    """
+    today = today or datetime.now().date()
+    vehicle_expiries = load_vehicle_expiry_dates(
+        expiry_after=today, expiry_from=start_date, expiry_to=end_date
+    )
+    candidates = build_expiry_candidates(
+        vehicle_expiries, start_date, end_date, today,
+        inspection_type_id, three_month_type_id, status_id
+    )
+    return insert_missing_schedules(candidates)
@@ -0,0 +1,84 @@
+# backend/app/maintenance/tasks.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import text, update
+
+from flask import current_app
+
+from app.extensions import db
+from app.maintenance.models import MaintenanceStatus, MaintenanceSchedule
+from app.maintenance import masters
+from app.maintenance.schedule_generator import generate_expiry_schedules
+
+
+def get_or_create_status(name, description, color_code):
+    """整備状態をマスタキャッシュから取得し、なければ作成（コミットは呼び出し側で行う）"""
+    status = masters.get_maintenance_status(name)
+    if not status:
+        status = MaintenanceStatus(name=name, description=description, color_code=color_code)
+        db.session.add(status)
+        db.session.flush()
+    return status
+
+
+def sweep_overdue_schedules(today=None):
+    """予定日を過ぎても完了していない予定・仮予定を未実施に更新し、更新件数を返す（UPDATE 1文）"""
+    today = today or datetime.now().date()
+
+    overdue_status = get_or_create_status('未実施', '期限切れ未実施', '#dc3545')
+    open_status_ids = [
+        status.id for status in (masters.get_maintenance_status('予定'), masters.get_maintenance_status('仮予定'))
+        if status
+    ]
+    if not open_status_ids:
+        db.session.commit()
+        return 0
+
+    result = db.session.execute(
+        update(MaintenanceSchedule)
+        .where(
+            MaintenanceSchedule.scheduled_date < today,
+            MaintenanceSchedule.status_id.in_(open_status_ids),
+            MaintenanceSchedule.completion_date.is_(None)
+        )
+        .values(status_id=overdue_status.id, updated_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def regenerate_tentative_schedules(today=None, days=365):
+    """車検有効期限から今後 days 日分の車検・3ヶ月点検の仮予定を生成し、登録件数を返す
+
+    generate_maintenance_schedules()（マイグレーション f7c3a9e0d512）を1回呼び出す。
+    関数がない環境ではPythonロジックで生成する。
+    """
+    today = today or datetime.now().date()
+    end_date = today + timedelta(days=days)
+
+    tentative_status = get_or_create_status('仮予定', '自動生成された仮の点検予定', '#6c757d')
+    db.session.commit()
+
+    try:
+        generated_count = db.session.execute(
+            text("SELECT * FROM generate_maintenance_schedules(:start_date, :end_date, :status_id)"),
+            {'start_date': today, 'end_date': end_date, 'status_id': tentative_status.id}
+        ).scalar() or 0
+        db.session.commit()
+        return generated_count
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'generate_maintenance_schedules() の実行に失敗したためPythonロジックで生成します: {str(e)}')
+
+    inspection_type = masters.get_maintenance_type('車検')
+    three_month_type = masters.get_maintenance_type('3ヶ月点検')
+    if not inspection_type or not three_month_type:
+        current_app.logger.warning('車検・3ヶ月点検の点検種類がないため仮予定を生成できません')
+        return 0
+
+    generated_count = generate_expiry_schedules(
+        today, end_date, tentative_status.id, inspection_type.id, three_month_type.id, today=today
+    )
+    db.session.commit()
+    return generated_count
@@ -0,0 +1,53 @@
+# app/utils/pagination.py
+
+import base64
+import json
+from datetime import date, time, datetime
+
+
+def encode_cursor(values):
+    """カーソル（並び順のキー値のリスト）をURLに載せられる文字列に変換"""
+    payload = [_encode_value(value) for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, types):
+    """encode_cursor で作成した文字列をキー値のリストに戻す
+
+    types: 各キーの型（date / time / datetime / int / str）
+    不正なカーソルの場合は ValueError
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError('カーソルの形式が正しくありません')
+
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError('カーソルの形式が正しくありません')
+
+    return [_decode_value(value, value_type) for value, value_type in zip(payload, types)]
+
+
+def _encode_value(value):
+    if isinstance(value, (date, time, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(value, value_type):
+    if value is None:
+        return None
+    try:
+        if value_type is datetime:
+            return datetime.fromisoformat(value)
+        if value_type is date:
+            return date.fromisoformat(value)
+        if value_type is time:
+            return time.fromisoformat(value)
+        return value_type(value)
+    except (TypeError, ValueError):
+        raise ValueError('カーソルの形式が正しくありません')
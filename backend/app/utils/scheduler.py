@@ -0,0 +1,95 @@
+# app/utils/scheduler.py
+
+import time as time_module
+from datetime import datetime, timedelta
+
+from app.extensions import db
+
+
+class Job:
+    """定期実行するジョブ（一定間隔 interval または毎日 at の時刻）"""
+
+    def __init__(self, name, func, interval=None, at=None):
+        if (interval is None) == (at is None):
+            raise ValueError('interval と at のどちらか一方を指定してください')
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.at = at
+        self.next_run = None
+        self.last_run = None
+        self.last_result = None
+        self.last_error = None
+
+    def schedule_next(self, now):
+        if self.interval is not None:
+            self.next_run = now + self.interval
+        else:
+            next_run = datetime.combine(now.date(), self.at)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            self.next_run = next_run
+
+
+class JobScheduler:
+    """プロセス内の簡易ジョブスケジューラ
+
+    Webアプリとは別のワーカープロセス（run_scheduler.py）で run_forever() を実行する。
+    各ジョブはアプリケーションコンテキスト内で実行し、失敗してもロールバックして次のジョブを続ける。
+    run_pending(now) / run_job(name) は時刻を指定して1回だけ実行できるため、手元での確認にも使える。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.jobs = {}
+
+    def every(self, name, interval, func):
+        """interval（timedelta）ごとに実行するジョブを登録（起動直後に1回実行する）"""
+        self.jobs[name] = Job(name, func, interval=interval)
+        return self.jobs[name]
+
+    def daily(self, name, at, func):
+        """毎日 at（time）に実行するジョブを登録"""
+        job = Job(name, func, at=at)
+        job.schedule_next(datetime.now())
+        self.jobs[name] = job
+        return job
+
+    def run_job(self, name, now=None):
+        """ジョブを今すぐ実行し、結果を返す（失敗した場合は None）"""
+        job = self.jobs[name]
+        now = now or datetime.now()
+        with self.app.app_context():
+            started = time_module.monotonic()
+            try:
+                job.last_result = job.func()
+                job.last_error = None
+                self.app.logger.info(
+                    f'ジョブ {name} 完了（{time_module.monotonic() - started:.1f}秒）: {job.last_result}'
+                )
+            except Exception as e:
+                db.session.rollback()
+                job.last_result = None
+                job.last_error = str(e)
+                self.app.logger.error(f'ジョブ {name} エラー: {str(e)}')
+            finally:
+                db.session.remove()
+        job.last_run = now
+        job.schedule_next(now)
+        return job.last_result
+
+    def run_pending(self, now=None):
+        """実行時刻を過ぎたジョブをすべて実行し、実行したジョブ名の一覧を返す"""
+        now = now or datetime.now()
+        executed = []
+        for job in self.jobs.values():
+            if job.next_run is None or job.next_run <= now:
+                self.run_job(job.name, now)
+                executed.append(job.name)
+        return executed
+
+    def run_forever(self, poll_seconds=30):
+        self.app.logger.info(f'ジョブスケジューラを開始します: {", ".join(self.jobs)}')
+        while True:
+            self.run_pending()
+            time_module.sleep(poll_seconds)
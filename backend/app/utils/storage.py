@@ -0,0 +1,180 @@
+# app/utils/storage.py
+"""整備ファイルの保存先
+
+STORAGE_BACKEND で Supabase Storage（'supabase'）とローカルディスク（'local'）を切り替える。
+バックエンドはプロセス内で1つだけ作成して使い回す（Supabase クライアントの接続も再利用される）。
+ファイルは内容の SHA-256 をパスにして保存するため、同じ内容は1度だけアップロードされる。
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from flask import current_app
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1MB
+IMMUTABLE_MAX_AGE = 31536000       # 内容の変わらないファイルのキャッシュ秒数（1年）
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class LocalStorage:
+    """ローカルディスクに保存（オフライン環境・テスト用）"""
+
+    def __init__(self, root, base_url='/api/maintenance/files'):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+
+    def full_path(self, path):
+        full_path = os.path.abspath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, full_path]) != self.root:
+            raise ValueError(f'保存先の外を指すパスです: {path}')
+        return full_path
+
+    def exists(self, path):
+        return os.path.isfile(self.full_path(path))
+
+    def save(self, path, source_path, content_type=None):
+        """一時ファイルからコピー（書き込み途中のファイルが見えないよう、書き終えてから置き換える）"""
+        full_path = self.full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(source_path, 'rb') as src:
+                shutil.copyfileobj(src, dst, DEFAULT_CHUNK_SIZE)
+            os.replace(tmp_path, full_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @contextmanager
+    def fetch(self, path):
+        """保存済みファイルをローカルのパスとして使う（ローカル保存ではそのままのパス）"""
+        yield self.full_path(path)
+
+    def delete(self, path):
+        full_path = self.full_path(path)
+        if os.path.isfile(full_path):
+            os.remove(full_path)
+
+    def url(self, path):
+        return f'{self.base_url}/{path}'
+
+
+class SupabaseStorage:
+    """Supabase Storage に保存（クライアントは初回利用時に1度だけ作成）"""
+
+    def __init__(self, url, key, bucket):
+        if not url or not key:
+            raise ValueError("Supabase URLまたはキーが設定されていません。環境変数を確認してください。")
+        self.url_base = url
+        self.key = key
+        self.bucket = bucket
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(self.url_base, self.key)
+        return self._client
+
+    def _bucket(self):
+        return self.client.storage.from_(self.bucket)
+
+    def save(self, path, source_path, content_type=None):
+        """ファイルパスを渡してアップロード（クライアント側でファイルから読みながら送信される）
+
+        パスは内容のハッシュで決まり同じパスの内容は変わらないため、長期間キャッシュさせる。
+        """
+        options = {'upsert': 'true', 'cache-control': str(IMMUTABLE_MAX_AGE)}
+        if content_type:
+            options['content-type'] = content_type
+        return self._bucket().upload(path, source_path, options)
+
+    @contextmanager
+    def fetch(self, path):
+        """保存済みファイルを一時ファイルにダウンロードしてパスとして使う"""
+        fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(path)[1])
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(self._bucket().download(path))
+            yield tmp_path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def delete(self, path):
+        return self._bucket().remove([path])
+
+    def url(self, path):
+        return self._bucket().get_public_url(path)
+
+
+def _pooled(key, factory):
+    storage = _backends.get(key)
+    if storage is None:
+        with _backends_lock:
+            storage = _backends.get(key)
+            if storage is None:
+                storage = _backends[key] = factory()
+    return storage
+
+
+def get_supabase_storage():
+    config = current_app.config
+    key = ('supabase', config.get('SUPABASE_URL'), config.get('SUPABASE_KEY'), config.get('SUPABASE_STORAGE_BUCKET'))
+    return _pooled(key, lambda: SupabaseStorage(*key[1:]))
+
+
+def get_storage():
+    """設定に応じた保存先を返す（同じ設定ならプロセス内で同じインスタンス）"""
+    config = current_app.config
+    backend = config.get('STORAGE_BACKEND') or ('supabase' if config.get('SUPABASE_URL') else 'local')
+
+    if backend == 'supabase':
+        return get_supabase_storage()
+    if backend == 'local':
+        root = config.get('STORAGE_LOCAL_ROOT')
+        return _pooled(('local', root), lambda: LocalStorage(root))
+    raise ValueError(f'STORAGE_BACKEND が正しくありません: {backend}')
+
+
+@contextmanager
+def spool_upload(stream, chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=None):
+    """アップロードされたストリームを一時ファイルに書き出しながら SHA-256 とサイズを求める
+
+    ファイル全体をメモリに載せないよう chunk_size ごとに読み、max_bytes を超えたら ValueError。
+    yield するのは (一時ファイルのパス, SHA-256の16進, バイト数)。
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise ValueError(f'ファイルサイズが上限（{max_bytes // (1024 * 1024)}MB）を超えています')
+        yield tmp_path, digest.hexdigest(), size
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def content_path(content_hash, ext='', prefix='maintenance'):
+    """内容のハッシュから保存パスを作る（例: maintenance/ab/cd/abcd...ef.pdf）"""
+    return f'{prefix}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{ext}'
@@ -1,46 +1,30 @@
 # app/utils/supabase.py
+# 既存の呼び出し向けの関数。クライアントは app.utils.storage でプロセス内に1つだけ作成して使い回す
 
-import os
-from supabase import create_client
-from flask import current_app
+from app.utils.storage import get_supabase_storage as _get_storage
 
 def get_supabase_client():
-    """Supabaseクライアントを取得"""
-    url = current_app.config['SUPABASE_URL']
-    key = current_app.config['SUPABASE_KEY']
-    
-    if not url or not key:
-        raise ValueError("Supabase URLまたはキーが設定されていません。環境変数を確認してください。")
-    
-    return create_client(url, key)
+    """Supabaseクライアントを取得（プロセス内で共有）"""
+    return _get_storage().client
 
 def upload_to_supabase(file_data, file_path, content_type):
     """ファイルをSupabase Storageにアップロード"""
-    supabase = get_supabase_client()
-    bucket = current_app.config['SUPABASE_STORAGE_BUCKET']
+    storage = _get_storage()
     
     # ファイルをアップロード
-    res = supabase.storage.from_(bucket).upload(
+    storage.client.storage.from_(storage.bucket).upload(
         file_path,
         file_data,
         {"content-type": content_type}
     )
     
     # 公開URLを取得
-    file_url = supabase.storage.from_(bucket).get_public_url(file_path)
-    
-    return file_url
+    return storage.url(file_path)
 
 def delete_from_supabase(file_path):
     """Supabase Storageからファイルを削除"""
-    supabase = get_supabase_client()
-    bucket = current_app.config['SUPABASE_STORAGE_BUCKET']
-    
-    return supabase.storage.from_(bucket).remove(file_path)
+    return _get_storage().delete(file_path)
 
 def get_file_url(file_path):
     """ファイルの公開URLを取得"""
-    supabase = get_supabase_client()
-    bucket = current_app.config['SUPABASE_STORAGE_BUCKET']
-    
-    return supabase.storage.from_(bucket).get_public_url(file_path)
\ No newline at end of file
+    return _get_storage().url(file_path)
@@ -1,6 +1,6 @@
 from app.extensions import db  
 from typing import Optional
-from sqlalchemy import BigInteger, DateTime, Identity, Integer, PrimaryKeyConstraint, SmallInteger, String, text
+from sqlalchemy import BigInteger, Computed, Date, DateTime, Identity, Index, Integer, PrimaryKeyConstraint, SmallInteger, String, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 import datetime
 
@@ -8,6 +8,7 @@ class Vehicles(db.Model):
     __tablename__ = 'vehicles'
     __table_args__ = (
         PrimaryKeyConstraint('id', name='vehicles_pkey1'),
+        Index('idx_vehicles_expiry_date', '有効期限日'),
     )
 
     id: Mapped[int] = mapped_column(BigInteger, Identity(start=1, increment=1, minvalue=1, maxvalue=9223372036854775807, cycle=False, cache=1), primary_key=True)
@@ -22,6 +23,8 @@ class Vehicles(db.Model):
     車台番号打刻位置: Mapped[Optional[int]] = mapped_column(Integer)
     型式指定番号_種別区分番号: Mapped[Optional[int]] = mapped_column('型式指定番号・種別区分番号', BigInteger)
     有効期間の満了する日: Mapped[Optional[int]] = mapped_column(BigInteger)
+    # 有効期間の満了する日（YYYYMMDD）を日付に変換した生成列（期限の範囲検索用）
+    有効期限日: Mapped[Optional[datetime.date]] = mapped_column(Date, Computed('maintenance_parse_expiry("有効期間の満了する日")', persisted=True))
     初年度登録年月: Mapped[Optional[str]] = mapped_column(String)
     型式: Mapped[Optional[str]] = mapped_column(String)
     軸重_前前_: Mapped[Optional[str]] = mapped_column('軸重（前前）', String)
@@ -38,4 +41,9 @@ class Vehicles(db.Model):
     保安基準適用年月日: Mapped[Optional[int]] = mapped_column(BigInteger)
     燃料の種類コード: Mapped[Optional[int]] = mapped_column(SmallInteger)
     ステータス: Mapped[Optional[str]] = mapped_column(String)
-    車名:Mapped[Optional[str]] = mapped_column(String)
\ No newline at end of file
+    車名:Mapped[Optional[str]] = mapped_column(String)
+
+    # リレーションシップ（運転日報）
+    driving_logs = db.relationship('DrivingLog', back_populates='vehicle')
+    fueling_records = db.relationship('FuelingRecord', back_populates='vehicle')
+    car_wash_records = db.relationship('CarWashRecord', back_populates='vehicle')
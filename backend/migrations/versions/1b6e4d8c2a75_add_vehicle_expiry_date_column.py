@@ -0,0 +1,121 @@
+"""add vehicle expiry date column
+
+Revision ID: 1b6e4d8c2a75
+Revises: f7c3a9e0d512
+Create Date: 2025-07-11 09:47:31.275560
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b6e4d8c2a75'
+down_revision = 'f7c3a9e0d512'
+branch_labels = None
+depends_on = None
+
+
+# 有効期限日（生成列）を使うように generate_maintenance_schedules() を置き換え
+GENERATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION generate_maintenance_schedules(
+    p_start_date DATE DEFAULT CURRENT_DATE,
+    p_end_date DATE DEFAULT CURRENT_DATE + 365,
+    p_status_id INTEGER DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_status_id INTEGER := p_status_id;
+    v_inspection_type_id INTEGER;
+    v_three_month_type_id INTEGER;
+    v_count INTEGER;
+BEGIN
+    IF v_status_id IS NULL THEN
+        SELECT id INTO v_status_id FROM maintenance_statuses WHERE name = '仮予定' ORDER BY id LIMIT 1;
+    END IF;
+    SELECT id INTO v_inspection_type_id FROM maintenance_types WHERE name = '車検' ORDER BY id LIMIT 1;
+    SELECT id INTO v_three_month_type_id FROM maintenance_types WHERE name = '3ヶ月点検' ORDER BY id LIMIT 1;
+
+    IF v_status_id IS NULL OR v_inspection_type_id IS NULL OR v_three_month_type_id IS NULL THEN
+        RAISE EXCEPTION '点検種類または状態が正しく設定されていません';
+    END IF;
+
+    WITH target_vehicles AS (
+        SELECT v.id AS vehicle_id, v."有効期限日" AS expiry_date
+        FROM vehicles v
+        WHERE v."有効期限日" > CURRENT_DATE
+          AND v."有効期限日" BETWEEN p_start_date AND p_end_date
+    ),
+    candidates AS (
+        SELECT vehicle_id,
+               v_inspection_type_id AS maintenance_type_id,
+               expiry_date AS scheduled_date,
+               '自動生成された車検予定'::TEXT AS notes
+        FROM target_vehicles
+        UNION ALL
+        SELECT t.vehicle_id,
+               v_three_month_type_id,
+               t.expiry_date - 90 * i,
+               '自動生成された3ヶ月点検予定'::TEXT
+        FROM target_vehicles t
+        CROSS JOIN generate_series(1, 4) AS i
+        WHERE t.expiry_date - 90 * i > CURRENT_DATE
+          AND t.expiry_date - 90 * i BETWEEN p_start_date AND p_end_date
+    )
+    INSERT INTO maintenance_schedules
+        (vehicle_id, maintenance_type_id, scheduled_date, status_id, notes, created_at, updated_at)
+    SELECT c.vehicle_id, c.maintenance_type_id, c.scheduled_date, v_status_id, c.notes, now(), now()
+    FROM candidates c
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM maintenance_schedules s
+        WHERE s.vehicle_id = c.vehicle_id
+          AND s.maintenance_type_id = c.maintenance_type_id
+          AND s.scheduled_date = c.scheduled_date
+    );
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+"""
+
+# 生成列を使わない版（f7c3a9e0d512 と同じ）
+PREVIOUS_GENERATE_FUNCTION = GENERATE_FUNCTION.replace(
+    """    WITH target_vehicles AS (
+        SELECT v.id AS vehicle_id, v."有効期限日" AS expiry_date
+        FROM vehicles v
+        WHERE v."有効期限日" > CURRENT_DATE
+          AND v."有効期限日" BETWEEN p_start_date AND p_end_date
+    ),""",
+    """    WITH target_vehicles AS (
+        SELECT vehicle_id, expiry_date
+        FROM (
+            SELECT v.id AS vehicle_id, maintenance_parse_expiry(v."有効期間の満了する日") AS expiry_date
+            FROM vehicles v
+        ) vehicle_expiry
+        WHERE expiry_date > CURRENT_DATE
+          AND expiry_date BETWEEN p_start_date AND p_end_date
+    ),"""
+)
+
+
+def upgrade():
+    # maintenance_parse_expiry() は IMMUTABLE のため生成列に使える（f7c3a9e0d512 で作成）
+    with op.batch_alter_table('vehicles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('有効期限日', sa.Date(),
+                                      sa.Computed('maintenance_parse_expiry("有効期間の満了する日")', persisted=True),
+                                      nullable=True))
+        batch_op.create_index('idx_vehicles_expiry_date', ['有効期限日'], unique=False)
+
+    op.execute(GENERATE_FUNCTION)
+
+
+def downgrade():
+    op.execute(PREVIOUS_GENERATE_FUNCTION)
+
+    with op.batch_alter_table('vehicles', schema=None) as batch_op:
+        batch_op.drop_index('idx_vehicles_expiry_date')
+        batch_op.drop_column('有効期限日')
@@ -0,0 +1,67 @@
+"""add vehicle odometers and mileage triggers
+
+Revision ID: 3d8f2b71c6e9
+Revises: 1b6e4d8c2a75
+Create Date: 2025-07-14 10:21:05.884120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8f2b71c6e9'
+down_revision = '1b6e4d8c2a75'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('maintenance_types', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('distance_interval_km', sa.Integer(), nullable=True, comment='点検間隔（走行距離km）'))
+
+    # 走行距離で管理する点検種類の初期値
+    op.execute("UPDATE maintenance_types SET distance_interval_km = 10000 WHERE name = 'オイル交換' AND distance_interval_km IS NULL")
+    op.execute("UPDATE maintenance_types SET distance_interval_km = 30000 WHERE name = 'タイヤ交換' AND distance_interval_km IS NULL")
+
+    op.create_table('vehicle_odometers',
+    sa.Column('vehicle_id', sa.Integer(), nullable=False, comment='車両ID'),
+    sa.Column('odometer', sa.Integer(), nullable=False, comment='走行距離（km）'),
+    sa.Column('reading_date', sa.Date(), nullable=False, comment='記録日'),
+    sa.Column('driving_log_id', sa.Integer(), nullable=True, comment='運転日報ID'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+    sa.ForeignKeyConstraint(['driving_log_id'], ['driving_logs.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('vehicle_id')
+    )
+
+    op.create_table('maintenance_mileage_triggers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vehicle_id', sa.Integer(), nullable=False, comment='車両ID'),
+    sa.Column('maintenance_type_id', sa.Integer(), nullable=False, comment='点検種類ID'),
+    sa.Column('next_due_odometer', sa.Integer(), nullable=False, comment='次回の走行距離（km）'),
+    sa.Column('last_triggered_odometer', sa.Integer(), nullable=True, comment='前回予定を作成した走行距離（km）'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+    sa.ForeignKeyConstraint(['maintenance_type_id'], ['maintenance_types.id'], ),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('vehicle_id', 'maintenance_type_id', name='uq_mileage_trigger_vehicle_type')
+    )
+
+    # 既存の運転日報から車両ごとの最新走行距離を登録（以降は日報の登録・更新時に差分で更新）
+    op.execute("""
+        INSERT INTO vehicle_odometers (vehicle_id, odometer, reading_date, driving_log_id, updated_at)
+        SELECT DISTINCT ON (vehicle_id) vehicle_id, end_mileage, date, id, now()
+        FROM driving_logs
+        WHERE end_mileage IS NOT NULL
+        ORDER BY vehicle_id, end_mileage DESC, date DESC, id DESC
+    """)
+
+
+def downgrade():
+    op.drop_table('maintenance_mileage_triggers')
+    op.drop_table('vehicle_odometers')
+
+    with op.batch_alter_table('maintenance_types', schema=None) as batch_op:
+        batch_op.drop_column('distance_interval_km')
@@ -0,0 +1,194 @@
+"""add vehicle monthly costs
+
+Revision ID: 5a9c0e3f7b12
+Revises: 3d8f2b71c6e9
+Create Date: 2025-07-15 14:03:52.190447
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9c0e3f7b12'
+down_revision = '3d8f2b71c6e9'
+branch_labels = None
+depends_on = None
+
+
+# 車両・月・点検種類の1行分の整備費用を集計し直す
+REFRESH_FUNCTION = """
+CREATE OR REPLACE FUNCTION refresh_vehicle_maintenance_cost(p_vehicle_id INTEGER, p_month DATE, p_type_id INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_vehicle_id IS NULL OR p_month IS NULL OR p_type_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    -- 同じ行を同時に集計し直しても一意制約違反にならないよう、既存の行は上書きする
+    INSERT INTO vehicle_monthly_costs
+        (vehicle_id, month, category, maintenance_type_id, amount, parts_amount, quantity, record_count, updated_at)
+    SELECT s.vehicle_id, p_month, 'maintenance', s.maintenance_type_id,
+           COALESCE(SUM(s.cost), 0), COALESCE(SUM(d.parts_cost), 0), NULL, COUNT(*), now()
+    FROM maintenance_schedules s
+    LEFT JOIN LATERAL (
+        SELECT SUM(md.parts_cost) AS parts_cost
+        FROM maintenance_details md
+        WHERE md.maintenance_schedule_id = s.id
+    ) d ON TRUE
+    WHERE s.vehicle_id = p_vehicle_id
+      AND s.maintenance_type_id = p_type_id
+      AND COALESCE(s.completion_date, s.scheduled_date) >= p_month
+      AND COALESCE(s.completion_date, s.scheduled_date) < (p_month + INTERVAL '1 month')::DATE
+      AND (s.cost IS NOT NULL OR d.parts_cost IS NOT NULL)
+    GROUP BY s.vehicle_id, s.maintenance_type_id
+    ON CONFLICT (vehicle_id, month, category, maintenance_type_id) DO UPDATE
+    SET amount = EXCLUDED.amount,
+        parts_amount = EXCLUDED.parts_amount,
+        quantity = EXCLUDED.quantity,
+        record_count = EXCLUDED.record_count,
+        updated_at = EXCLUDED.updated_at;
+
+    -- 集計対象がなくなった場合だけ行を削除する
+    IF NOT FOUND THEN
+        DELETE FROM vehicle_monthly_costs
+        WHERE vehicle_id = p_vehicle_id
+          AND month = p_month
+          AND category = 'maintenance'
+          AND maintenance_type_id = p_type_id;
+    END IF;
+END;
+$$;
+"""
+
+SCHEDULE_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION maintenance_schedules_cost_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_vehicle_maintenance_cost(
+            OLD.vehicle_id,
+            date_trunc('month', COALESCE(OLD.completion_date, OLD.scheduled_date))::DATE,
+            OLD.maintenance_type_id
+        );
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        -- 車両・点検種類・月が変わらない場合は上で集計済み
+        IF NEW.vehicle_id IS NOT DISTINCT FROM OLD.vehicle_id
+           AND NEW.maintenance_type_id IS NOT DISTINCT FROM OLD.maintenance_type_id
+           AND date_trunc('month', COALESCE(NEW.completion_date, NEW.scheduled_date))
+               IS NOT DISTINCT FROM date_trunc('month', COALESCE(OLD.completion_date, OLD.scheduled_date)) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_vehicle_maintenance_cost(
+            NEW.vehicle_id,
+            date_trunc('month', COALESCE(NEW.completion_date, NEW.scheduled_date))::DATE,
+            NEW.maintenance_type_id
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+DETAIL_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION maintenance_details_cost_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_old_schedule_id INTEGER;
+    v_new_schedule_id INTEGER;
+    v_schedule RECORD;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_old_schedule_id := OLD.maintenance_schedule_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_new_schedule_id := NEW.maintenance_schedule_id;
+    END IF;
+
+    FOR v_schedule IN
+        SELECT s.vehicle_id, s.maintenance_type_id,
+               date_trunc('month', COALESCE(s.completion_date, s.scheduled_date))::DATE AS month
+        FROM maintenance_schedules s
+        WHERE s.id IN (v_old_schedule_id, v_new_schedule_id)
+    LOOP
+        PERFORM refresh_vehicle_maintenance_cost(v_schedule.vehicle_id, v_schedule.month, v_schedule.maintenance_type_id);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+"""
+
+# 既存データの整備費用を一括集計
+BACKFILL = """
+INSERT INTO vehicle_monthly_costs
+    (vehicle_id, month, category, maintenance_type_id, amount, parts_amount, quantity, record_count, updated_at)
+SELECT s.vehicle_id,
+       date_trunc('month', COALESCE(s.completion_date, s.scheduled_date))::DATE,
+       'maintenance',
+       s.maintenance_type_id,
+       COALESCE(SUM(s.cost), 0), COALESCE(SUM(d.parts_cost), 0), NULL, COUNT(*), now()
+FROM maintenance_schedules s
+LEFT JOIN (
+    SELECT maintenance_schedule_id, SUM(parts_cost) AS parts_cost
+    FROM maintenance_details
+    GROUP BY maintenance_schedule_id
+) d ON d.maintenance_schedule_id = s.id
+WHERE s.cost IS NOT NULL OR d.parts_cost IS NOT NULL
+GROUP BY 1, 2, 4
+"""
+
+
+def upgrade():
+    op.create_table('vehicle_monthly_costs',
+    sa.Column('vehicle_id', sa.Integer(), nullable=False, comment='車両ID'),
+    sa.Column('month', sa.Date(), nullable=False, comment='月（1日）'),
+    sa.Column('category', sa.String(length=20), nullable=False, comment='費用区分'),
+    sa.Column('maintenance_type_id', sa.Integer(), nullable=False, comment='点検種類ID（整備以外は0）'),
+    sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False, comment='金額（整備は作業費用）'),
+    sa.Column('parts_amount', sa.Numeric(precision=14, scale=2), nullable=False, comment='部品費用'),
+    sa.Column('quantity', sa.Numeric(precision=12, scale=2), nullable=True, comment='数量（燃料はリットル）'),
+    sa.Column('record_count', sa.Integer(), nullable=False, comment='件数'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('vehicle_id', 'month', 'category', 'maintenance_type_id')
+    )
+    op.create_index('idx_vehicle_monthly_costs_month', 'vehicle_monthly_costs', ['month', 'category'], unique=False)
+    op.create_index('idx_maintenance_details_schedule', 'maintenance_details', ['maintenance_schedule_id'], unique=False)
+
+    op.execute(REFRESH_FUNCTION)
+    op.execute(SCHEDULE_TRIGGER_FUNCTION)
+    op.execute(DETAIL_TRIGGER_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER trg_maintenance_schedules_cost_rollup
+        AFTER INSERT OR DELETE OR UPDATE OF vehicle_id, maintenance_type_id, scheduled_date, completion_date, cost
+        ON maintenance_schedules
+        FOR EACH ROW EXECUTE FUNCTION maintenance_schedules_cost_rollup()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_maintenance_details_cost_rollup
+        AFTER INSERT OR DELETE OR UPDATE OF maintenance_schedule_id, parts_cost
+        ON maintenance_details
+        FOR EACH ROW EXECUTE FUNCTION maintenance_details_cost_rollup()
+    """)
+
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS trg_maintenance_details_cost_rollup ON maintenance_details')
+    op.execute('DROP TRIGGER IF EXISTS trg_maintenance_schedules_cost_rollup ON maintenance_schedules')
+    op.execute('DROP FUNCTION IF EXISTS maintenance_details_cost_rollup()')
+    op.execute('DROP FUNCTION IF EXISTS maintenance_schedules_cost_rollup()')
+    op.execute('DROP FUNCTION IF EXISTS refresh_vehicle_maintenance_cost(INTEGER, DATE, INTEGER)')
+    op.drop_index('idx_maintenance_details_schedule', table_name='maintenance_details')
+    op.drop_index('idx_vehicle_monthly_costs_month', table_name='vehicle_monthly_costs')
+    op.drop_table('vehicle_monthly_costs')
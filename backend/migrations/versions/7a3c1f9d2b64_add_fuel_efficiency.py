@@ -0,0 +1,134 @@
+"""add fuel efficiency
+
+Revision ID: 7a3c1f9d2b64
+Revises: d4de62e180d8
+Create Date: 2025-07-01 09:12:44.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c1f9d2b64'
+down_revision = 'd4de62e180d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # 運転日報関連（環境によっては手動で作成済みのため存在チェック）
+    if not inspector.has_table('delivery_destinations'):
+        op.create_table('delivery_destinations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False, comment='配送先名'),
+        sa.Column('address', sa.String(length=200), nullable=True, comment='住所'),
+        sa.Column('phone', sa.String(length=20), nullable=True, comment='電話番号'),
+        sa.Column('contact_person', sa.String(length=50), nullable=True, comment='担当者名'),
+        sa.Column('notes', sa.Text(), nullable=True, comment='備考'),
+        sa.Column('is_active', sa.Boolean(), nullable=True, comment='有効フラグ'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if not inspector.has_table('driving_logs'):
+        op.create_table('driving_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False, comment='勤務日'),
+        sa.Column('driver_id', sa.Integer(), nullable=False, comment='ドライバーID'),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False, comment='使用車両ID'),
+        sa.Column('start_time', sa.Time(), nullable=False, comment='勤務開始時刻'),
+        sa.Column('end_time', sa.Time(), nullable=False, comment='勤務終了時刻'),
+        sa.Column('start_mileage', sa.Integer(), nullable=False, comment='開始時走行距離'),
+        sa.Column('end_mileage', sa.Integer(), nullable=False, comment='終了時走行距離'),
+        sa.Column('destination_id', sa.Integer(), nullable=True, comment='配送先ID'),
+        sa.Column('destination_name', sa.String(length=100), nullable=True, comment='配送先名（手入力）'),
+        sa.Column('is_trainee', sa.Boolean(), nullable=True, comment='見習いフラグ'),
+        sa.Column('notes', sa.Text(), nullable=True, comment='備考'),
+        sa.Column('created_by', sa.Integer(), nullable=True, comment='登録者ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+        sa.ForeignKeyConstraint(['created_by'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['destination_id'], ['delivery_destinations.id'], ),
+        sa.ForeignKeyConstraint(['driver_id'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    driving_log_indexes = [index['name'] for index in inspector.get_indexes('driving_logs')] \
+        if inspector.has_table('driving_logs') else []
+    if 'idx_driving_logs_vehicle_date' not in driving_log_indexes:
+        op.create_index('idx_driving_logs_vehicle_date', 'driving_logs', ['vehicle_id', 'date'], unique=False)
+
+    if not inspector.has_table('fueling_records'):
+        op.create_table('fueling_records',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False, comment='給油日'),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False, comment='車両ID'),
+        sa.Column('driver_id', sa.Integer(), nullable=True, comment='ドライバーID'),
+        sa.Column('gas_station_name', sa.String(length=100), nullable=True, comment='ガソリンスタンド名'),
+        sa.Column('fuel_type', sa.String(length=20), nullable=True, comment='燃料種別'),
+        sa.Column('fuel_amount', sa.Numeric(precision=10, scale=2), nullable=True, comment='給油量（リットル）'),
+        sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=True, comment='単価'),
+        sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=True, comment='合計金額'),
+        sa.Column('mileage', sa.Integer(), nullable=True, comment='給油時走行距離'),
+        sa.Column('csv_source', sa.String(length=50), nullable=True, comment='CSVソース'),
+        sa.Column('imported_at', sa.DateTime(), nullable=True, comment='インポート日時'),
+        sa.Column('notes', sa.Text(), nullable=True, comment='備考'),
+        sa.Column('created_by', sa.Integer(), nullable=True, comment='登録者ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+        sa.ForeignKeyConstraint(['created_by'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['driver_id'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if not inspector.has_table('car_wash_records'):
+        op.create_table('car_wash_records',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False, comment='洗車日'),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False, comment='車両ID'),
+        sa.Column('driver_id', sa.Integer(), nullable=True, comment='ドライバーID'),
+        sa.Column('wash_type', sa.String(length=50), nullable=True, comment='洗車種別'),
+        sa.Column('facility_name', sa.String(length=100), nullable=True, comment='洗車施設名'),
+        sa.Column('cost', sa.Numeric(precision=10, scale=2), nullable=True, comment='費用'),
+        sa.Column('mileage', sa.Integer(), nullable=True, comment='洗車時走行距離'),
+        sa.Column('csv_source', sa.String(length=50), nullable=True, comment='CSVソース'),
+        sa.Column('imported_at', sa.DateTime(), nullable=True, comment='インポート日時'),
+        sa.Column('notes', sa.Text(), nullable=True, comment='備考'),
+        sa.Column('created_by', sa.Integer(), nullable=True, comment='登録者ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+        sa.ForeignKeyConstraint(['created_by'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['driver_id'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    # 燃費集計
+    op.create_table('fuel_efficiency_intervals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vehicle_id', sa.Integer(), nullable=False, comment='車両ID'),
+    sa.Column('start_date', sa.Date(), nullable=False, comment='前回給油日'),
+    sa.Column('end_date', sa.Date(), nullable=False, comment='給油日'),
+    sa.Column('distance_km', sa.Integer(), nullable=False, comment='走行距離（km）'),
+    sa.Column('liters', sa.Numeric(precision=10, scale=3), nullable=False, comment='給油量（リットル）'),
+    sa.Column('km_per_liter', sa.Numeric(precision=8, scale=3), nullable=True, comment='燃費（km/L）'),
+    sa.Column('log_count', sa.Integer(), nullable=True, comment='対象運転日報件数'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('vehicle_id', 'end_date', name='uq_fuel_efficiency_vehicle_end')
+    )
+    op.create_index('idx_fuel_efficiency_end_vehicle', 'fuel_efficiency_intervals', ['end_date', 'vehicle_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_fuel_efficiency_end_vehicle', table_name='fuel_efficiency_intervals')
+    op.drop_table('fuel_efficiency_intervals')
+    op.drop_index('idx_driving_logs_vehicle_date', table_name='driving_logs')
+    # 運転日報関連のテーブルは既存データ保護のため残す
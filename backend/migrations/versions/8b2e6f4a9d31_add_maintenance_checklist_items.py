@@ -0,0 +1,97 @@
+"""add maintenance checklist items and unique detail item per schedule
+
+Revision ID: 8b2e6f4a9d31
+Revises: 5a9c0e3f7b12
+Create Date: 2025-07-22 15:08:41.507316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e6f4a9d31'
+down_revision = '5a9c0e3f7b12'
+branch_labels = None
+depends_on = None
+
+# 初期チェックリスト（app.maintenance.models.DEFAULT_CHECKLISTS と同じ内容）
+BASIC_ITEMS = [
+    ('かじ取り装置', 'ハンドルの操作具合'),
+    ('制動装置', 'ブレーキペダルの遊び・踏みしろ'),
+    ('制動装置', '駐車ブレーキの引きしろ'),
+    ('走行装置', 'タイヤの空気圧・亀裂・損傷'),
+    ('走行装置', 'ホイールナットの緩み'),
+    ('エンジン', 'エンジンオイルの量・汚れ'),
+    ('エンジン', '冷却水の量'),
+    ('エンジン', 'ファンベルトの張り・損傷'),
+    ('電気装置', 'バッテリー液の量'),
+    ('電気装置', '灯火装置・方向指示器'),
+    ('その他', 'ワイパー・ウォッシャー液'),
+]
+INSPECTION_ITEMS = BASIC_ITEMS + [
+    ('制動装置', 'ブレーキパッド・ライニングの摩耗'),
+    ('走行装置', 'サスペンションの損傷'),
+    ('排気装置', '排気管・マフラーの損傷'),
+    ('その他', '下回りの油漏れ'),
+]
+
+
+def _seed(type_name, items):
+    values = ',\n'.join(
+        f"('{category}', '{item_name}', {index})"
+        for index, (category, item_name) in enumerate(items)
+    )
+    op.execute(f"""
+        INSERT INTO maintenance_checklist_items
+            (maintenance_type_id, item_name, category, sort_order, is_required, created_at, updated_at)
+        SELECT t.id, v.item_name, v.category, v.sort_order, true, now(), now()
+        FROM maintenance_types t
+        CROSS JOIN (VALUES {values}) AS v(category, item_name, sort_order)
+        WHERE t.name = '{type_name}'
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def upgrade():
+    op.create_table('maintenance_checklist_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('maintenance_type_id', sa.Integer(), nullable=False, comment='点検種類ID'),
+    sa.Column('item_name', sa.String(length=100), nullable=False, comment='点検項目名'),
+    sa.Column('category', sa.String(length=50), nullable=True, comment='区分'),
+    sa.Column('sort_order', sa.Integer(), nullable=False, comment='表示順'),
+    sa.Column('is_required', sa.Boolean(), nullable=True, comment='必須フラグ'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+    sa.ForeignKeyConstraint(['maintenance_type_id'], ['maintenance_types.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('maintenance_type_id', 'item_name', name='uq_checklist_item_type_name')
+    )
+
+    _seed('3ヶ月点検', BASIC_ITEMS)
+    _seed('車検', INSPECTION_ITEMS)
+
+    # 同じ予定に同名の項目が重複している場合、最新（IDが最大）以外は「項目名 (2)」のように名前を変えて残す
+    # （入力済みの点検結果・部品費用を失わないよう削除はしない）
+    op.execute("""
+        UPDATE maintenance_details d
+        SET item_name = left(d.item_name, 100 - length(' (' || dup.rn || ')')) || ' (' || dup.rn || ')'
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY maintenance_schedule_id, item_name ORDER BY id DESC
+            ) AS rn
+            FROM maintenance_details
+        ) dup
+        WHERE dup.id = d.id
+          AND dup.rn > 1
+    """)
+
+    with op.batch_alter_table('maintenance_details', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_maintenance_details_schedule_item', ['maintenance_schedule_id', 'item_name'])
+
+
+def downgrade():
+    with op.batch_alter_table('maintenance_details', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_maintenance_details_schedule_item', type_='unique')
+
+    op.drop_table('maintenance_checklist_items')
@@ -0,0 +1,45 @@
+"""add fuel anomalies
+
+Revision ID: 9e41b6d0c3a7
+Revises: 7a3c1f9d2b64
+Create Date: 2025-07-03 14:26:51.193402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e41b6d0c3a7'
+down_revision = '7a3c1f9d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fuel_anomalies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False, comment='データ提供元（enefle / eneos_wing / kitaseki）'),
+    sa.Column('record_id', sa.Integer(), nullable=False, comment='対象レコードID'),
+    sa.Column('anomaly_type', sa.String(length=30), nullable=False, comment='異常種別'),
+    sa.Column('vehicle_number', sa.String(length=20), nullable=True, comment='車番'),
+    sa.Column('fuel_date', sa.Date(), nullable=False, comment='給油日'),
+    sa.Column('measured_value', sa.Numeric(precision=12, scale=3), nullable=True, comment='検出値（給油量・単価・給油間隔時間）'),
+    sa.Column('reference_value', sa.Numeric(precision=12, scale=3), nullable=True, comment='基準値（タンク容量・単価中央値・判定時間）'),
+    sa.Column('expected_vehicle', sa.String(length=20), nullable=True, comment='カードに対応する車番'),
+    sa.Column('related_source', sa.String(length=20), nullable=True, comment='関連レコードの提供元'),
+    sa.Column('related_record_id', sa.Integer(), nullable=True, comment='関連レコードID'),
+    sa.Column('is_resolved', sa.Boolean(), nullable=False, server_default=sa.false(), comment='確認済みフラグ'),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True, comment='確認日時'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source', 'record_id', 'anomaly_type', name='uq_fuel_anomaly_record_type')
+    )
+    op.create_index('idx_fuel_anomaly_resolved_date', 'fuel_anomalies', ['is_resolved', 'fuel_date', 'id'], unique=False)
+    op.create_index('idx_fuel_anomaly_type_date', 'fuel_anomalies', ['anomaly_type', 'fuel_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_fuel_anomaly_type_date', table_name='fuel_anomalies')
+    op.drop_index('idx_fuel_anomaly_resolved_date', table_name='fuel_anomalies')
+    op.drop_table('fuel_anomalies')
@@ -0,0 +1,29 @@
+"""add content hash to maintenance files
+
+Revision ID: b7d41c9e2f68
+Revises: 8b2e6f4a9d31
+Create Date: 2025-07-24 11:42:17.220394
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41c9e2f68'
+down_revision = '8b2e6f4a9d31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 既存のファイルはハッシュなし（NULL）のまま。以降のアップロードから重複を共有する
+    with op.batch_alter_table('maintenance_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True, comment='内容のSHA-256（同じ内容は保存先を共有）'))
+        batch_op.create_index(batch_op.f('ix_maintenance_files_content_hash'), ['content_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('maintenance_files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_maintenance_files_content_hash'))
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,28 @@
+"""add kitaseki indexes
+
+Revision ID: c18f5a2e7d90
+Revises: 9e41b6d0c3a7
+Create Date: 2025-07-04 10:41:09.662018
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c18f5a2e7d90'
+down_revision = '9e41b6d0c3a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('kitaseki_records', schema=None) as batch_op:
+        batch_op.create_index('idx_kitaseki_dedup', ['transaction_date', 'vehicle_number', 'voucher_number', 'line_number'], unique=False)
+        batch_op.create_index('idx_kitaseki_vehicle_date', ['vehicle_number', 'transaction_date'], unique=False,
+                              postgresql_include=['quantity', 'unit_price', 'product_amount', 'product_name', 'id'])
+
+
+def downgrade():
+    with op.batch_alter_table('kitaseki_records', schema=None) as batch_op:
+        batch_op.drop_index('idx_kitaseki_vehicle_date')
+        batch_op.drop_index('idx_kitaseki_dedup')
@@ -0,0 +1,45 @@
+"""add thumbnail and preview columns to maintenance files
+
+Revision ID: d29a7e5c4b80
+Revises: b7d41c9e2f68
+Create Date: 2025-07-28 09:16:52.031877
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd29a7e5c4b80'
+down_revision = 'b7d41c9e2f68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 既存のファイルは定期ジョブ file_derivatives で順次作成する
+    with op.batch_alter_table('maintenance_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('thumbnail_path', sa.String(length=255), nullable=True, comment='サムネイルのパス'))
+        batch_op.add_column(sa.Column('thumbnail_width', sa.Integer(), nullable=True, comment='サムネイルの幅（px）'))
+        batch_op.add_column(sa.Column('thumbnail_height', sa.Integer(), nullable=True, comment='サムネイルの高さ（px）'))
+        batch_op.add_column(sa.Column('preview_path', sa.String(length=255), nullable=True, comment='プレビュー（PDFは1ページ目）のパス'))
+        batch_op.add_column(sa.Column('preview_width', sa.Integer(), nullable=True, comment='プレビューの幅（px）'))
+        batch_op.add_column(sa.Column('preview_height', sa.Integer(), nullable=True, comment='プレビューの高さ（px）'))
+        batch_op.add_column(sa.Column('derivatives_generated_at', sa.DateTime(), nullable=True, comment='サムネイル・プレビューの作成日時'))
+
+    # 未作成のファイルだけを探すための部分インデックス
+    op.create_index('idx_maintenance_files_pending_derivatives', 'maintenance_files', ['id'],
+                    unique=False, postgresql_where=sa.text('derivatives_generated_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('idx_maintenance_files_pending_derivatives', table_name='maintenance_files')
+
+    with op.batch_alter_table('maintenance_files', schema=None) as batch_op:
+        batch_op.drop_column('derivatives_generated_at')
+        batch_op.drop_column('preview_height')
+        batch_op.drop_column('preview_width')
+        batch_op.drop_column('preview_path')
+        batch_op.drop_column('thumbnail_height')
+        batch_op.drop_column('thumbnail_width')
+        batch_op.drop_column('thumbnail_path')
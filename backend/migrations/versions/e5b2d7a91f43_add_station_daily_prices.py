@@ -0,0 +1,78 @@
+"""add station daily prices
+
+Revision ID: e5b2d7a91f43
+Revises: c18f5a2e7d90
+Create Date: 2025-07-07 16:05:22.318740
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b2d7a91f43'
+down_revision = 'c18f5a2e7d90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # 給油所マスタ（旧サービス管理用に作成済みの環境ではテーブルを流用する）
+    if inspector.has_table('fuel_stations'):
+        unique_names = [constraint['name'] for constraint in inspector.get_unique_constraints('fuel_stations')]
+        with op.batch_alter_table('fuel_stations', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('source', sa.String(length=20), nullable=True, comment='データ提供元（enefle / eneos_wing / kitaseki）'))
+            if 'fuel_stations_station_code_key' in unique_names:
+                batch_op.drop_constraint('fuel_stations_station_code_key', type_='unique')
+            batch_op.create_unique_constraint('uq_fuel_stations_source_code', ['source', 'station_code'])
+            batch_op.create_index('idx_fuel_stations_area', ['prefecture', 'city'], unique=False)
+    else:
+        op.create_table('fuel_stations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=True, comment='データ提供元（enefle / eneos_wing / kitaseki）'),
+        sa.Column('station_code', sa.String(length=50), nullable=True, comment='スタンドコード'),
+        sa.Column('station_name', sa.String(length=200), nullable=False, comment='スタンド名'),
+        sa.Column('company_name', sa.String(length=100), nullable=True, comment='運営会社名'),
+        sa.Column('company_code', sa.String(length=20), nullable=True, comment='会社コード'),
+        sa.Column('address', sa.String(length=500), nullable=True, comment='住所'),
+        sa.Column('prefecture', sa.String(length=20), nullable=True, comment='都道府県'),
+        sa.Column('city', sa.String(length=50), nullable=True, comment='市区町村'),
+        sa.Column('phone', sa.String(length=20), nullable=True, comment='電話番号'),
+        sa.Column('is_active', sa.Boolean(), nullable=True, comment='有効フラグ'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source', 'station_code', name='uq_fuel_stations_source_code')
+        )
+        op.create_index('idx_fuel_stations_area', 'fuel_stations', ['prefecture', 'city'], unique=False)
+
+    op.create_table('fuel_station_daily_prices',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('station_id', sa.Integer(), nullable=False, comment='給油所ID'),
+    sa.Column('price_date', sa.Date(), nullable=False, comment='日付'),
+    sa.Column('product_name', sa.String(length=100), nullable=False, comment='商品名'),
+    sa.Column('fill_count', sa.Integer(), nullable=False, comment='給油件数'),
+    sa.Column('total_liters', sa.Numeric(precision=12, scale=3), nullable=True, comment='合計給油量（リットル）'),
+    sa.Column('total_amount', sa.Numeric(precision=12, scale=0), nullable=True, comment='合計金額（円）'),
+    sa.Column('min_unit_price', sa.Numeric(precision=10, scale=2), nullable=True, comment='最安単価'),
+    sa.Column('max_unit_price', sa.Numeric(precision=10, scale=2), nullable=True, comment='最高単価'),
+    sa.Column('avg_unit_price', sa.Numeric(precision=10, scale=2), nullable=True, comment='平均単価（給油量加重）'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='集計日時'),
+    sa.ForeignKeyConstraint(['station_id'], ['fuel_stations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('station_id', 'price_date', 'product_name', name='uq_station_daily_price')
+    )
+    op.create_index('idx_station_daily_price_date_product', 'fuel_station_daily_prices',
+                    ['price_date', 'product_name', 'station_id'], unique=False,
+                    postgresql_include=['avg_unit_price', 'min_unit_price', 'total_liters'])
+
+
+def downgrade():
+    op.drop_index('idx_station_daily_price_date_product', table_name='fuel_station_daily_prices')
+    op.drop_table('fuel_station_daily_prices')
+    with op.batch_alter_table('fuel_stations', schema=None) as batch_op:
+        batch_op.drop_index('idx_fuel_stations_area')
+        batch_op.drop_constraint('uq_fuel_stations_source_code', type_='unique')
+        batch_op.drop_column('source')
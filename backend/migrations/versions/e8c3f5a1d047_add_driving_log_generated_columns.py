@@ -0,0 +1,44 @@
+"""add generated daily mileage and work hours columns to driving logs
+
+Revision ID: e8c3f5a1d047
+Revises: d29a7e5c4b80
+Create Date: 2025-07-30 14:03:26.718540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c3f5a1d047'
+down_revision = 'd29a7e5c4b80'
+branch_labels = None
+depends_on = None
+
+# app.driving_log.models の DAILY_MILEAGE_SQL / WORK_HOURS_SQL と同じ式
+DAILY_MILEAGE_SQL = 'CASE WHEN start_mileage <> 0 AND end_mileage <> 0 THEN end_mileage - start_mileage ELSE 0 END'
+WORK_HOURS_SQL = (
+    "(EXTRACT(EPOCH FROM end_time - start_time)"
+    " + CASE WHEN end_time < start_time THEN 86400 ELSE 0 END)::double precision / 3600"
+)
+
+
+def upgrade():
+    # 既存の行も追加時に計算される
+    with op.batch_alter_table('driving_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('daily_mileage', sa.Integer(),
+                                      sa.Computed(DAILY_MILEAGE_SQL, persisted=True),
+                                      nullable=True, comment='1日の走行距離'))
+        batch_op.add_column(sa.Column('work_hours', sa.Float(),
+                                      sa.Computed(WORK_HOURS_SQL, persisted=True),
+                                      nullable=True, comment='勤務時間（時間）'))
+        batch_op.create_index('idx_driving_logs_daily_mileage', ['daily_mileage'], unique=False)
+        batch_op.create_index('idx_driving_logs_work_hours', ['work_hours'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('driving_logs', schema=None) as batch_op:
+        batch_op.drop_index('idx_driving_logs_work_hours')
+        batch_op.drop_index('idx_driving_logs_daily_mileage')
+        batch_op.drop_column('work_hours')
+        batch_op.drop_column('daily_mileage')
@@ -0,0 +1,25 @@
+"""add driving logs (date, id) index for cursor pagination
+
+Revision ID: f41b8d2c6e93
+Revises: e8c3f5a1d047
+Create Date: 2025-08-01 10:27:44.913602
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41b8d2c6e93'
+down_revision = 'e8c3f5a1d047'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('driving_logs', schema=None) as batch_op:
+        batch_op.create_index('idx_driving_logs_date_id', ['date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('driving_logs', schema=None) as batch_op:
+        batch_op.drop_index('idx_driving_logs_date_id')
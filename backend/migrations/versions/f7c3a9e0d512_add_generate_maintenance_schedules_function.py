@@ -0,0 +1,122 @@
+"""add generate_maintenance_schedules function
+
+Revision ID: f7c3a9e0d512
+Revises: e5b2d7a91f43
+Create Date: 2025-07-10 11:32:08.904115
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c3a9e0d512'
+down_revision = 'e5b2d7a91f43'
+branch_labels = None
+depends_on = None
+
+
+# 有効期間の満了する日（YYYYMMDD の数値）を日付に変換。8桁でない値・存在しない日付は NULL
+PARSE_EXPIRY_FUNCTION = """
+CREATE OR REPLACE FUNCTION maintenance_parse_expiry(p_value BIGINT)
+RETURNS DATE
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+    IF p_value IS NULL OR p_value < 10000000 OR p_value > 99999999 THEN
+        RETURN NULL;
+    END IF;
+    RETURN make_date((p_value / 10000)::INTEGER, ((p_value / 100) % 100)::INTEGER, (p_value % 100)::INTEGER);
+EXCEPTION
+    WHEN others THEN
+        RETURN NULL;
+END;
+$$;
+"""
+
+# app/maintenance/schedule_generator.py の build_expiry_candidates と同じ規則で予定を生成する
+# （有効期限が今日より後かつ期間内の車両について、期限日に車検、期限の90日×1〜4前に3ヶ月点検）
+GENERATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION generate_maintenance_schedules(
+    p_start_date DATE DEFAULT CURRENT_DATE,
+    p_end_date DATE DEFAULT CURRENT_DATE + 365,
+    p_status_id INTEGER DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_status_id INTEGER := p_status_id;
+    v_inspection_type_id INTEGER;
+    v_three_month_type_id INTEGER;
+    v_count INTEGER;
+BEGIN
+    IF v_status_id IS NULL THEN
+        SELECT id INTO v_status_id FROM maintenance_statuses WHERE name = '仮予定' ORDER BY id LIMIT 1;
+    END IF;
+    SELECT id INTO v_inspection_type_id FROM maintenance_types WHERE name = '車検' ORDER BY id LIMIT 1;
+    SELECT id INTO v_three_month_type_id FROM maintenance_types WHERE name = '3ヶ月点検' ORDER BY id LIMIT 1;
+
+    IF v_status_id IS NULL OR v_inspection_type_id IS NULL OR v_three_month_type_id IS NULL THEN
+        RAISE EXCEPTION '点検種類または状態が正しく設定されていません';
+    END IF;
+
+    WITH vehicle_expiry AS (
+        SELECT v.id AS vehicle_id,
+               maintenance_parse_expiry(v."有効期間の満了する日") AS expiry_date
+        FROM vehicles v
+        WHERE v."有効期間の満了する日" IS NOT NULL
+    ),
+    target_vehicles AS (
+        SELECT vehicle_id, expiry_date
+        FROM vehicle_expiry
+        WHERE expiry_date > CURRENT_DATE
+          AND expiry_date BETWEEN p_start_date AND p_end_date
+    ),
+    candidates AS (
+        SELECT vehicle_id,
+               v_inspection_type_id AS maintenance_type_id,
+               expiry_date AS scheduled_date,
+               '自動生成された車検予定'::TEXT AS notes
+        FROM target_vehicles
+        UNION ALL
+        SELECT t.vehicle_id,
+               v_three_month_type_id,
+               t.expiry_date - 90 * i,
+               '自動生成された3ヶ月点検予定'::TEXT
+        FROM target_vehicles t
+        CROSS JOIN generate_series(1, 4) AS i
+        WHERE t.expiry_date - 90 * i > CURRENT_DATE
+          AND t.expiry_date - 90 * i BETWEEN p_start_date AND p_end_date
+    )
+    INSERT INTO maintenance_schedules
+        (vehicle_id, maintenance_type_id, scheduled_date, status_id, notes, created_at, updated_at)
+    SELECT c.vehicle_id, c.maintenance_type_id, c.scheduled_date, v_status_id, c.notes, now(), now()
+    FROM candidates c
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM maintenance_schedules s
+        WHERE s.vehicle_id = c.vehicle_id
+          AND s.maintenance_type_id = c.maintenance_type_id
+          AND s.scheduled_date = c.scheduled_date
+    );
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+"""
+
+
+def upgrade():
+    op.execute(PARSE_EXPIRY_FUNCTION)
+    op.execute(GENERATE_FUNCTION)
+    # アンチジョイン用（車両・点検種類・予定日）
+    op.create_index('idx_maintenance_schedules_vehicle_type_date', 'maintenance_schedules',
+                    ['vehicle_id', 'maintenance_type_id', 'scheduled_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_maintenance_schedules_vehicle_type_date', table_name='maintenance_schedules')
+    op.execute('DROP FUNCTION IF EXISTS generate_maintenance_schedules(DATE, DATE, INTEGER)')
+    op.execute('DROP FUNCTION IF EXISTS maintenance_parse_expiry(BIGINT)')
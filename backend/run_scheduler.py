@@ -0,0 +1,41 @@
+# backend/run_scheduler.py
+"""定期ジョブのワーカー（Webアプリとは別プロセスで1つだけ起動する）
+
+    python run_scheduler.py                        # 常駐して定期実行
+    python run_scheduler.py --once                 # 全ジョブを1回ずつ実行して終了
+    python run_scheduler.py --job overdue_sweep    # 指定したジョブだけ実行して終了
+"""
+import argparse
+import logging
+
+from dotenv import load_dotenv
+
+from app import create_app
+from app.jobs import create_scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='定期ジョブのワーカー')
+    parser.add_argument('--once', action='store_true', help='全ジョブを1回ずつ実行して終了')
+    parser.add_argument('--job', action='append', help='指定したジョブだけ実行して終了（複数指定可）')
+    parser.add_argument('--poll', type=int, default=30, help='実行時刻の確認間隔（秒）')
+    args = parser.parse_args()
+
+    load_dotenv()
+    app = create_app()
+    app.logger.setLevel(logging.INFO)
+    scheduler = create_scheduler(app)
+
+    if args.job or args.once:
+        for name in args.job or list(scheduler.jobs):
+            if name not in scheduler.jobs:
+                parser.error(f'不明なジョブです: {name}（{", ".join(scheduler.jobs)}）')
+            result = scheduler.run_job(name)
+            print(f'{name}: {result if scheduler.jobs[name].last_error is None else "エラー: " + scheduler.jobs[name].last_error}')
+        return
+
+    scheduler.run_forever(poll_seconds=args.poll)
+
+
+if __name__ == '__main__':
+    main()
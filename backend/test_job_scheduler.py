@@ -0,0 +1,71 @@
+# backend/test_job_scheduler.py
+"""定期ジョブスケジューラの実行タイミングとエラー処理のテスト
+
+ジョブはダミー関数のため、PostgreSQL は使わずメモリ上の SQLite を設定した
+最小限のアプリで実行する（ジョブ実行後のロールバック・セッション破棄に db が必要なため）。
+
+    python test_job_scheduler.py
+    pytest test_job_scheduler.py
+"""
+from datetime import datetime, time, timedelta
+
+from flask import Flask
+
+from app.extensions import db
+from app.jobs import create_scheduler
+from app.utils.scheduler import JobScheduler
+
+
+def _create_test_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def test_interval_and_daily_jobs():
+    app = _create_test_app()
+    scheduler = JobScheduler(app)
+    calls = []
+    scheduler.every('hourly', timedelta(hours=1), lambda: calls.append('hourly') or 1)
+    scheduler.daily('nightly', time(2, 0), lambda: calls.append('nightly') or 2)
+
+    start = datetime.combine(datetime.now().date() + timedelta(days=1), time(1, 0))
+    scheduler.jobs['nightly'].schedule_next(start)
+
+    # 間隔ジョブは初回すぐに実行し、毎日のジョブは指定時刻まで待つ
+    assert scheduler.run_pending(start) == ['hourly']
+    assert scheduler.run_pending(start + timedelta(minutes=30)) == []
+    assert scheduler.run_pending(start + timedelta(hours=1, minutes=1)) == ['hourly', 'nightly']
+    assert scheduler.jobs['nightly'].next_run == datetime.combine(start.date() + timedelta(days=1), time(2, 0))
+    assert calls == ['hourly', 'hourly', 'nightly']
+    print('✅ 実行タイミング')
+
+
+def test_failed_job_does_not_stop_others():
+    app = _create_test_app()
+    scheduler = JobScheduler(app)
+
+    def broken():
+        raise RuntimeError('失敗')
+
+    scheduler.every('broken', timedelta(minutes=5), broken)
+    scheduler.every('ok', timedelta(minutes=5), lambda: 'done')
+
+    assert scheduler.run_pending() == ['broken', 'ok']
+    assert scheduler.jobs['broken'].last_error == '失敗'
+    assert scheduler.jobs['ok'].last_result == 'done'
+    print('✅ エラー時も他のジョブを継続')
+
+
+def test_registered_jobs():
+    scheduler = create_scheduler(_create_test_app())
+    assert set(scheduler.jobs) == {'overdue_sweep', 'refresh_rollups', 'regenerate_tentative', 'file_derivatives'}
+    print('✅ 登録ジョブ')
+
+
+if __name__ == '__main__':
+    print('=== 定期ジョブスケジューラ テスト ===')
+    test_interval_and_daily_jobs()
+    test_failed_job_does_not_stop_others()
+    test_registered_jobs()
@@ -0,0 +1,139 @@
+# backend/test_kitaseki_indexes.py
+"""キタセキ社データの各エンドポイントが複合インデックスを使えることを実行計画で確認するテスト
+
+DATABASE_URL が PostgreSQL を指し、マイグレーション適用済みの場合のみ実行する。
+テスト用の少量データでは通常シーケンシャルスキャンが選ばれるため、
+enable_seqscan を無効にした上でインデックスが計画に現れるかを確認する。
+
+    python test_kitaseki_indexes.py
+    pytest test_kitaseki_indexes.py
+"""
+import os
+import json
+import pytest
+from sqlalchemy import event, and_
+
+from app import create_app
+from app.extensions import db
+from app.fuel.models import KitasekiRecord
+
+DEDUP_INDEX = 'idx_kitaseki_dedup'
+VEHICLE_INDEX = 'idx_kitaseki_vehicle_date'
+
+
+def _postgres_available():
+    url = os.getenv('DATABASE_URL') or ''
+    return url.startswith('postgres')
+
+
+pytestmark = pytest.mark.skipif(not _postgres_available(), reason='DATABASE_URL が PostgreSQL ではない')
+
+
+def _capture_statements(app, path):
+    """エンドポイントを呼び出し、発行された kitaseki_records へのSELECT文を取得"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'kitaseki_records' in statement:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = app.test_client().get(path)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200, f'{path}: {response.status_code} {response.get_data(as_text=True)}'
+    assert statements, f'{path}: kitaseki_records へのクエリが発行されていません'
+    return statements
+
+
+def _index_names(plan):
+    """EXPLAIN (FORMAT JSON) の結果から使用インデックス名を集める"""
+    names = set()
+    if isinstance(plan, dict):
+        if plan.get('Index Name'):
+            names.add(plan['Index Name'])
+        for value in plan.values():
+            names |= _index_names(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            names |= _index_names(value)
+    return names
+
+
+def _explain(app, statement, parameters):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            with conn.begin() as transaction:
+                conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+                result = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+                plan = result.scalar()
+                transaction.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return _index_names(plan)
+
+
+def _assert_uses_index(app, path, expected_indexes):
+    used = set()
+    for statement, parameters in _capture_statements(app, path):
+        used |= _explain(app, statement, parameters)
+    assert used & set(expected_indexes), f'{path}: {expected_indexes} が使われていません（使用インデックス: {used}）'
+    print(f'✅ {path}: {sorted(used)}')
+
+
+def test_list_kitaseki_records_by_vehicle():
+    app = create_app()
+    _assert_uses_index(app, '/api/fuel/kitaseki/?vehicle_number=877&start_date=2025-01-01&end_date=2025-03-31',
+                       [VEHICLE_INDEX])
+
+
+def test_list_kitaseki_records_by_period():
+    app = create_app()
+    _assert_uses_index(app, '/api/fuel/kitaseki/?start_date=2025-01-01&end_date=2025-03-31',
+                       [DEDUP_INDEX])
+
+
+def test_kitaseki_summary():
+    app = create_app()
+    _assert_uses_index(app, '/api/fuel/kitaseki/summary?start_date=2025-01-01&end_date=2025-03-31',
+                       [DEDUP_INDEX, VEHICLE_INDEX])
+
+
+def test_list_kitaseki_vehicles():
+    app = create_app()
+    _assert_uses_index(app, '/api/fuel/kitaseki/vehicles', [VEHICLE_INDEX])
+
+
+def test_kitaseki_duplicate_check():
+    """CSV取り込み時の1行ごとの重複チェック"""
+    app = create_app()
+    with app.app_context():
+        query = KitasekiRecord.query.filter(
+            and_(
+                KitasekiRecord.transaction_date == '2025-01-15',
+                KitasekiRecord.vehicle_number == '877',
+                KitasekiRecord.voucher_number == '000123',
+                KitasekiRecord.line_number == 1
+            )
+        ).limit(1)
+        compiled = query.statement.compile(db.engine)
+        statement = str(compiled)
+        parameters = compiled.params
+    used = _explain(app, statement, parameters)
+    assert DEDUP_INDEX in used, f'重複チェック: {DEDUP_INDEX} が使われていません（使用インデックス: {used}）'
+    print(f'✅ 重複チェック: {sorted(used)}')
+
+
+if __name__ == '__main__':
+    print('=== キタセキ社データ インデックス使用確認テスト ===')
+    if not _postgres_available():
+        raise SystemExit('⏭️  DATABASE_URL が PostgreSQL ではないため実行できません')
+    test_list_kitaseki_records_by_vehicle()
+    test_list_kitaseki_records_by_period()
+    test_kitaseki_summary()
+    test_list_kitaseki_vehicles()
+    test_kitaseki_duplicate_check()
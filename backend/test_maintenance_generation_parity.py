@@ -0,0 +1,94 @@
+# backend/test_maintenance_generation_parity.py
+"""generate_maintenance_schedules()（PostgreSQL関数）とフォールバックのPython生成（generate_expiry_schedules）の結果が一致することを確認するテスト
+
+DATABASE_URL が PostgreSQL を指し、マイグレーション適用済みの場合のみ実行する。
+いずれの生成結果もロールバックするため、データベースの内容は変わらない。
+
+    python test_maintenance_generation_parity.py
+    pytest test_maintenance_generation_parity.py
+"""
+import os
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from app import create_app
+from app.extensions import db
+from app.maintenance.models import MaintenanceType, MaintenanceStatus, MaintenanceSchedule
+from app.maintenance.schedule_generator import generate_expiry_schedules
+
+
+def _postgres_available():
+    url = os.getenv('DATABASE_URL') or ''
+    return url.startswith('postgres')
+
+
+pytestmark = pytest.mark.skipif(not _postgres_available(), reason='DATABASE_URL が PostgreSQL ではない')
+
+
+def _schedule_keys(since_id):
+    rows = db.session.query(
+        MaintenanceSchedule.vehicle_id,
+        MaintenanceSchedule.maintenance_type_id,
+        MaintenanceSchedule.scheduled_date,
+        MaintenanceSchedule.status_id,
+        MaintenanceSchedule.notes
+    ).filter(MaintenanceSchedule.id > since_id).all()
+    return {tuple(row) for row in rows}
+
+
+def _check_parity(start_date, end_date):
+    app = create_app()
+    with app.app_context():
+        status = MaintenanceStatus.query.filter_by(name='仮予定').first()
+        inspection_type = MaintenanceType.query.filter_by(name='車検').first()
+        three_month_type = MaintenanceType.query.filter_by(name='3ヶ月点検').first()
+        if not status or not inspection_type or not three_month_type:
+            pytest.skip('仮予定・車検・3ヶ月点検のマスタがない')
+
+        max_id = db.session.query(db.func.coalesce(db.func.max(MaintenanceSchedule.id), 0)).scalar()
+
+        # 同じ状態から、フォールバックのPython生成とSQL関数をそれぞれ実行してロールバックする
+        try:
+            python_count = generate_expiry_schedules(
+                start_date, end_date, status.id, inspection_type.id, three_month_type.id
+            )
+            db.session.flush()
+            expected = _schedule_keys(max_id)
+        finally:
+            db.session.rollback()
+
+        try:
+            count = db.session.execute(
+                text('SELECT * FROM generate_maintenance_schedules(:start_date, :end_date, :status_id)'),
+                {'start_date': start_date, 'end_date': end_date, 'status_id': status.id}
+            ).scalar()
+            generated = _schedule_keys(max_id)
+        finally:
+            db.session.rollback()
+
+        assert count == len(generated), f'戻り値 {count} と登録件数 {len(generated)} が一致しません'
+        assert python_count == len(expected), f'Python生成の戻り値 {python_count} と登録件数 {len(expected)} が一致しません'
+        assert generated == expected, (
+            f'生成結果が一致しません（SQLのみ: {sorted(generated - expected)[:5]}, '
+            f'Pythonのみ: {sorted(expected - generated)[:5]}）'
+        )
+        print(f'✅ {start_date} 〜 {end_date}: {count}件で一致')
+
+
+def test_parity_default_window():
+    today = datetime.now().date()
+    _check_parity(today, today + timedelta(days=365))
+
+
+def test_parity_long_window():
+    today = datetime.now().date()
+    _check_parity(today - timedelta(days=180), today + timedelta(days=730))
+
+
+if __name__ == '__main__':
+    print('=== 点検予定生成 SQL/Python 一致確認テスト ===')
+    if not _postgres_available():
+        raise SystemExit('⏭️  DATABASE_URL が PostgreSQL ではないため実行できません')
+    test_parity_default_window()
+    test_parity_long_window()
@@ -0,0 +1,87 @@
+# backend/test_maintenance_optimizer.py
+"""点検予定の平準化（plan_schedules）のテスト
+
+データベースは使わない。
+
+    python test_maintenance_optimizer.py
+    pytest test_maintenance_optimizer.py
+"""
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from app.maintenance.optimizer import plan_schedules
+
+
+def _days(start, count):
+    return [start + timedelta(days=i) for i in range(count)]
+
+
+def test_respects_capacity_and_deadline():
+    start = date(2025, 4, 1)
+    days = _days(start, 30)
+    # 10台の期限が同じ日に集中している
+    jobs = [{'id': i, 'vehicle_id': i, 'earliest': start, 'latest': start + timedelta(days=9)} for i in range(10)]
+
+    assignments, unassigned = plan_schedules(jobs, days, technicians=[1, 2], capacity=1)
+
+    assert unassigned == []
+    load = Counter(assignments.values())
+    assert max(load.values()) == 1, '整備士の1日の受け持ち件数を超えています'
+    for job in jobs:
+        day, _ = assignments[job['id']]
+        assert job['earliest'] <= day <= job['latest'], '許容期間外に割り当てられています'
+    print('✅ 受け持ち件数と期限を守る')
+
+
+def test_avoids_vehicle_driving_days():
+    start = date(2025, 4, 7)  # 月曜
+    days = _days(start, 5)
+    jobs = [{'id': 1, 'vehicle_id': 10, 'earliest': start, 'latest': start + timedelta(days=4)}]
+    busy_days = {(10, start + timedelta(days=4))}
+    # 月〜木はほぼ毎週稼働している
+    usage_rates = {(10, weekday): 1.0 for weekday in range(4)}
+
+    assignments, _ = plan_schedules(jobs, days, [1], 2, usage_rates=usage_rates, busy_days=busy_days)
+
+    day, _ = assignments[1]
+    assert day != start + timedelta(days=4), '日報のある日に割り当てられています'
+    print(f'✅ 車両の稼働日を避ける（{day}）')
+
+
+def test_reports_unassignable():
+    start = date(2025, 4, 1)
+    jobs = [{'id': i, 'vehicle_id': i, 'earliest': start, 'latest': start} for i in range(3)]
+
+    assignments, unassigned = plan_schedules(jobs, [start], [1], capacity=2)
+
+    assert len(assignments) == 2
+    assert len(unassigned) == 1
+    print('✅ 枠がない予定は未割り当てとして返す')
+
+
+def test_scales_to_quarter():
+    start = date(2025, 4, 1)
+    days = [d for d in _days(start, 92) if d.weekday() < 5]
+    jobs = [{
+        'id': i,
+        'vehicle_id': i % 300,
+        'earliest': start + timedelta(days=(i * 7) % 78),
+        'latest': start + timedelta(days=(i * 7) % 78 + 14),
+    } for i in range(600)]
+
+    started = time.perf_counter()
+    assignments, unassigned = plan_schedules(jobs, days, technicians=list(range(1, 7)), capacity=2)
+    elapsed = time.perf_counter() - started
+
+    assert len(assignments) + len(unassigned) == len(jobs)
+    assert elapsed < 0.5, f'{elapsed:.2f}秒かかりました'
+    print(f'✅ 600件を {elapsed * 1000:.0f}ms で割り当て（未割り当て {len(unassigned)}件）')
+
+
+if __name__ == '__main__':
+    print('=== 点検予定平準化 テスト ===')
+    test_respects_capacity_and_deadline()
+    test_avoids_vehicle_driving_days()
+    test_reports_unassignable()
+    test_scales_to_quarter()
@@ -0,0 +1,94 @@
+# backend/test_storage.py
+"""整備ファイルの保存先（ローカルディスク）・チャンク読み込み・サムネイル作成のテスト
+
+データベース・Supabase は使わない。
+
+    python test_storage.py
+    pytest test_storage.py
+"""
+import hashlib
+import io
+import os
+import tempfile
+
+import pytest
+
+from app.maintenance import previews
+from app.utils.storage import LocalStorage, spool_upload, content_path
+
+
+def test_spool_hashes_in_chunks():
+    data = os.urandom(3 * 1024 + 17)
+    with spool_upload(io.BytesIO(data), chunk_size=1024) as (tmp_path, content_hash, size):
+        assert size == len(data)
+        assert content_hash == hashlib.sha256(data).hexdigest()
+        with open(tmp_path, 'rb') as f:
+            assert f.read() == data
+    assert not os.path.exists(tmp_path), '一時ファイルが残っています'
+    print('✅ チャンクごとに読みながらハッシュとサイズを求める')
+
+
+def test_spool_rejects_oversized():
+    try:
+        with spool_upload(io.BytesIO(b'x' * 2048), chunk_size=512, max_bytes=1024):
+            pass
+    except ValueError:
+        print('✅ 上限を超えるファイルは途中で打ち切る')
+        return
+    raise AssertionError('上限を超えたのに ValueError になりません')
+
+
+def test_local_storage_round_trip():
+    with tempfile.TemporaryDirectory() as root:
+        storage = LocalStorage(root)
+        data = b'%PDF-1.4 test'
+        path = content_path(hashlib.sha256(data).hexdigest(), '.pdf')
+
+        with spool_upload(io.BytesIO(data)) as (tmp_path, _, _):
+            storage.save(path, tmp_path, 'application/pdf')
+
+        assert storage.exists(path)
+        with open(storage.full_path(path), 'rb') as f:
+            assert f.read() == data
+        assert storage.url(path).endswith(path)
+
+        storage.delete(path)
+        assert not storage.exists(path)
+
+        try:
+            storage.full_path('../outside.txt')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('保存先の外を指すパスが通っています')
+    print('✅ ローカル保存・削除と保存先外のパスの拒否')
+
+
+@pytest.mark.skipif(previews.Image is None, reason='Pillow がインストールされていない')
+def test_render_thumbnail_and_preview():
+    with tempfile.TemporaryDirectory() as root:
+        source_path = os.path.join(root, 'photo.jpg')
+        previews.Image.new('RGB', (4000, 3000), 'white').save(source_path, 'JPEG')
+
+        rendered = previews.render_derivatives(source_path, {'thumbnail': 320, 'preview': 1280})
+        try:
+            assert rendered['thumbnail'][1:] == (320, 240)
+            assert rendered['preview'][1:] == (1280, 960)
+            assert os.path.getsize(rendered['thumbnail'][0]) < os.path.getsize(source_path)
+        finally:
+            for tmp_path, _, _ in rendered.values():
+                os.remove(tmp_path)
+
+    assert previews.derivative_path('maintenance/ab/cd/abcd.pdf', 'thumbnail') == 'maintenance/ab/cd/abcd.thumbnail.jpg'
+    print('✅ 縦横比を保ってサムネイル・プレビューを作成')
+
+
+if __name__ == '__main__':
+    print('=== 整備ファイル保存先 テスト ===')
+    test_spool_hashes_in_chunks()
+    test_spool_rejects_oversized()
+    test_local_storage_round_trip()
+    if previews.Image is None:
+        print('⏭️  Pillow がインストールされていないためサムネイル作成はスキップ')
+    else:
+        test_render_thumbnail_and_preview()
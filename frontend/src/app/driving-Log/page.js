@@ -8,11 +8,14 @@ import moment from 'moment';
 import 'moment/locale/ja';
 
 const API_BASE_URL = 'http://127.0.0.1:5000/api';
+const LOGS_PAGE_SIZE = 100;
 
 moment.locale('ja');
 
 export default function DrivingLogPage() {
   const [logs, setLogs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [drivers, setDrivers] = useState([]);
   const [vehicles, setVehicles] = useState([]);
   const [destinations, setDestinations] = useState([]);
@@ -58,15 +61,10 @@ export default function DrivingLogPage() {
     try {
       setLoading(true);
 
-      // 運転日報取得
-      const logsParams = new URLSearchParams(filters);
-      const logsResponse = await fetch(`${API_BASE_URL}/driving-log/logs/?${logsParams}`, {
-        credentials: 'include'
-      });
-      
-      if (!logsResponse.ok) throw new Error('運転日報取得エラー');
-      const logsData = await logsResponse.json();
-      setLogs(logsData);
+      // 運転日報取得（1ページ目）
+      const logsData = await fetchLogsPage(null);
+      setLogs(logsData.logs);
+      setNextCursor(logsData.next_cursor);
 
       // ドライバー一覧取得
       const driversResponse = await fetch(`${API_BASE_URL}/employee/?is_driver=true&is_active=true`, {
@@ -104,6 +102,33 @@ export default function DrivingLogPage() {
     }
   };
 
+  // 運転日報を1ページ分取得（cursor は前ページの next_cursor）
+  const fetchLogsPage = async (cursor) => {
+    const logsParams = new URLSearchParams({ ...filters, limit: LOGS_PAGE_SIZE });
+    if (cursor) logsParams.set('cursor', cursor);
+    const logsResponse = await fetch(`${API_BASE_URL}/driving-log/logs/?${logsParams}`, {
+      credentials: 'include'
+    });
+
+    if (!logsResponse.ok) throw new Error('運転日報取得エラー');
+    return logsResponse.json();
+  };
+
+  // 続きを読み込む
+  const handleLoadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const logsData = await fetchLogsPage(nextCursor);
+      setLogs(prev => [...prev, ...logsData.logs]);
+      setNextCursor(logsData.next_cursor);
+    } catch (err) {
+      console.error('データ取得エラー:', err);
+      setError(`データの取得に失敗しました: ${err.message}`);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // フィルター変更
   const handleFilterChange = (e) => {
     const { name, value } = e.target;
@@ -368,6 +393,13 @@ export default function DrivingLogPage() {
               </tbody>
             </Table>
           )}
+          {nextCursor && (
+            <div className="text-center">
+              <Button variant="outline-secondary" onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore ? <Spinner animation="border" size="sm" /> : 'さらに読み込む'}
+              </Button>
+            </div>
+          )}
         </Card.Body>
       </Card>
 
@@ -124,12 +124,19 @@ export default function EnhancedMaintenanceSchedulePage() {
         }
       }
       
-      const response = await fetch(url);
-      if (!response.ok) {
-        throw new Error(`点検予定取得エラー: ${response.status}`);
-      }
-      
-      const data = await response.json();
+      // 一覧はページ単位で返るため、next_cursor をたどって表示期間の予定をすべて取得する
+      url += '&limit=500';
+      const data = [];
+      let cursor = null;
+      do {
+        const response = await fetch(cursor ? `${url}&cursor=${encodeURIComponent(cursor)}` : url);
+        if (!response.ok) {
+          throw new Error(`点検予定取得エラー: ${response.status}`);
+        }
+        const page = await response.json();
+        data.push(...page.schedules);
+        cursor = page.has_next ? page.next_cursor : null;
+      } while (cursor);
       
       // カレンダー用データに変換
       const calendarEvents = data.map(schedule => ({